@@ -0,0 +1,383 @@
+"""
+Materialized performance aggregates next to the tracking store.
+
+tracking.py calls the on_* hooks after each successful write, and each hook applies a
+delta in one SQLite transaction (default tracking_agg.db, PP_AGG_DB):
+
+    leg_state / slip_state   last contribution of every tracked row (so an update only
+                             needs the new result: old - new is applied, O(1) per row)
+    agg_legs  (dim, key)     n, graded, wins, losses, voids   -> hit rate
+    agg_slips (dim, key)     n, settled, wins, staked, returned, priced -> ROI
+
+Leg dims: all, market, grade, score_bucket. Slip dims: all, tier (bankroll gates), size.
+Reading a dashboard table is a scan of a few dozen rows, independent of history size.
+
+    python aggregates.py rebuild   # recompute from the full history
+    python aggregates.py verify    # exit 1 if the materialized tables drifted
+"""
+import os
+import sys
+import math
+import time
+import bisect
+import sqlite3
+import argparse
+import tempfile
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+import pandas as pd
+
+from slip_logic import LEG_WIN, LEG_LOSS, LEG_VOID, slip_size
+from tiers import TIERS, TIER_EDGES
+
+DB_PATH = os.environ.get("PP_AGG_DB", "tracking_agg.db")
+
+LEG_DIMS = ["all", "market", "grade", "score_bucket"]
+SLIP_DIMS = ["all", "tier", "size"]
+LEG_COUNTERS = ["n", "graded", "wins", "losses", "voids"]
+SLIP_COUNTERS = ["n", "settled", "wins", "staked", "returned", "priced"]
+SETTLED = {"W", "L", "PARTIAL", "REFUND"}
+
+DDL = [
+    """CREATE TABLE IF NOT EXISTS leg_state (
+        slip_id TEXT, prop_id TEXT, market TEXT, grade TEXT, bucket TEXT, result TEXT,
+        PRIMARY KEY (slip_id, prop_id)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS slip_state (
+        slip_id TEXT PRIMARY KEY, tier TEXT, size TEXT, stake REAL, result TEXT, payout REAL) WITHOUT ROWID""",
+    "CREATE TABLE IF NOT EXISTS agg_legs (dim TEXT, key TEXT, " + ", ".join(f"{c} INTEGER" for c in LEG_COUNTERS)
+    + ", PRIMARY KEY (dim, key)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS agg_slips (dim TEXT, key TEXT, " + ", ".join(f"{c} REAL" for c in SLIP_COUNTERS)
+    + ", PRIMARY KEY (dim, key)) WITHOUT ROWID",
+]
+
+_ready = set()
+
+def _init(con: sqlite3.Connection, timeout: float = 30.0):
+    """
+    WAL mode + schema, retried while another process sets up the same file (see
+    tracking_sqlite._init: that lock error skips the busy timeout).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            for stmt in DDL:
+                con.execute(stmt)
+            con.commit()
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() >= deadline:
+                raise
+            con.rollback()
+            time.sleep(0.01)
+
+def connect(path: str = None) -> sqlite3.Connection:
+    path = path or DB_PATH
+    fresh = path not in _ready or not os.path.exists(path)
+    con = sqlite3.connect(path, timeout=30)
+    if fresh:
+        _init(con)
+        _ready.add(path)
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+# -----------------------------
+# ROW -> CONTRIBUTION
+# -----------------------------
+def _num(v: Any) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(f) else f
+
+def _text(v: Any) -> str:
+    return "" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v).strip()
+
+def _grade(score: Optional[float]) -> str:
+    # score_prop's cutoffs
+    if score is None:
+        return "?"
+    return "ELITE" if score >= 78 else "STRONG" if score >= 70 else "OK" if score >= 62 else "FADE"
+
+def _bucket(score: Optional[float]) -> str:
+    if score is None:
+        return "?"
+    lo = int(score // 5 * 5)
+    return f"{lo:03d}–{lo + 4:03d}"
+
+def _tier(bankroll: Optional[float]) -> str:
+    if bankroll is None:
+        return "?"
+    return TIERS[bisect.bisect_right(TIER_EDGES, bankroll)]
+
+def _leg_counts(result: str) -> Tuple[int, ...]:
+    r = result.upper()
+    win, loss, void = r in LEG_WIN, r in LEG_LOSS, r in LEG_VOID
+    return (1, int(win or loss), int(win), int(loss), int(void))
+
+def _slip_counts(stake: Optional[float], result: str, payout: Optional[float]) -> Tuple[float, ...]:
+    settled = result.upper() in SETTLED
+    if result.upper() == "L" and payout is None:
+        payout = 0.0
+    priced = settled and stake is not None and payout is not None  # ROI only counts slips with a payout
+    return (1, int(settled), int(result.upper() == "W"),
+            stake if priced else 0.0, payout if priced else 0.0, int(priced))
+
+def _leg_keys(market: str, grade: str, bucket: str) -> List[Tuple[str, str]]:
+    return [("all", "all"), ("market", market or "?"), ("grade", grade), ("score_bucket", bucket)]
+
+def _slip_keys(tier: str, size: str) -> List[Tuple[str, str]]:
+    return [("all", "all"), ("tier", tier), ("size", size)]
+
+def _add(acc: Dict[Tuple[str, str], List[float]], keys: List[Tuple[str, str]], counts: Tuple, sign: int):
+    for k in keys:
+        cur = acc.setdefault(k, [0] * len(counts))
+        for i, c in enumerate(counts):
+            cur[i] += sign * c
+
+def _flush(con: sqlite3.Connection, table: str, counters: List[str], acc: Dict[Tuple[str, str], List[float]]):
+    sets = ", ".join(f"{c} = {c} + excluded.{c}" for c in counters)
+    con.executemany(
+        f"INSERT INTO {table} (dim, key, {', '.join(counters)}) VALUES (?, ?, {', '.join('?' for _ in counters)}) "
+        f"ON CONFLICT (dim, key) DO UPDATE SET {sets}",
+        [(d, k, *v) for (d, k), v in acc.items() if any(v)],
+    )
+
+# -----------------------------
+# HOOKS (called by tracking.py after a write)
+# -----------------------------
+@contextmanager
+def _write(path: str = None):
+    """
+    One BEGIN IMMEDIATE transaction: the write lock is taken before the hook reads any
+    state, so concurrent hooks (threads or processes) apply their deltas one at a time.
+    """
+    con = connect(path)
+    con.isolation_level = None
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+    finally:
+        con.close()
+
+def on_props(rows: Iterable[Dict[str, Any]], path: str = None):
+    """
+    New (or re-saved) legs: a leg already in leg_state has its old contribution swapped out.
+    """
+    acc: Dict[Tuple[str, str], List[float]] = {}
+    with _write(path) as con:
+        for r in rows:
+            score = _num(r.get("score"))
+            key = (_text(r.get("slip_id")), _text(r.get("prop_id")))
+            market, grade, bucket, result = _text(r.get("market")), _grade(score), _bucket(score), _text(r.get("result"))
+            old = con.execute(
+                "SELECT market, grade, bucket, result FROM leg_state WHERE slip_id = ? AND prop_id = ?", key
+            ).fetchone()
+            if old is not None:
+                _add(acc, _leg_keys(*old[:3]), _leg_counts(old[3]), -1)
+            con.execute("INSERT OR REPLACE INTO leg_state VALUES (?, ?, ?, ?, ?, ?)", (*key, market, grade, bucket, result))
+            _add(acc, _leg_keys(market, grade, bucket), _leg_counts(result), +1)
+        _flush(con, "agg_legs", LEG_COUNTERS, acc)
+
+def on_slips(rows: Iterable[Dict[str, Any]], path: str = None):
+    """
+    New (or re-saved) slips, same replace semantics as on_props.
+    """
+    acc: Dict[Tuple[str, str], List[float]] = {}
+    with _write(path) as con:
+        for r in rows:
+            slip_id = _text(r.get("slip_id"))
+            tier, size = _tier(_num(r.get("bankroll"))), f"{slip_size(r.get('slip_type')) or '?'}-pick"
+            stake, result, payout = _num(r.get("stake")), _text(r.get("result")), _num(r.get("payout"))
+            old = con.execute(
+                "SELECT tier, size, stake, result, payout FROM slip_state WHERE slip_id = ?", (slip_id,)
+            ).fetchone()
+            if old is not None:
+                _add(acc, _slip_keys(old[0], old[1]), _slip_counts(*old[2:]), -1)
+            con.execute("INSERT OR REPLACE INTO slip_state VALUES (?, ?, ?, ?, ?, ?)", (slip_id, tier, size, stake, result, payout))
+            _add(acc, _slip_keys(tier, size), _slip_counts(stake, result, payout), +1)
+        _flush(con, "agg_slips", SLIP_COUNTERS, acc)
+
+def on_leg_results(legs: Iterable[Tuple[str, str, str]], path: str = None):
+    """
+    (slip_id, prop_id, result) updates: swap each leg's old contribution for the new one.
+    """
+    acc: Dict[Tuple[str, str], List[float]] = {}
+    with _write(path) as con:
+        for slip_id, prop_id, result in legs:
+            row = con.execute(
+                "SELECT market, grade, bucket, result FROM leg_state WHERE slip_id = ? AND prop_id = ?",
+                (str(slip_id), str(prop_id)),
+            ).fetchone()
+            if row is None:
+                continue
+            keys = _leg_keys(*row[:3])
+            _add(acc, keys, _leg_counts(row[3]), -1)
+            _add(acc, keys, _leg_counts(_text(result)), +1)
+            con.execute(
+                "UPDATE leg_state SET result = ? WHERE slip_id = ? AND prop_id = ?",
+                (_text(result), str(slip_id), str(prop_id)),
+            )
+        _flush(con, "agg_legs", LEG_COUNTERS, acc)
+
+def on_slip_results(slips: Iterable[Tuple[str, str, Any]], path: str = None):
+    """
+    (slip_id, result, payout) updates.
+    """
+    acc: Dict[Tuple[str, str], List[float]] = {}
+    with _write(path) as con:
+        for slip_id, result, payout in slips:
+            row = con.execute(
+                "SELECT tier, size, stake, result, payout FROM slip_state WHERE slip_id = ?", (str(slip_id),)
+            ).fetchone()
+            if row is None:
+                continue
+            keys = _slip_keys(row[0], row[1])
+            _add(acc, keys, _slip_counts(row[2], row[3], row[4]), -1)
+            _add(acc, keys, _slip_counts(row[2], _text(result), _num(payout)), +1)
+            con.execute(
+                "UPDATE slip_state SET result = ?, payout = ? WHERE slip_id = ?",
+                (_text(result), _num(payout), str(slip_id)),
+            )
+        _flush(con, "agg_slips", SLIP_COUNTERS, acc)
+
+def exists(path: str = None) -> bool:
+    return os.path.exists(path or DB_PATH)
+
+def reset(path: str = None):
+    path = path or DB_PATH
+    for f in [path, path + "-wal", path + "-shm"]:
+        if os.path.exists(f):
+            os.remove(f)
+    _ready.discard(path)
+
+# -----------------------------
+# QUERIES
+# -----------------------------
+def leg_table(dim: str = "market", path: str = None) -> pd.DataFrame:
+    """
+    Leg counters for one dimension plus hit_rate (wins / graded legs).
+    """
+    con = connect(path)
+    try:
+        df = pd.read_sql_query(
+            f"SELECT key, {', '.join(LEG_COUNTERS)} FROM agg_legs WHERE dim = ? AND n > 0 ORDER BY key", con, params=(dim,)
+        )
+    finally:
+        con.close()
+    df["hit_rate"] = (df["wins"] / df["graded"].where(df["graded"] > 0)).round(3)
+    return df.rename(columns={"key": dim})
+
+def slip_table(dim: str = "tier", path: str = None) -> pd.DataFrame:
+    """
+    Slip counters for one dimension plus roi ((returned - staked) / staked over priced slips).
+    """
+    con = connect(path)
+    try:
+        df = pd.read_sql_query(
+            f"SELECT key, {', '.join(SLIP_COUNTERS)} FROM agg_slips WHERE dim = ? AND n > 0 ORDER BY key", con, params=(dim,)
+        )
+    finally:
+        con.close()
+    for c in ["n", "settled", "wins", "priced"]:
+        df[c] = df[c].astype(int)
+    df["roi"] = ((df["returned"] - df["staked"]) / df["staked"].where(df["staked"] > 0)).round(3)
+    if dim == "tier":
+        df = df.sort_values("key", key=lambda k: k.map({t: i for i, t in enumerate(TIERS)}), ignore_index=True)
+    return df.rename(columns={"key": dim})
+
+def _snapshot(path: str = None) -> Dict[str, Dict[Tuple[str, str], Tuple]]:
+    con = connect(path)
+    try:
+        out = {}
+        for table, counters in (("agg_legs", LEG_COUNTERS), ("agg_slips", SLIP_COUNTERS)):
+            rows = con.execute(f"SELECT dim, key, {', '.join(counters)} FROM {table}").fetchall()
+            out[table] = {(r[0], r[1]): tuple(round(float(v), 6) for v in r[2:]) for r in rows if any(r[2:])}
+        return out
+    finally:
+        con.close()
+
+# -----------------------------
+# REBUILD / VERIFY
+# -----------------------------
+def _checkpoint(path: str, timeout: float = 30.0):
+    """
+    Fold the WAL into the main file and truncate it. Retried while readers (or a reader's
+    own checkpoint on close) keep it busy, up to `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    con = sqlite3.connect(path, timeout=timeout)
+    try:
+        while con.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]:
+            if time.monotonic() > deadline:
+                raise sqlite3.OperationalError(f"{path}: WAL still in use, not checkpointed")
+            time.sleep(0.005)
+    finally:
+        con.close()
+
+def rebuild(slips: pd.DataFrame, props: pd.DataFrame, path: str = None) -> Dict[str, int]:
+    """
+    Recompute everything from full histories into `path` (replacing what was there).
+    Built in a uniquely named temp file beside the target and renamed over it, so the
+    store never goes missing and readers never see a half-built one. Concurrent writers
+    serialize on tracking's lock for the store (tracking.rebuild_aggregates /
+    tracking._aggregate).
+    """
+    path = path or DB_PATH
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".rebuild",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)  # an empty file is a valid new SQLite database
+    try:
+        on_slips(slips.to_dict("records"), tmp)
+        on_props(props.to_dict("records"), tmp)
+        _checkpoint(tmp)  # every page in the main file: the renamed file needs no -wal
+        if os.path.exists(path):
+            _checkpoint(path)  # the live -wal stays beside the new file; it must hold no frames
+        os.replace(tmp, path)
+    finally:
+        reset(tmp)  # leftovers after a failure, and tmp's -wal / -shm
+    return {"slips": len(slips), "props": len(props)}
+
+def verify(slips: pd.DataFrame, props: pd.DataFrame, path: str = None) -> List[str]:
+    """
+    Differences between the materialized tables and a fresh rebuild ([] = in sync).
+    """
+    tmp = os.path.join(tempfile.mkdtemp(prefix="pp_agg_"), "verify.db")
+    try:
+        rebuild(slips, props, tmp)
+        want, got = _snapshot(tmp), _snapshot(path)
+    finally:
+        reset(tmp)
+    diffs = []
+    for table in want:
+        for k in sorted(set(want[table]) | set(got[table])):
+            if want[table].get(k) != got[table].get(k):
+                diffs.append(f"{table} {k}: have {got[table].get(k)}, expected {want[table].get(k)}")
+    return diffs
+
+def main(argv: List[str] = None) -> int:
+    import tracking
+
+    ap = argparse.ArgumentParser(description="Rebuild or verify the tracking aggregates.")
+    ap.add_argument("cmd", choices=["rebuild", "verify"])
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args(argv)
+
+    slips, props = tracking.load_slips(), tracking.load_props()
+    if args.cmd == "rebuild":
+        counts = tracking.rebuild_aggregates(args.db)
+        print(f"Rebuilt aggregates from {counts['slips']} slips and {counts['props']} props into {args.db}")
+        return 0
+    diffs = verify(slips, props, args.db)
+    print("\n".join(diffs) if diffs else "Aggregates in sync.")
+    return 1 if diffs else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
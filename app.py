@@ -1,6 +1,6 @@
-import os
 import json
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
 import pandas as pd
@@ -9,9 +9,19 @@ import streamlit as st
 from slip_logic import (
     DEFAULT_MARKETS,
     normalize_last5,
-    score_prop,
     build_recommendations_locked,
+    scenario_matrix,
+    SCENARIO_BANKROLLS,
+    score_cache_stats,
 )
+from board import BoardIndex
+from board_import import import_board
+import calibration
+import gamelog
+import perf
+import simulate
+from models import Prop, props_frame, scored_frame
+import aggregates
 from tracking import (
     load_slips,
     load_props,
@@ -19,6 +29,13 @@ from tracking import (
     save_props,
     update_slip_result,
     update_prop_result,
+    reset_tracking,
+    rebuild_aggregates,
+    parse_settlement,
+    settle_bulk,
+    load_cache_stats,
+    page_slips,
+    page_props,
     download_buttons,
 )
 
@@ -34,9 +51,11 @@ st.caption(
 # Session state
 # -------------------------
 if "board" not in st.session_state:
-    st.session_state.board = []  # list[dict] each prop
+    st.session_state.board = []  # list[Prop]
 if "today_slips_saved" not in st.session_state:
     st.session_state.today_slips_saved = 0
+if "board_index" not in st.session_state:
+    st.session_state.board_index = BoardIndex()  # incremental scores + ranked index
 
 def now_iso():
     return datetime.utcnow().isoformat()
@@ -48,18 +67,36 @@ st.sidebar.header("Daily Inputs")
 bankroll = st.sidebar.number_input("Bankroll ($)", min_value=0.0, value=20.0, step=1.0)
 aggression = st.sidebar.selectbox("Aggression", options=[1], index=0)
 demons_blocked = st.sidebar.checkbox("Block Demons", value=True)
+slip_builder = st.sidebar.selectbox(
+    "Slip builder",
+    options=["greedy", "optimal"],
+    format_func=lambda m: "Top scores (greedy)" if m == "greedy" else "Optimizer (1 leg per player/game)",
+    index=0,
+)
+
+calib = calibration.load()
+use_p_win = st.sidebar.checkbox(
+    "🎯 Calibrated P(win)",
+    value=calib is not None,
+    disabled=calib is None,
+    help="Fitted on graded legs (see Performance dashboard). Adds a p_win column and feeds the EV simulator.",
+)
+
+show_perf = st.sidebar.checkbox("⏱ Performance panel", value=False)
+if show_perf:
+    perf.begin_run("rerun")  # stages below (and in slip_logic / tracking) record into this rerun
+else:
+    perf.cancel_run()  # a run left open by an st.rerun() on this thread
 
 st.sidebar.divider()
 st.sidebar.subheader("Maintenance")
 
 if st.sidebar.button("🧹 RESET ALL TRACKING (Day 1 reset)"):
-    # Delete local CSVs if they exist
-    for f in ["slips_history.csv", "props_history.csv"]:
-        try:
-            if os.path.exists(f):
-                os.remove(f)
-        except Exception:
-            pass
+    # Delete local CSVs + journals if they exist
+    try:
+        reset_tracking()
+    except Exception:
+        pass
 
     # Clear today's in-memory state too
     st.session_state.board = []
@@ -67,6 +104,17 @@ if st.sidebar.button("🧹 RESET ALL TRACKING (Day 1 reset)"):
     st.sidebar.success("Tracking reset complete. Refreshing…")
     st.rerun()
 
+if st.sidebar.button("🔄 Refresh game log"):
+    try:
+        counts = gamelog.ingest_dir()
+        st.sidebar.success(
+            f"Game log: {counts['rows']} new rows from {counts['files']} file(s), "
+            f"{counts['keys']} player/markets updated."
+        )
+    except (OSError, ValueError) as e:
+        st.sidebar.error(f"Game log refresh failed: {e}")
+st.sidebar.caption(f"Game log CSVs: `{gamelog.GAMELOG_DIR}/` (blank last 5 fills from it)")
+
 st.sidebar.divider()
 st.sidebar.subheader("LOCKED RULES (Aggression 1)")
 st.sidebar.write("PrizePicks min bet: **$5**")
@@ -101,199 +149,469 @@ with st.expander("Bankroll gates (locked)", expanded=False):
     )
 
 # -------------------------
-# Step 1 — Add props manually (Option A)
+# Partial reruns
 # -------------------------
-st.header("1) Add props (one at a time)")
-st.write("Goal daily: **8–10 props** for best board selection.")
-
-with st.form("add_prop_form", clear_on_submit=True):
-    c1, c2, c3, c4 = st.columns([1.4, 1.6, 1.0, 1.0])
-
-    sport = c1.selectbox("Sport", ["NBA", "SOCCER", "TENNIS", "NFL", "NHL", "MLB", "OTHER"], index=0)
-    player = c2.text_input("Player (ex: Alperen Sengun)")
-    market = c3.selectbox("Market", DEFAULT_MARKETS, index=0)
-    line = c4.number_input("Line", value=0.0, step=0.5)
+# Board entry, scoring and tracking are fragments: a widget inside one reruns only that
+# fragment. Scoring is nested in board entry because it depends on the board; tracking
+# depends on neither and reruns alone. Saving slips or refitting the P(win) model changes
+# another section's inputs and triggers a full rerun instead.
+@contextmanager
+def fragment_run(label: str):
+    """
+    Time a fragment-only rerun as its own perf run (a full rerun is already being timed).
+    """
+    own = show_perf and not perf.active()
+    if own:
+        perf.begin_run(label)
+    try:
+        yield
+    except BaseException:
+        if own:
+            perf.cancel_run()  # st.rerun() / st.stop() end the fragment early
+        raise
+    if own:
+        perf.end_run()
 
-    c5, c6, c7 = st.columns([2.4, 1.0, 1.0])
-    last5_str = c5.text_input("Last 5 values (paste like: 13 14 16 9 9)")
-    is_goblin = c6.checkbox("Goblin", value=False)
-    is_demon = c7.checkbox("Demon", value=False)
-
-    submitted = st.form_submit_button("➕ Add Prop")
-
-    if submitted:
-        if not player.strip():
-            st.error("Player is required.")
-        elif line == 0.0:
-            st.error("Line must be set (not 0).")
-        else:
-            last5 = normalize_last5(last5_str)
-            prop = {
-                "prop_id": str(uuid.uuid4())[:8],
-                "sport": sport,
-                "player": player.strip(),
-                "market": market,
-                "line": float(line),
-                "last5": last5,  # list[float] length 5 or []
-                "is_goblin": bool(is_goblin),
-                "is_demon": bool(is_demon),
-            }
-            st.session_state.board.append(prop)
-            st.success("Added!")
-
-# Board view + quick actions
-st.subheader("Current board")
-if not st.session_state.board:
-    st.info("Add a few props to get started.")
-else:
-    df_board = pd.DataFrame(st.session_state.board)
-    st.dataframe(df_board, use_container_width=True, height=260)
-
-colA, colB, colC = st.columns([1, 1, 2])
-with colA:
-    if st.button("🧹 Clear board"):
-        st.session_state.board = []
-        st.session_state.today_slips_saved = 0
-        st.rerun()
-
-with colB:
-    # NOTE: download button must be called unconditionally, so we create it here safely
-    payload = {
-        "saved_at": now_iso(),
-        "bankroll": bankroll,
-        "board": st.session_state.board,
-    }
-    st.download_button(
-        "⬇️ Download board JSON",
-        data=json.dumps(payload, indent=2).encode("utf-8"),
-        file_name="pp_board_backup.json",
-        mime="application/json",
-        disabled=(len(st.session_state.board) == 0),
-    )
+# -------------------------
+# Step 1 — Add props manually (Option A)
+# -------------------------
+@st.fragment
+def board_section():
+    with fragment_run("fragment:board"):
+        _board_entry()
+        scoring_section()  # nested: reruns whenever the board may have changed
+
+def _board_entry():
+    st.header("1) Add props")
+    st.write("Goal daily: **8–10 props** for best board selection.")
+
+    with st.form("add_prop_form", clear_on_submit=True):
+        c1, c2, c3, c4 = st.columns([1.4, 1.6, 1.0, 1.0])
+
+        sport = c1.selectbox("Sport", ["NBA", "SOCCER", "TENNIS", "NFL", "NHL", "MLB", "OTHER"], index=0)
+        player = c2.text_input("Player (ex: Alperen Sengun)")
+        market = c3.selectbox("Market", DEFAULT_MARKETS, index=0)
+        line = c4.number_input("Line", value=0.0, step=0.5)
+
+        c5, c8, c6, c7 = st.columns([2.4, 1.2, 1.0, 1.0])
+        last5_str = c5.text_input("Last 5 values (paste like: 13 14 16 9 9; blank = game log)")
+        game = c8.text_input("Game (optional, ex: HOU@LAL)")
+        is_goblin = c6.checkbox("Goblin", value=False)
+        is_demon = c7.checkbox("Demon", value=False)
+
+        submitted = st.form_submit_button("➕ Add Prop")
+
+        if submitted:
+            if not player.strip():
+                st.error("Player is required.")
+            elif line == 0.0:
+                st.error("Line must be set (not 0).")
+            else:
+                last5 = normalize_last5(last5_str)
+                log = None if last5_str.strip() else gamelog.lookup(player, market, line=float(line))
+                if log and log["last5"]:
+                    last5 = log["last5"]
+                prop = Prop(
+                    prop_id=str(uuid.uuid4())[:8],
+                    sport=sport,
+                    player=player.strip(),
+                    market=market,
+                    game=game.strip(),
+                    line=float(line),
+                    last5=tuple(last5),  # 5 floats or ()
+                    is_goblin=bool(is_goblin),
+                    is_demon=bool(is_demon),
+                )
+                st.session_state.board.append(prop)
+                if log and log["last5"]:
+                    st.success(
+                        f"Added! last5 from game log ({log['last_date']}) • L{len(log['lastn'])} avg "
+                        f"{log['mean_n']:.1f} • {log['hits_more_n']}/{len(log['lastn'])} over the line"
+                    )
+                else:
+                    st.success("Added!")
+
+    with st.expander("📥 Bulk import (CSV / JSON / JSONL)", expanded=False):
+        st.caption(
+            "Columns: player, line (required); sport, market, last5, game, is_goblin, is_demon, prop_id. "
+            "A downloaded board JSON imports as-is."
+        )
+        with st.form("bulk_import_form", clear_on_submit=True):
+            upload = st.file_uploader("Board file", type=["csv", "json", "jsonl", "txt"])
+            pasted = st.text_area("…or paste rows (CSV with header, tab-separated, JSON or JSONL)", height=120)
+            imported = st.form_submit_button("📥 Import")
+
+        if imported:
+            src = upload if upload is not None else pasted
+            # parsed + added in this run, so the board below shows them without another rerun
+            new_props, import_errors = import_board(src, existing_ids=[p.prop_id for p in st.session_state.board])
+            new_props, filled = gamelog.fill_last5(new_props)
+            st.session_state.board.extend(new_props)
+            if new_props:
+                st.success(f"Imported {len(new_props)} props" + (f" ({filled} last5 from game log)." if filled else "."))
+            elif not import_errors:
+                st.info("Nothing to import.")
+            if import_errors:
+                st.warning(f"{len(import_errors)} rows skipped.")
+                st.dataframe(pd.DataFrame(import_errors), use_container_width=True, height=160)
+
+    # Board view + quick actions
+    st.subheader("Current board")
+    if not st.session_state.board:
+        st.info("Add a few props to get started.")
+    else:
+        df_board = props_frame(st.session_state.board)
+        st.dataframe(df_board, use_container_width=True, height=260)
+
+    colA, colB, colC = st.columns([1, 1, 2])
+    with colA:
+        if st.button("🧹 Clear board"):
+            st.session_state.board = []
+            st.session_state.today_slips_saved = 0
+            st.rerun()
+
+    with colB:
+        # NOTE: download button must be called unconditionally, so we create it here safely
+        payload = {
+            "saved_at": now_iso(),
+            "bankroll": bankroll,
+            "board": [p.to_dict() for p in st.session_state.board],
+        }
+        st.download_button(
+            "⬇️ Download board JSON",
+            data=json.dumps(payload, indent=2).encode("utf-8"),
+            file_name="pp_board_backup.json",
+            mime="application/json",
+            disabled=(len(st.session_state.board) == 0),
+        )
 
 # -------------------------
 # Step 2 — Score board
 # -------------------------
-st.header("2) Score board + Build slips")
-
-if st.session_state.board:
-    scored = []
-    for p in st.session_state.board:
-        scored.append(score_prop(p, demons_blocked=demons_blocked))
-
-    df_scored = pd.DataFrame(scored).sort_values("score", ascending=False)
-    st.subheader("Ranked props (top = best)")
-    st.dataframe(df_scored, use_container_width=True, height=340)
-
-    # -------------------------
-    # Step 3 — Recommendations (locked)
-    # -------------------------
-    st.header("3) Recommendation (PLAY vs SKIP) — Locked rules")
-
-    rec = build_recommendations_locked(
-        scored_props=scored,
-        bankroll=float(bankroll),
-        demons_blocked=bool(demons_blocked),
-        slips_already_saved=int(st.session_state.today_slips_saved),
-    )
-
-    if rec["action"] == "SKIP":
-        st.error(f"SKIP: {rec['reason']}")
-    else:
-        st.success(f"PLAY: {rec['summary']}")
-        st.write(rec["reason"])
-
-        for idx, slip in enumerate(rec["slips"], start=1):
-            st.markdown(f"### Slip {idx}: {slip['slip_type']} — Stake **${slip['stake']:.2f}**")
-            st.dataframe(pd.DataFrame(slip["legs"]), use_container_width=True, height=220)
-
-        if st.button("✅ Save recommended slip(s) to tracking", type="primary"):
-            created_at = now_iso()
-
-            for slip in rec["slips"]:
-                slip_id = str(uuid.uuid4())[:8]
-                save_slip({
-                    "slip_id": slip_id,
-                    "created_at": created_at,
-                    "bankroll": float(bankroll),
-                    "aggression": 1,
-                    "stake": float(slip["stake"]),
-                    "slip_type": slip["slip_type"],
-                    "action": "PLAY",
-                    "reason": rec["reason"],
-                    "result": "",
-                    "payout": "",
-                    "notes": "",
-                    "legs_json": json.dumps(slip["legs"]),
-                })
-
-                prop_rows = []
-                for i, leg in enumerate(slip["legs"], start=1):
-                    prop_rows.append({
+@st.fragment
+def scoring_section():
+    with fragment_run("fragment:scoring"):
+        _scoring()
+
+def _scoring():
+    st.header("2) Score board + Build slips")
+
+    board_index = st.session_state.board_index
+    with perf.stage("board.sync") as t:
+        board_index.sync(st.session_state.board, demons_blocked=demons_blocked)
+        t.rows = board_index.rescored
+
+    if st.session_state.board:
+        scored = board_index.ranked()  # already score-descending
+
+        p_win = {}
+        with perf.stage("render.ranked", rows=len(scored)):
+            df_scored = scored_frame(scored)
+            if use_p_win and calib is not None:
+                df_scored.insert(df_scored.columns.get_loc("score") + 1, "p_win", calibration.predict_props(scored, calib).round(3))
+                p_win = dict(zip(df_scored["prop_id"].astype(str), df_scored["p_win"]))
+            st.subheader("Ranked props (top = best)")
+            st.dataframe(df_scored, use_container_width=True, height=340)
+
+        # -------------------------
+        # Step 3 — Recommendations (locked)
+        # -------------------------
+        st.header("3) Recommendation (PLAY vs SKIP) — Locked rules")
+
+        rec = build_recommendations_locked(
+            scored_props=scored,
+            bankroll=float(bankroll),
+            demons_blocked=bool(demons_blocked),
+            slips_already_saved=int(st.session_state.today_slips_saved),
+            eligible=board_index.eligible(),
+            mode=slip_builder,
+        )
+
+        if rec["action"] == "SKIP":
+            st.error(f"SKIP: {rec['reason']}")
+        else:
+            st.success(f"PLAY: {rec['summary']}")
+            st.write(rec["reason"])
+
+            # Hit rates by grade from tracked history shrink the last5 estimates (needs 20+ graded legs)
+            prior = {}
+            if aggregates.exists():
+                by_grade = aggregates.leg_table("grade")
+                prior = dict(zip(by_grade["grade"], by_grade["hit_rate"].where(by_grade["graded"] >= 20)))
+            sims = simulate.simulate_recommendation(rec, prior=prior, p_win=p_win)
+
+            with perf.stage("render.slips", rows=len(rec["slips"])):
+                for idx, (slip, sim) in enumerate(zip(rec["slips"], sims), start=1):
+                    st.markdown(f"### Slip {idx}: {slip['slip_type']} — Stake **${slip['stake']:.2f}**")
+                    m1, m2, m3 = st.columns(3)
+                    m1.metric("EV", f"${sim['ev']:+.2f}", help=f"{sim['trials']:,} simulated slates, correlated legs")
+                    m2.metric("Bust (pays $0)", f"{sim['p_bust']:.1%}")
+                    m3.metric("Profit", f"{sim['p_profit']:.1%}")
+                    st.dataframe(pd.DataFrame(slip["legs"]), use_container_width=True, height=220)
+
+            if st.button("✅ Save recommended slip(s) to tracking", type="primary"):
+                created_at = now_iso()
+
+                for slip in rec["slips"]:
+                    slip_id = str(uuid.uuid4())[:8]
+                    save_slip({
                         "slip_id": slip_id,
-                        "prop_id": f"{slip_id}-{i}",
                         "created_at": created_at,
-                        "player": leg.get("player",""),
-                        "market": leg.get("market",""),
-                        "side": leg.get("pick",""),
-                        "line": leg.get("line",""),
-                        "score": leg.get("score",""),
+                        "bankroll": float(bankroll),
+                        "aggression": 1,
+                        "stake": float(slip["stake"]),
+                        "slip_type": slip["slip_type"],
+                        "action": "PLAY",
+                        "reason": rec["reason"],
                         "result": "",
+                        "payout": "",
+                        "notes": "",
+                        "legs_json": json.dumps(slip["legs"]),
                     })
-                save_props(prop_rows)
 
-            st.session_state.today_slips_saved += len(rec["slips"])
-            st.success("Saved to tracking. Scroll down to update results after games.")
+                    prop_rows = []
+                    for i, leg in enumerate(slip["legs"], start=1):
+                        prop_rows.append({
+                            "slip_id": slip_id,
+                            "prop_id": f"{slip_id}-{i}",
+                            "created_at": created_at,
+                            "player": leg.get("player",""),
+                            "market": leg.get("market",""),
+                            "side": leg.get("pick",""),
+                            "line": leg.get("line",""),
+                            "score": leg.get("score",""),
+                            "result": "",
+                        })
+                    save_props(prop_rows)
+
+                st.session_state.today_slips_saved += len(rec["slips"])
+                st.session_state.flash = "Saved to tracking. Scroll down to update results after games."
+                st.rerun()  # tracking (another fragment) shows the new slips
+
+        with st.expander("🧮 What would the gates say? (bankroll × demons × slips saved)", expanded=False):
+            scenario_view(scored, float(bankroll), slip_builder)
+
+        flash = st.session_state.pop("flash", None)
+        if flash:
+            st.success(flash)
+
+def scenario_view(scored: list, bankroll: float, mode: str) -> None:
+    """
+    One scenario_matrix pass over the preset bankrolls (plus the current one), pivoted to
+    a bankroll x (demons, slips saved) table; rows where any outcome changes are marked.
+    """
+    bankrolls = sorted(set(SCENARIO_BANKROLLS) | {bankroll})
+    rows = scenario_matrix(scored, bankrolls, saved=(0, 1), mode=mode)
+    df = pd.DataFrame(rows)
+    df["scenario"] = (
+        df["demons_blocked"].map({True: "demons blocked", False: "demons allowed"})
+        + " · " + df["slips_saved"].astype(str) + " saved"
+    )
+    df["outcome"] = df["slips"].where(df["action"] == "PLAY", "SKIP")
+    table = df.pivot(index="bankroll", columns="scenario", values="outcome").rename_axis(columns=None)
+    changed = table.ne(table.shift()).any(axis=1)
+    changed.iloc[0] = False
+    table.insert(0, "gate change", changed.map({True: "▶", False: ""}))
+    table.index = [f"${b:,.0f}" + (" (you)" if b == bankroll else "") for b in table.index]
+    st.dataframe(table, use_container_width=True)
+    st.caption(f"{mode} builder on the current board; ▶ marks bankrolls where a recommendation changes.")
 
 # -------------------------
 # Step 4 — Tracking
 # -------------------------
-st.header("4) Track results (Prop + Slip)")
-
-slips_df = load_slips()
-props_df = load_props()
-
-if slips_df.empty:
-    st.info("No saved slips yet. Save a slip above to start tracking.")
-else:
-    st.subheader("Slip history")
-    st.dataframe(slips_df.sort_values("created_at", ascending=False), use_container_width=True)
-
-    st.subheader("Update slip result")
-    c1, c2, c3, c4 = st.columns([1, 1, 1, 2])
-    with c1:
-        slip_id_in = st.text_input("Slip ID")
-    with c2:
-        slip_result = st.selectbox("Slip Result", ["", "W", "L", "PARTIAL"])
-    with c3:
-        payout = st.text_input("Payout ($)")
-    with c4:
-        notes = st.text_input("Notes")
-
-    if st.button("Update Slip"):
-        if not slip_id_in.strip():
-            st.error("Enter a Slip ID.")
-        else:
-            update_slip_result(slip_id_in.strip(), slip_result, payout, notes)
-            st.success("Slip updated (refresh if needed).")
-
-    st.subheader("Prop legs + update prop results")
-    st.dataframe(props_df.sort_values("created_at", ascending=False), use_container_width=True)
-
-    c5, c6, c7 = st.columns([1, 1, 1])
-    with c5:
-        slip_id_leg = st.text_input("Slip ID (for leg)")
-    with c6:
-        prop_id_leg = st.text_input("Prop ID (example: ab12cd34-1)")
-    with c7:
-        prop_res = st.selectbox("Prop Result", ["", "WIN", "LOSS", "PUSH", "DNP"])
-
-    if st.button("Update Prop"):
-        if not slip_id_leg.strip() or not prop_id_leg.strip():
-            st.error("Enter Slip ID and Prop ID.")
-        else:
-            update_prop_result(slip_id_leg.strip(), prop_id_leg.strip(), prop_res)
-            st.success("Prop updated (refresh if needed).")
+ANY = "(any)"
+
+def history_view(kind: str, page_fn, results: list) -> int:
+    """
+    Filter bar + one page of history, newest first. Only the visible window is read
+    and sent; returns the number of rows shown.
+    """
+    f1, f2, f3, f4 = st.columns([1.4, 1, 1, 1.2])
+    days = f1.date_input("Date range", value=(), key=f"{kind}_days")
+    result = f2.selectbox(
+        "Result", [ANY] + results, key=f"{kind}_result",
+        format_func=lambda r: "(ungraded)" if r == "" else r,
+    )
+    filters = {
+        "since": days[0] if len(days) > 0 else None,
+        "until": days[-1] if len(days) > 0 else None,
+        "result": None if result == ANY else result,
+        "search": f4.text_input("Search ID", key=f"{kind}_search"),
+    }
+    if kind == "props":
+        markets = aggregates.leg_table("market")["market"].tolist() if aggregates.exists() else []
+        market = f3.selectbox("Market", [ANY] + markets, key=f"{kind}_market")
+        filters["market"] = None if market == ANY else market
+    size = f3.selectbox("Rows", [25, 50, 100], index=1, key=f"{kind}_size") if kind == "slips" else 50
+
+    page_key = f"{kind}_page"
+    page = int(st.session_state.get(page_key, 1))
+    window, total = page_fn(offset=(page - 1) * size, limit=size, **filters)
+    pages = max(1, -(-total // size))
+    if page > pages:  # filters shrank the result set
+        page = pages
+        window, total = page_fn(offset=(page - 1) * size, limit=size, **filters)
+    st.session_state[page_key] = page
+    p1, p2 = st.columns([1, 3])
+    p1.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    start = (page - 1) * size
+    p2.caption(f"Rows {start + 1 if total else 0}–{start + len(window)} of {total} (page {page}/{pages})")
+    st.dataframe(window, use_container_width=True, hide_index=True)
+    return len(window)
+
+@st.fragment
+def tracking_section():
+    with fragment_run("fragment:tracking"):
+        _tracking()
+
+def _tracking():
+    st.header("4) Track results (Prop + Slip)")
+
+    if not st.toggle("Load tracking history", key="show_tracking"):
+        st.caption("Tracking history, results and the performance dashboard load when switched on.")
+        return
+
+    _, n_slips = page_slips(limit=1)
+    cache = load_cache_stats()
+    st.caption(f"History cache: {cache['hits']} hits • {cache['misses']} misses • {cache['entries']} cached")
+
+    if n_slips == 0:
+        st.info("No saved slips yet. Save a slip above to start tracking.")
+    else:
+        st.subheader("Slip history")
+        with perf.stage("render.slip_history") as t:
+            t.rows = history_view("slips", page_slips, ["", "W", "L", "PARTIAL", "REFUND"])
+
+        st.subheader("Update slip result")
+        c1, c2, c3, c4 = st.columns([1, 1, 1, 2])
+        with c1:
+            slip_id_in = st.text_input("Slip ID")
+        with c2:
+            slip_result = st.selectbox("Slip Result", ["", "W", "L", "PARTIAL", "REFUND"])
+        with c3:
+            payout = st.text_input("Payout ($)")
+        with c4:
+            notes = st.text_input("Notes")
+
+        if st.button("Update Slip"):
+            if not slip_id_in.strip():
+                st.error("Enter a Slip ID.")
+            else:
+                err = update_slip_result(slip_id_in.strip(), slip_result, payout, notes)
+                if err:
+                    st.error(err)
+                else:
+                    st.success("Slip updated (refresh if needed).")
+
+        st.subheader("Prop legs + update prop results")
+        with perf.stage("render.prop_history") as t:
+            t.rows = history_view("props", page_props, ["", "WIN", "LOSS", "PUSH", "DNP"])
+
+        c5, c6, c7 = st.columns([1, 1, 1])
+        with c5:
+            slip_id_leg = st.text_input("Slip ID (for leg)")
+        with c6:
+            prop_id_leg = st.text_input("Prop ID (example: ab12cd34-1)")
+        with c7:
+            prop_res = st.selectbox("Prop Result", ["", "WIN", "LOSS", "PUSH", "DNP"])
+
+        if st.button("Update Prop"):
+            if not slip_id_leg.strip() or not prop_id_leg.strip():
+                st.error("Enter Slip ID and Prop ID.")
+            else:
+                err = update_prop_result(slip_id_leg.strip(), prop_id_leg.strip(), prop_res)
+                if err:
+                    st.error(err)
+                else:
+                    st.success("Prop updated (refresh if needed).")
+
+        st.subheader("Bulk settle (end of night)")
+        with st.form("bulk_settle_form", clear_on_submit=True):
+            settle_text = st.text_area(
+                "One leg per line: `prop_id RESULT` or `slip_id,prop_id,RESULT` (WIN / LOSS / PUSH / DNP)",
+                height=140,
+            )
+            settle_go = st.form_submit_button("⚖️ Settle legs + grade slips")
+        if settle_go:
+            legs, bad_lines = parse_settlement(settle_text)
+            if bad_lines:
+                st.warning(f"Skipped {len(bad_lines)} line(s): " + " | ".join(bad_lines[:5]))
+            if legs:
+                out = settle_bulk(legs)
+                st.success(
+                    f"{out['legs_updated']} legs updated • {out['slips_graded']} slips graded • "
+                    f"{out['slips_pending']} still waiting on legs"
+                )
+                if out["legs_missing"]:
+                    st.error("Not found: " + ", ".join(f"{s}/{p}" for s, p in out["legs_missing"][:10]))
+
+        st.subheader("Performance dashboard")
+        if not aggregates.exists():
+            rebuild_aggregates()  # first run on an existing history
+        with perf.stage("render.aggregates"):
+            legs_dim = st.radio("Leg hit rate by", ["market", "grade", "score_bucket"], horizontal=True)
+            slips_dim = st.radio("Slip ROI by", ["tier", "size"], horizontal=True)
+            overall = aggregates.slip_table("all")
+            if not overall.empty:
+                o = overall.iloc[0]
+                roi = "—" if pd.isna(o["roi"]) else f"{o['roi']:+.1%}"
+                st.caption(
+                    f"{int(o['n'])} slips • {int(o['settled'])} settled • "
+                    f"${o['staked']:.2f} staked • ${o['returned']:.2f} returned • ROI {roi}"
+                )
+            a1, a2 = st.columns(2)
+            with a1:
+                st.dataframe(aggregates.leg_table(legs_dim), use_container_width=True, hide_index=True)
+            with a2:
+                st.dataframe(aggregates.slip_table(slips_dim), use_container_width=True, hide_index=True)
+        if st.button("🔁 Rebuild aggregates from history"):
+            counts = rebuild_aggregates()
+            st.success(f"Rebuilt from {counts['slips']} slips and {counts['props']} props.")
+
+        f1, f2 = st.columns([1, 2])
+        with f1:
+            calib_method = st.selectbox("P(win) model", calibration.METHODS)
+        with f2:
+            if calib is not None:
+                st.caption(
+                    f"Current: {calib['method']} on {calib['n']} legs ({calib['trained_at']}) • "
+                    f"Brier {calib['fit']['brier']} vs {calib['baseline']['brier']} base rate"
+                )
+        if st.button("🎯 Fit P(win) model on graded legs"):
+            try:
+                calibration.save(calibration.fit(load_slips(), load_props(), calib_method))
+                st.success("Model fitted and saved.")
+                st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+
+        st.subheader("Backups")
+        download_buttons()
+
+board_section()
+tracking_section()
 
-    st.subheader("Backups")
-    download_buttons()
\ No newline at end of file
+# -------------------------
+# Performance panel
+# -------------------------
+run = perf.end_run()
+if show_perf and run is not None:
+    with st.expander(f"⏱ Performance — this rerun {run['total_ms']:.1f} ms", expanded=True):
+        stages = pd.DataFrame(
+            [{"stage": k, **v} for k, v in run["stages"].items()],
+            columns=["stage", "ms", "calls", "rows"],
+        )
+        st.dataframe(stages.sort_values("ms", ascending=False), use_container_width=True, hide_index=True)
+        sc = score_cache_stats()
+        st.caption(
+            f"Shared score cache (all sessions): {sc['entries']} cached • {sc['hits']} hits • "
+            f"{sc['misses']} misses • hit rate {(sc['hit_rate'] or 0):.0%} • {sc['evictions']} evicted"
+        )
+        st.caption(f"Rolling log: {len(perf.history())} reruns (p50 / p95 per stage)")
+        st.dataframe(pd.DataFrame(perf.summary()), use_container_width=True, hide_index=True)
+        st.download_button(
+            "⬇️ Export metrics JSON",
+            data=perf.export_json().encode("utf-8"),
+            file_name="pp_perf_metrics.json",
+            mime="application/json",
+        )
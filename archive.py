@@ -0,0 +1,328 @@
+"""
+Columnar, month-partitioned archive of the tracking history.
+
+    python archive.py export            # snapshot tracking history into the archive
+    python archive.py compact           # merge part files of closed months
+    python archive.py stats
+    python archive.py bench             # archive vs tracking history load time
+
+    legs = archive.load("legs", since="2024-03-01", markets=["Points"], columns=["player", "result"])
+
+Two tables under ARCHIVE_DIR (PP_ARCHIVE_DIR, default tracking_archive/):
+    slips/month=YYYY-MM/part-*.{parquet,npz}   slips_history without legs_json (+ n_legs)
+    legs/month=YYYY-MM/part-*.{parquet,npz}    props_history joined with the legs_json
+                                               snapshot: sport, grade, last5_1..last5_5
+Columns are typed (created_at datetime64, numbers float, low-cardinality text as
+dictionary/categorical: player, market, result, ...). Parquet is written when pyarrow is
+installed, otherwise .npz (categoricals as int32 codes + a per-file dictionary); both
+read back the same and PP_ARCHIVE_FORMAT forces one.
+
+Predicates are pushed down three ways: month directories outside the date range are
+never opened, Parquet filters skip row groups, and an .npz part whose market dictionary
+lacks every requested market is skipped without loading its columns.
+"""
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: fall back to .npz parts
+    pq = None
+
+ARCHIVE_DIR = os.environ.get("PP_ARCHIVE_DIR", "tracking_archive")
+FORMAT = os.environ.get("PP_ARCHIVE_FORMAT", "parquet" if pq is not None else "npz").strip().lower()
+TABLES = ["slips", "legs"]
+
+SCHEMAS = {
+    "slips": {
+        "slip_id": "str", "created_at": "datetime", "bankroll": "float", "aggression": "float",
+        "stake": "float", "slip_type": "category", "action": "category", "reason": "category",
+        "result": "category", "payout": "float", "notes": "str", "n_legs": "int",
+    },
+    "legs": {
+        "slip_id": "str", "prop_id": "str", "created_at": "datetime", "player": "category",
+        "sport": "category", "market": "category", "side": "category", "line": "float",
+        "score": "float", "grade": "category", "result": "category",
+        **{f"last5_{i}": "float" for i in range(1, 6)},
+    },
+}
+
+# -----------------------------
+# NORMALIZATION
+# -----------------------------
+def _typed(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    out = {}
+    for col, kind in SCHEMAS[table].items():
+        s = df[col] if col in df.columns else pd.Series([None] * len(df), index=df.index, dtype=object)
+        if kind == "datetime":
+            out[col] = pd.to_datetime(s, errors="coerce", format="ISO8601")
+        elif kind == "float":
+            out[col] = pd.to_numeric(s, errors="coerce").astype(float)
+        elif kind == "int":
+            out[col] = pd.to_numeric(s, errors="coerce").fillna(0).astype(np.int64)
+        elif kind == "category":
+            out[col] = s.where(s.notna() & (s.astype(str) != ""), None).astype("category")
+        else:
+            out[col] = s.fillna("").astype(str)
+    return pd.DataFrame(out).reset_index(drop=True)
+
+def normalize(slips: pd.DataFrame, props: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Tracking frames -> typed archive frames. legs_json is parsed once here so nothing
+    downstream needs json.loads.
+    """
+    snap = []
+    for slip_id, legs_json in zip(slips["slip_id"].astype(str), slips["legs_json"].tolist()):
+        try:
+            legs = json.loads(legs_json) if isinstance(legs_json, str) and legs_json else []
+        except ValueError:
+            legs = []
+        for i, leg in enumerate(legs, start=1):
+            last5 = list(leg.get("last5") or [])
+            last5 = last5 if len(last5) == 5 else [None] * 5
+            snap.append((f"{slip_id}-{i}", leg.get("sport"), leg.get("grade"), *last5))
+    snap_df = pd.DataFrame(snap, columns=["prop_id", "sport", "grade"] + [f"last5_{i}" for i in range(1, 6)])
+    snap_df = snap_df.drop_duplicates("prop_id")
+
+    legs = props.assign(prop_id=props["prop_id"].astype(str)).merge(snap_df, on="prop_id", how="left")
+    n_legs = props.groupby(props["slip_id"].astype(str)).size()
+    slips = slips.assign(n_legs=slips["slip_id"].astype(str).map(n_legs).fillna(0))
+    return {"slips": _typed(slips, "slips"), "legs": _typed(legs, "legs")}
+
+# -----------------------------
+# PART FILES
+# -----------------------------
+def _table_dir(table: str, root: str = None) -> str:
+    if table not in TABLES:
+        raise ValueError(f"table must be one of {TABLES}")
+    return os.path.join(root or ARCHIVE_DIR, table)
+
+def _month(ts: pd.Series) -> pd.Series:
+    return ts.dt.strftime("%Y-%m").fillna("unknown")
+
+def _write_part(df: pd.DataFrame, directory: str, fmt: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.join(directory, f"part-{time.time_ns()}.{fmt}")
+    tmp = name + ".tmp"
+    if fmt == "parquet":
+        if pq is None:
+            raise RuntimeError("Parquet parts need pyarrow; use PP_ARCHIVE_FORMAT=npz.")
+        df.to_parquet(tmp, index=False, engine="pyarrow", row_group_size=64_000)
+    else:
+        arrays = {}
+        for col in df.columns:
+            s = df[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                arrays[col] = s.cat.codes.to_numpy(np.int32)
+                arrays[f"{col}.dict"] = s.cat.categories.astype(str).to_numpy(dtype=str)
+            elif s.dtype.kind == "M":
+                arrays[col] = s.to_numpy("datetime64[ns]")
+            elif s.dtype.kind in "biuf":
+                arrays[col] = s.to_numpy()
+            else:
+                arrays[col] = s.to_numpy(dtype=str)
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+    os.replace(tmp, name)
+    return name
+
+def _read_part(path: str, table: str, columns: Optional[List[str]], since, until,
+               markets: Optional[List[str]]) -> Optional[pd.DataFrame]:
+    want = list(columns or SCHEMAS[table])
+    need = list(dict.fromkeys(want + ["created_at"] + (["market"] if markets else [])))
+    if path.endswith(".parquet"):
+        filters = []
+        if since is not None:
+            filters.append(("created_at", ">=", since))
+        if until is not None:
+            filters.append(("created_at", "<", until))
+        if markets:
+            filters.append(("market", "in", list(markets)))
+        df = pq.read_table(path, columns=need, filters=filters or None).to_pandas()
+    else:
+        with np.load(path, allow_pickle=False) as z:
+            if markets:
+                codes = np.flatnonzero(np.isin(z["market.dict"], list(markets)))
+                if len(codes) == 0:
+                    return None  # dictionary says no requested market lives here
+            ts = z["created_at"]
+            mask = np.ones(len(ts), dtype=bool)
+            if since is not None:
+                mask &= ts >= np.datetime64(since)
+            if until is not None:
+                mask &= ts < np.datetime64(until)
+            if markets:
+                mask &= np.isin(z["market"], codes)
+            if not mask.any():
+                return None
+            cols = {}
+            for col in need:
+                if col not in z.files:
+                    continue
+                a = z[col][mask]
+                if f"{col}.dict" in z.files:
+                    cols[col] = pd.Categorical.from_codes(a, categories=z[f"{col}.dict"])
+                else:
+                    cols[col] = a
+        df = pd.DataFrame(cols)
+    return df[[c for c in want if c in df.columns]]
+
+def _partitions(table: str, since, until, root: str = None) -> List[str]:
+    """
+    Month directories that can hold rows in [since, until).
+    """
+    lo = None if since is None else pd.Timestamp(since).strftime("%Y-%m")
+    hi = None if until is None else (pd.Timestamp(until) - pd.Timedelta(microseconds=1)).strftime("%Y-%m")
+    out = []
+    for d in sorted(glob.glob(os.path.join(_table_dir(table, root), "month=*"))):
+        m = d.rsplit("=", 1)[-1]
+        if m != "unknown" and ((lo is not None and m < lo) or (hi is not None and m > hi)):
+            continue
+        out.append(d)
+    return out
+
+def _parts(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, "part-*.parquet")) + glob.glob(os.path.join(directory, "part-*.npz")))
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate parts, unioning categorical dictionaries instead of falling back to object.
+    """
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    cats = {}
+    for col in frames[0].columns:
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            cats[col] = union_categoricals([f[col] for f in frames], ignore_order=True)
+    out = pd.concat(frames, ignore_index=True)
+    for col, c in cats.items():
+        out[col] = c
+    return out
+
+# -----------------------------
+# API
+# -----------------------------
+def write(table: str, df: pd.DataFrame, root: str = None, fmt: str = None) -> int:
+    """
+    Append a typed frame (see normalize) as one new part per month. Returns parts written.
+    """
+    fmt = fmt or FORMAT
+    if df.empty:
+        return 0
+    n = 0
+    for month, part in df.groupby(_month(df["created_at"]), sort=True, observed=True):
+        _write_part(part.sort_values("created_at", kind="stable"), os.path.join(_table_dir(table, root), f"month={month}"), fmt)
+        n += 1
+    return n
+
+def export(slips: pd.DataFrame, props: pd.DataFrame, root: str = None, fmt: str = None) -> Dict[str, int]:
+    """
+    Snapshot full tracking histories: every month present is rewritten as a single part,
+    so exporting the same history twice leaves the archive unchanged. The new part is
+    written before the month's old parts are removed, so a failed export loses nothing.
+    """
+    counts = {}
+    for table, df in normalize(slips, props).items():
+        base = _table_dir(table, root)
+        months = _month(df["created_at"]).unique() if not df.empty else []
+        old = [p for month in months for p in _parts(os.path.join(base, f"month={month}"))]
+        write(table, df, root, fmt)
+        for p in old:
+            os.remove(p)
+        counts[table] = len(df)
+    return counts
+
+def load(table: str, since=None, until=None, markets: Optional[Iterable[str]] = None,
+         columns: Optional[List[str]] = None, root: str = None) -> pd.DataFrame:
+    """
+    Rows with since <= created_at < until (and market in `markets`, legs only), oldest first.
+    Only the requested columns are read.
+    """
+    since = None if since is None else pd.Timestamp(since)
+    until = None if until is None else pd.Timestamp(until)
+    markets = list(markets) if markets else None
+    if markets and table != "legs":
+        raise ValueError("markets filter applies to the legs table.")
+    frames = []
+    for d in _partitions(table, since, until, root):
+        for path in _parts(d):
+            df = _read_part(path, table, columns, since, until, markets)
+            if df is not None and len(df):
+                frames.append(df)
+    if not frames:
+        return _typed(pd.DataFrame(), table)[list(columns or SCHEMAS[table])]
+    return _concat(frames)
+
+def compact(table: Optional[str] = None, before: Optional[str] = None, root: str = None, fmt: str = None) -> Dict[str, int]:
+    """
+    Merge the part files of each month before `before` (default: the current month, i.e.
+    closed months only) into one created_at-sorted part.
+    """
+    cutoff = pd.Timestamp(before or pd.Timestamp.now().strftime("%Y-%m-01")).strftime("%Y-%m")
+    merged = removed = 0
+    for t in ([table] if table else TABLES):
+        for d in _partitions(t, None, None, root):
+            month = d.rsplit("=", 1)[-1]
+            parts = _parts(d)
+            if month >= cutoff or len(parts) < 2:
+                continue
+            df = _concat([_read_part(p, t, None, None, None, None) for p in parts])
+            _write_part(df.sort_values("created_at", kind="stable"), d, fmt or FORMAT)
+            for p in parts:
+                os.remove(p)
+            merged += 1
+            removed += len(parts)
+    return {"partitions": merged, "parts_merged": removed}
+
+def stats(root: str = None) -> List[Dict[str, Any]]:
+    out = []
+    for t in TABLES:
+        for d in _partitions(t, None, None, root):
+            parts = _parts(d)
+            out.append({
+                "table": t, "month": d.rsplit("=", 1)[-1], "parts": len(parts),
+                "bytes": sum(os.path.getsize(p) for p in parts),
+            })
+    return out
+
+def main(argv: List[str] = None) -> int:
+    import tracking
+
+    ap = argparse.ArgumentParser(description="Columnar tracking archive.")
+    ap.add_argument("cmd", choices=["export", "compact", "stats", "bench"])
+    ap.add_argument("--root", default=ARCHIVE_DIR)
+    ap.add_argument("--format", choices=["parquet", "npz"], default=FORMAT)
+    ap.add_argument("--before", default=None, help="compact months before YYYY-MM (default: current month)")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        counts = export(tracking.load_slips(), tracking.load_props(), args.root, args.format)
+        print(f"Archived {counts['slips']} slips and {counts['legs']} legs into {args.root}/ ({args.format})")
+    elif args.cmd == "compact":
+        print(compact(before=args.before, root=args.root, fmt=args.format))
+    elif args.cmd == "stats":
+        rows = stats(args.root)
+        print(pd.DataFrame(rows).to_string(index=False) if rows else f"No archive at {args.root}/.")
+    else:
+        t0 = time.perf_counter()
+        props = tracking.load_props()
+        t1 = time.perf_counter()
+        legs = load("legs", root=args.root)
+        t2 = time.perf_counter()
+        print(f"{tracking.BACKEND.upper()} props: {len(props)} rows {1e3 * (t1 - t0):.1f} ms {props.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+        print(f"Archive legs: {len(legs)} rows {1e3 * (t2 - t1):.1f} ms {legs.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+Backtest the score_prop formula + locked gates against tracked history.
+
+Legs come from slips_history.csv legs_json (line, side, last5, stored score) joined to
+props_history.csv results. Each tracked day is replayed as a board: legs are rescored
+with the given parameters, the greedy build_recommendations_locked gate logic picks
+slips at that day's bankroll, and slips are settled from the leg results.
+
+    python backtest.py                                   # current weights
+    python backtest.py --grid hit_weight=6,8,10 cushion_cap=12,18,24 gate4_floor=76,78,80 --workers 4
+
+The gate<size>_floor / gate<size>_top parameters are the slip gates (slip_logic.ELITE_FLOORS:
+floor for every leg, floor for the best leg); elite_cut/strong_cut/ok_cut only regrade legs
+for the by-grade report.
+
+Only legs that were actually saved are known, so a replayed day can only pick among
+those legs (the rest of that day's board was never stored).
+"""
+import sys
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from markets import REGISTRY
+from slip_logic import ELITE_FLOORS, MIN_BET, last5_matrix, payout_table
+from tiers import TIERS, TIER_EDGES
+
+# Current score_prop weights, grade cutoffs and slip gates
+DEFAULT_PARAMS = {
+    "hit_weight": 8.0,
+    "cushion_mult": 6.0,
+    "cushion_cap": 18.0,
+    "goblin_bonus": 6.0,
+    "demon_penalty": 30.0,
+    "variance_penalty": 4.0,
+    "volume_bonus": 2.0,
+    "elite_cut": 78.0,
+    "strong_cut": 70.0,
+    "ok_cut": 62.0,
+    **{f"gate{size}_{k}": v for size, gate in ELITE_FLOORS.items() for k, v in zip(("floor", "top"), gate)},
+}
+
+GRADES = ["ELITE", "STRONG", "OK", "FADE"]
+
+# leg result codes
+WIN, LOSS, VOID, UNGRADED, EMPTY = 1, 0, -1, -2, -3
+RESULT_CODES = {"WIN": WIN, "W": WIN, "LOSS": LOSS, "L": LOSS, "PUSH": VOID, "DNP": VOID}
+
+_PAYOUTS = payout_table()
+
+# -----------------------------
+# HISTORY -> ARRAYS
+# -----------------------------
+def _legs_frame(slips: pd.DataFrame, props: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    for slip_id, created_at, bankroll, legs_json in zip(
+        slips["slip_id"].astype(str), slips["created_at"].astype(str),
+        pd.to_numeric(slips["bankroll"], errors="coerce"), slips["legs_json"],
+    ):
+        try:
+            legs = json.loads(legs_json)
+        except (TypeError, ValueError):
+            continue
+        for i, leg in enumerate(legs, start=1):
+            rows.append((
+                slip_id, f"{slip_id}-{i}", created_at[:10], bankroll,
+                str(leg.get("player", "")), str(leg.get("market", "")), leg.get("line"),
+                str(leg.get("pick", "")), leg.get("score"), leg.get("last5") or [],
+            ))
+    legs = pd.DataFrame(rows, columns=[
+        "slip_id", "prop_id", "day", "bankroll", "player", "market", "line", "side", "score", "last5",
+    ])
+    res = props[["slip_id", "prop_id", "result"]].astype({"slip_id": str, "prop_id": str})
+    res = res.drop_duplicates(["slip_id", "prop_id"], keep="last")
+    legs = legs.merge(res, on=["slip_id", "prop_id"], how="left")
+    # the 6-pick bonus reuses top legs, so one board prop can sit in several slips
+    legs = legs.drop_duplicates(["day", "player", "market", "line", "side"], keep="first")
+    return legs.sort_values("day", kind="stable").reset_index(drop=True)
+
+def load_history(slips: Optional[pd.DataFrame] = None, props: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Per-leg feature arrays + per-day bankroll, computed once and shared by every parameter set.
+    Goblin/demon flags aren't stored; they're inferred from the stored score.
+    """
+    if slips is None or props is None:
+        import tracking
+        slips = tracking.load_slips() if slips is None else slips
+        props = tracking.load_props() if props is None else props
+
+    legs = _legs_frame(slips, props)
+    n = len(legs)
+    line = pd.to_numeric(legs["line"], errors="coerce").fillna(0.0).to_numpy()
+    mat, valid = last5_matrix(legs["last5"].tolist())
+    side = legs["side"].to_numpy()
+    more = side == "MORE"
+
+    hm = (mat > line[:, None]).sum(axis=1)
+    hl = (mat < line[:, None]).sum(axis=1)
+    avg = (mat[:, 0] + mat[:, 1] + mat[:, 2] + mat[:, 3] + mat[:, 4]) / 5.0
+
+    penalty, bonus = REGISTRY.flags(REGISTRY.codes(legs["market"].to_numpy()))
+
+    feat = {
+        "n": n,
+        "hits": np.where(more, hm, hl).astype(float),
+        "diff": np.abs(avg - line),
+        "goblin": np.zeros(n),
+        "demon": np.zeros(n),
+        "penalty": penalty.astype(float),
+        "bonus": bonus.astype(float),
+        "ok": valid & (line > 0) & np.isin(side, ["MORE", "LESS"]),
+        "market": legs["market"].to_numpy(),
+        "result": legs["result"].map(RESULT_CODES).fillna(UNGRADED).astype(int).to_numpy(),
+    }
+
+    stored = pd.to_numeric(legs["score"], errors="coerce").to_numpy()
+    base = _score(feat, _params_arrays([DEFAULT_PARAMS]), clip=False)[0]
+    near = lambda a, b: np.abs(a - np.clip(b, 0.0, 100.0)) < 0.011
+    feat["goblin"] = (near(stored, base + 6.0) & ~near(stored, base)).astype(float)
+    feat["demon"] = (near(stored, base - 30.0) & ~near(stored, base)).astype(float)
+
+    # board slots: day index + position of the leg within its day
+    day_codes, days = pd.factorize(legs["day"], sort=True)
+    slot = pd.Series(day_codes).groupby(day_codes).cumcount().to_numpy()
+    feat["days"] = np.asarray(days)
+    feat["day"] = day_codes
+    feat["slot"] = slot
+    feat["width"] = max(6, int(slot.max()) + 1 if n else 6)  # gates look at up to 6 legs
+    feat["bankroll"] = legs.groupby(day_codes)["bankroll"].first().to_numpy() if n else np.zeros(0)
+    return feat
+
+# -----------------------------
+# VECTORIZED REPLAY
+# -----------------------------
+def _params_arrays(grid: List[Dict[str, float]]) -> Dict[str, np.ndarray]:
+    return {k: np.array([float(p.get(k, v)) for p in grid])[:, None] for k, v in DEFAULT_PARAMS.items()}
+
+def _score(feat: Dict[str, Any], P: Dict[str, np.ndarray], clip: bool = True) -> np.ndarray:
+    """
+    score_prop's formula for every (parameter set, leg): shape (G, N).
+    """
+    s = 50.0 + feat["hits"] * P["hit_weight"]
+    s = s + np.minimum(feat["diff"] * P["cushion_mult"], P["cushion_cap"])
+    s = s + feat["goblin"] * P["goblin_bonus"]
+    s = s - feat["demon"] * P["demon_penalty"]
+    s = s - feat["penalty"] * P["variance_penalty"]
+    s = s + feat["bonus"] * P["volume_bonus"]
+    if clip:
+        s = np.clip(s, 0.0, 100.0)
+    return np.where(feat["ok"], s, 0.0)
+
+def _grades(scores: np.ndarray, P: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Grade index into GRADES, shape (G, N).
+    """
+    return np.where(scores >= P["elite_cut"], 0, np.where(scores >= P["strong_cut"], 1, np.where(scores >= P["ok_cut"], 2, 3)))
+
+def _window_count(cum: np.ndarray, off: np.ndarray, size: np.ndarray) -> np.ndarray:
+    """
+    Count over top[off:off+size] from a cumulative count with a leading 0 column.
+    """
+    hi = np.minimum(off + size, cum.shape[-1] - 1)
+    return np.take_along_axis(cum, hi[..., None], -1)[..., 0] - np.take_along_axis(cum, off[..., None], -1)[..., 0]
+
+def _drawdown(pnl: np.ndarray) -> np.ndarray:
+    """
+    Max peak-to-trough drop of cumulative pnl along the last axis.
+    """
+    cum = np.cumsum(pnl, axis=-1)
+    peak = np.maximum.accumulate(np.maximum(cum, 0.0), axis=-1)
+    return (peak - cum).max(axis=-1) if cum.shape[-1] else np.zeros(cum.shape[:-1])
+
+def _evaluate(feat: Dict[str, Any], grid: List[Dict[str, float]], demons_blocked: bool = True) -> Dict[str, np.ndarray]:
+    P = _params_arrays(grid)
+    G, D, M = len(grid), len(feat["bankroll"]), feat["width"]
+    scores = _score(feat, P)
+    grades = _grades(scores, P)
+
+    # leg hit rate by grade (all graded legs)
+    res = feat["result"]
+    out = {}
+    for gi, g in enumerate(GRADES):
+        in_g = grades == gi
+        out[f"wins_{g}"] = (in_g & (res == WIN)).sum(axis=1)
+        out[f"losses_{g}"] = (in_g & (res == LOSS)).sum(axis=1)
+
+    # per-day boards, best first (stable sort = same tie order as _eligible)
+    elig = feat["ok"] & ~(demons_blocked & (feat["demon"] > 0))
+    pos = feat["day"] * M + feat["slot"]
+    S = np.full((G, D * M), -np.inf)
+    S[:, pos[elig]] = scores[:, elig]
+    R = np.full(D * M, EMPTY)
+    R[pos] = res
+    S = S.reshape(G, D, M)
+    order = np.argsort(-S, axis=2, kind="stable")
+    top = np.take_along_axis(S, order, 2)
+    top_r = np.take_along_axis(np.broadcast_to(R.reshape(1, D, M), (G, D, M)), order, 2)
+    n_elig = np.isfinite(top).sum(axis=2)
+
+    def elite(size: int, off: int) -> np.ndarray:
+        # _is_elite_for_size on the sorted window top[off:off+size], with the grid's gates
+        if off + size > M:
+            return np.zeros((G, D), dtype=bool)
+        w = top[..., off:off + size]
+        floor, best = P[f"gate{size}_floor"], P[f"gate{size}_top"]
+        return (n_elig >= off + size) & (w[..., -1] >= floor) & (w[..., 0] >= best)
+
+    bankroll = np.broadcast_to(feat["bankroll"], (G, D))
+    tier = np.searchsorted(TIER_EDGES, feat["bankroll"], side="right")
+    tier = np.broadcast_to(tier, (G, D))
+    play = (bankroll > 0) & (n_elig >= 2)
+
+    e3, e2 = elite(3, 0), elite(2, 0)
+    primary = np.where(tier == 0, np.where(e3, 3, 2), np.where(e3, 3, np.where(e2, 2, 0)))
+    primary = np.where(play, primary, 0)
+
+    # 2nd slip (bankroll >= 85) from the legs after the primary slip
+    e3r = np.where(primary == 3, elite(3, 3), elite(3, 2))
+    e2r = np.where(primary == 3, elite(2, 3), elite(2, 2))
+    second = np.where((tier >= 2) & (primary > 0), np.where(e3r, 3, np.where(e2r, 2, 0)), 0)
+    # 6-pick bonus (bankroll >= 150) only if no 2nd slip
+    six = np.where((tier == 3) & (primary > 0) & (second == 0) & elite(6, 0), 6, 0)
+
+    pad = np.zeros((G, D, 1), dtype=int)
+    cum_w = np.concatenate([pad, np.cumsum(top_r == WIN, axis=2)], axis=2)
+    cum_v = np.concatenate([pad, np.cumsum(top_r == VOID, axis=2)], axis=2)
+    cum_u = np.concatenate([pad, np.cumsum(top_r <= UNGRADED, axis=2)], axis=2)
+
+    pnl = np.zeros((G, D))
+    slips = np.zeros((G, D), dtype=int)
+    settled = np.zeros((G, D), dtype=int)
+    staked = np.zeros((G, D))
+    returned = np.zeros((G, D))
+    picked_w = np.zeros(G, dtype=int)
+    picked_l = np.zeros(G, dtype=int)
+    zero = np.zeros((G, D), dtype=int)
+    for off, size in [(zero, primary), (primary, second), (zero, six)]:
+        live = size > 0
+        wins = _window_count(cum_w, off, size)
+        voids = _window_count(cum_v, off, size)
+        graded = live & (_window_count(cum_u, off, size) == 0)
+        mult = _PAYOUTS[np.clip(size - voids, 0, 6), np.clip(wins, 0, 6)]
+        mult = np.where(size - voids < 2, 1.0, mult)
+        slips += live
+        settled += graded
+        staked += np.where(graded, MIN_BET, 0.0)
+        returned += np.where(graded, MIN_BET * mult, 0.0)
+        pnl += np.where(graded, MIN_BET * (mult - 1.0), 0.0)
+        picked_w += np.where(graded, wins, 0).sum(axis=1)
+        picked_l += np.where(graded, size - wins - voids, 0).sum(axis=1)
+
+    out.update({
+        "slips": slips.sum(axis=1),
+        "settled": settled.sum(axis=1),
+        "staked": staked.sum(axis=1),
+        "returned": returned.sum(axis=1),
+        "max_drawdown": _drawdown(pnl),
+        "picked_wins": picked_w,
+        "picked_losses": picked_l,
+    })
+    for ti, t in enumerate(TIERS):
+        in_t = tier == ti
+        out[f"slips_{t}"] = np.where(in_t, slips, 0).sum(axis=1)
+        out[f"staked_{t}"] = np.where(in_t, staked, 0.0).sum(axis=1)
+        out[f"returned_{t}"] = np.where(in_t, returned, 0.0).sum(axis=1)
+        out[f"drawdown_{t}"] = _drawdown(np.where(in_t, pnl, 0.0))
+    return out
+
+def _rate(num, den):
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), np.nan)
+
+# -----------------------------
+# REPORTS
+# -----------------------------
+def backtest(feat: Dict[str, Any], params: Optional[Dict[str, float]] = None, demons_blocked: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Detailed report for one parameter set: overall, by_tier, by_grade, by_market.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    r = {k: v[0] for k, v in _evaluate(feat, [params], demons_blocked).items()}
+
+    overall = pd.DataFrame([{
+        "slips": r["slips"], "settled": r["settled"], "staked": r["staked"], "returned": r["returned"],
+        "roi": _rate(r["returned"] - r["staked"], r["staked"]).item(),
+        "max_drawdown": r["max_drawdown"],
+        "picked_hit_rate": _rate(r["picked_wins"], r["picked_wins"] + r["picked_losses"]).item(),
+    }])
+    by_tier = pd.DataFrame([{
+        "tier": t, "slips": r[f"slips_{t}"], "staked": r[f"staked_{t}"], "returned": r[f"returned_{t}"],
+        "roi": _rate(r[f"returned_{t}"] - r[f"staked_{t}"], r[f"staked_{t}"]).item(),
+        "max_drawdown": r[f"drawdown_{t}"],
+    } for t in TIERS])
+    by_grade = pd.DataFrame([{
+        "grade": g, "wins": r[f"wins_{g}"], "losses": r[f"losses_{g}"],
+        "hit_rate": _rate(r[f"wins_{g}"], r[f"wins_{g}"] + r[f"losses_{g}"]).item(),
+    } for g in GRADES])
+
+    res = pd.Series(feat["result"])
+    by_market = pd.DataFrame({"market": feat["market"], "win": res == WIN, "loss": res == LOSS})
+    by_market = by_market.groupby("market", as_index=False)[["win", "loss"]].sum()
+    by_market = by_market.rename(columns={"win": "wins", "loss": "losses"})
+    by_market["hit_rate"] = _rate(by_market["wins"], by_market["wins"] + by_market["losses"])
+    return {"overall": overall, "by_tier": by_tier, "by_grade": by_grade, "by_market": by_market}
+
+def param_grid(**axes: List[float]) -> List[Dict[str, float]]:
+    """
+    Cartesian product of parameter values, e.g. param_grid(hit_weight=[6, 8, 10], elite_cut=[76, 78]).
+    """
+    unknown = set(axes) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown backtest parameters: {sorted(unknown)}")
+    keys = list(axes)
+    return [{**DEFAULT_PARAMS, **dict(zip(keys, combo))} for combo in itertools.product(*(axes[k] for k in keys))]
+
+def _grid_chunk(feat: Dict[str, Any], grid: List[Dict[str, float]], demons_blocked: bool) -> pd.DataFrame:
+    r = _evaluate(feat, grid, demons_blocked)
+    df = pd.DataFrame(grid)
+    df["slips"] = r["slips"]
+    df["settled"] = r["settled"]
+    df["staked"] = r["staked"]
+    df["pnl"] = r["returned"] - r["staked"]
+    df["roi"] = _rate(df["pnl"], r["staked"])
+    df["max_drawdown"] = r["max_drawdown"]
+    df["picked_hit_rate"] = _rate(r["picked_wins"], r["picked_wins"] + r["picked_losses"])
+    for g in GRADES:
+        df[f"hit_rate_{g}"] = _rate(r[f"wins_{g}"], r[f"wins_{g}"] + r[f"losses_{g}"])
+    for t in TIERS:
+        df[f"roi_{t}"] = _rate(r[f"returned_{t}"] - r[f"staked_{t}"], r[f"staked_{t}"])
+        df[f"drawdown_{t}"] = r[f"drawdown_{t}"]
+    return df
+
+def run_grid(
+    feat: Dict[str, Any],
+    grid: List[Dict[str, float]],
+    workers: int = 0,
+    chunk_size: int = 250,
+    demons_blocked: bool = True,
+) -> pd.DataFrame:
+    """
+    One summary row per parameter set. Each chunk of the grid is evaluated as one
+    (params x days x legs) array pass; chunks run on a process pool when workers > 0.
+    """
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    if workers <= 0 or len(chunks) == 1:
+        parts = [_grid_chunk(feat, c, demons_blocked) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_grid_chunk, [feat] * len(chunks), chunks, [demons_blocked] * len(chunks)))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+def _parse_axis(spec: str):
+    key, _, values = spec.partition("=")
+    return key.strip(), [float(v) for v in values.split(",") if v.strip()]
+
+def main(argv: List[str] = None):
+    ap = argparse.ArgumentParser(description="Backtest scoring weights and gates on tracked history.")
+    ap.add_argument("--grid", nargs="*", default=[], metavar="PARAM=V1,V2", help=f"params: {', '.join(DEFAULT_PARAMS)}")
+    ap.add_argument("--allow-demons", action="store_true")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--top", type=int, default=15, help="grid rows to print (best ROI first)")
+    ap.add_argument("-o", "--output", help="write the grid results as CSV")
+    args = ap.parse_args(argv)
+
+    started = time.perf_counter()
+    feat = load_history()
+    print(f"{feat['n']} legs over {len(feat['bankroll'])} days loaded in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    if not args.grid:
+        for name, df in backtest(feat, demons_blocked=not args.allow_demons).items():
+            print(f"\n== {name} ==\n{df.to_string(index=False)}")
+        return
+
+    grid = param_grid(**dict(_parse_axis(a) for a in args.grid))
+    started = time.perf_counter()
+    df = run_grid(feat, grid, workers=args.workers, demons_blocked=not args.allow_demons)
+    print(f"{len(grid)} parameter sets in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    if args.output:
+        df.to_csv(args.output, index=False)
+    print(df.sort_values("roi", ascending=False).head(args.top).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
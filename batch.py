@@ -0,0 +1,204 @@
+"""
+Headless batch runner: score + recommend many boards without the Streamlit UI.
+
+    python batch.py boards.jsonl pp_board_backup.json -o results.jsonl --workers 4
+
+Input records are pp_board_backup.json objects ({"bankroll": .., "board": [..]}),
+one per JSONL line, or a JSON file holding one object or a list of them.
+Per-record "bankroll", "demons_blocked", "slips_already_saved" and "mode" override
+the command-line defaults. Output is one JSON line per input record, in input order.
+"""
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
+
+from slip_logic import normalize_last5, score_prop, build_recommendations_locked
+
+def iter_records(paths: List[str]) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (source, record) one at a time; JSONL (and stdin "-") is streamed line by line.
+    """
+    for path in paths:
+        if path == "-" or path.endswith(".jsonl"):
+            f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+            try:
+                for n, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield f"{path}:{n}", json.loads(line)
+                    except ValueError as e:
+                        yield f"{path}:{n}", {"_error": f"Bad JSON: {e}"}
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list) and all(isinstance(r, dict) and "board" in r for r in data):
+                items = data  # list of board records
+            else:
+                items = [data]  # one record, or a bare list of props
+            for n, rec in enumerate(items, start=1):
+                yield f"{path}#{n}", rec
+
+def parse_flag(name: str, value: Any) -> bool:
+    """
+    true/false, 1/0 or yes/no (JSON bools, numbers or strings, any case) -> bool.
+    Anything else raises ValueError instead of silently counting as True.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        v = value.strip().lower()
+        if v in ("true", "1", "yes"):
+            return True
+        if v in ("false", "0", "no"):
+            return False
+    raise ValueError(f"'{name}' must be true/false, 1/0 or yes/no, got {value!r}")
+
+def _prop(p: Dict[str, Any]) -> Dict[str, Any]:
+    last5 = p.get("last5")
+    if isinstance(last5, str):
+        last5 = normalize_last5(last5)
+    elif isinstance(last5, list) and len(last5) != 5:
+        last5 = normalize_last5(" ".join(str(v) for v in last5))
+    flags = {k: p[k] is not None and parse_flag(k, p[k]) for k in ("is_goblin", "is_demon") if k in p}
+    return {**p, **flags, "last5": last5 or []}
+
+def process_record(source: str, rec: Any, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    normalize_last5 -> score_prop -> build_recommendations_locked for one board record.
+    """
+    if isinstance(rec, dict) and "_error" in rec:
+        return {"source": source, "error": rec["_error"]}
+    if isinstance(rec, list):
+        rec = {"board": rec}
+    if not isinstance(rec, dict) or not isinstance(rec.get("board"), list):
+        return {"source": source, "error": "Record has no 'board' list."}
+    try:
+        bankroll = float(rec.get("bankroll", defaults["bankroll"]))
+        demons_blocked = parse_flag("demons_blocked", rec.get("demons_blocked", defaults["demons_blocked"]))
+        saved = int(rec.get("slips_already_saved", defaults["slips_already_saved"]))
+        mode = rec.get("mode", defaults["mode"])
+
+        scored = [score_prop(_prop(p), demons_blocked=demons_blocked) for p in rec["board"]]
+        out = {
+            "source": source,
+            "id": rec.get("id", rec.get("saved_at")),
+            "bankroll": bankroll,
+            "demons_blocked": demons_blocked,
+            "props": len(scored),
+            "recommendation": build_recommendations_locked(
+                scored_props=scored,
+                bankroll=bankroll,
+                demons_blocked=demons_blocked,
+                slips_already_saved=saved,
+                mode=mode,
+            ),
+        }
+        if defaults.get("include_scored"):
+            out["scored"] = scored
+        return out
+    except Exception as e:
+        return {"source": source, "error": f"{type(e).__name__}: {e}"}
+
+def process_chunk(chunk: List[Tuple[str, Any]], defaults: Dict[str, Any]) -> List[Tuple[bool, str]]:
+    """
+    Returns (is_error, json line) per record.
+    """
+    out = []
+    for src, rec in chunk:
+        res = process_record(src, rec, defaults)
+        out.append(("error" in res, json.dumps(res)))
+    return out
+
+def _chunks(records: Iterator[Tuple[str, Any]], size: int) -> Iterator[List[Tuple[str, Any]]]:
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run(paths: List[str], out, defaults: Dict[str, Any], workers: int = 0, chunk_size: int = 64) -> Dict[str, Any]:
+    """
+    Stream records through the pipeline and write JSONL to `out`.
+    At most 2 * workers chunks are in flight, so memory stays bounded for any input size.
+    """
+    started = time.perf_counter()
+    boards = errors = 0
+
+    def emit(lines: List[Tuple[bool, str]]):
+        nonlocal boards, errors
+        for is_error, line in lines:
+            out.write(line + "\n")
+            boards += 1
+            errors += is_error
+
+    chunks = _chunks(iter_records(paths), chunk_size)
+    if workers <= 0:
+        for chunk in chunks:
+            emit(process_chunk(chunk, defaults))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(process_chunk, chunk, defaults))
+                if len(pending) >= workers * 2:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+
+    out.flush()
+    elapsed = time.perf_counter() - started
+    return {
+        "boards": boards,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "boards_per_sec": round(boards / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def main(argv: List[str] = None):
+    ap = argparse.ArgumentParser(description="Score and recommend boards from JSON/JSONL files.")
+    ap.add_argument("inputs", nargs="+", help="JSON / JSONL files ('-' = JSONL on stdin)")
+    ap.add_argument("-o", "--output", default="-", help="JSONL output file (default stdout)")
+    ap.add_argument("--bankroll", type=float, default=20.0)
+    ap.add_argument("--allow-demons", action="store_true", help="default is demons blocked")
+    ap.add_argument("--slips-saved", type=int, default=0)
+    ap.add_argument("--mode", choices=["greedy", "optimal"], default="greedy")
+    ap.add_argument("--include-scored", action="store_true", help="also write every scored prop")
+    ap.add_argument("--workers", type=int, default=0, help="process pool size (0 = run inline)")
+    ap.add_argument("--chunk-size", type=int, default=64)
+    args = ap.parse_args(argv)
+
+    defaults = {
+        "bankroll": args.bankroll,
+        "demons_blocked": not args.allow_demons,
+        "slips_already_saved": args.slips_saved,
+        "mode": args.mode,
+        "include_scored": args.include_scored,
+    }
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run(args.inputs, out, defaults, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(
+        f"{stats['boards']} boards ({stats['errors']} errors) in {stats['seconds']}s "
+        f"— {stats['boards_per_sec']} boards/sec",
+        file=sys.stderr,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+Benchmarks for the scoring, recommendation and tracking hot paths.
+
+    python bench.py                                # quick profile, writes bench_report.json
+    python bench.py --profile full                 # boards up to 100k props, histories up to 1M rows
+    python bench.py --save-baseline                # store this run as bench_baseline.json
+    python bench.py --baseline bench_baseline.json # exit 1 if any case regressed
+    python bench.py --stress --processes 4 --threads 4 # concurrent tracking writes; exit 1 on lost updates
+
+Boards and histories are synthetic and seeded, so runs are reproducible.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import traceback
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from slip_logic import (
+    DEFAULT_MARKETS,
+    normalize_last5,
+    normalize_last5_column,
+    score_prop,
+    score_board,
+    build_recommendations_locked,
+    _eligible,
+)
+
+PROFILES = {
+    "quick": {"boards": [10, 100, 1_000, 10_000], "histories": [1_000, 10_000, 100_000]},
+    "full": {"boards": [10, 100, 1_000, 10_000, 100_000], "histories": [1_000, 10_000, 100_000, 1_000_000]},
+}
+
+# -----------------------------
+# SYNTHETIC DATA
+# -----------------------------
+def synthetic_board(n: int, seed: int = 0, goblin_ratio: float = 0.15, demon_ratio: float = 0.10,
+                    missing_ratio: float = 0.05) -> List[Dict[str, Any]]:
+    """
+    n prop dicts shaped like app.py's board: mixed markets, some goblins/demons,
+    some missing last5, last5 given as the raw pasted string.
+    """
+    rng = np.random.default_rng(seed)
+    lines = rng.choice([0.5, 1.5, 2.5, 4.5, 6.5, 9.5, 18.5, 24.5, 32.5], n)
+    vals = np.maximum(0, np.round(rng.normal(lines[:, None], lines[:, None] * 0.4 + 1.0, (n, 5))))
+    markets = rng.choice(DEFAULT_MARKETS, n)
+    goblin = rng.random(n) < goblin_ratio
+    demon = ~goblin & (rng.random(n) < demon_ratio)
+    missing = rng.random(n) < missing_ratio
+    board = []
+    for i in range(n):
+        board.append({
+            "prop_id": f"{seed:02x}{i:06x}",
+            "sport": "NBA",
+            "player": f"Player {i % max(1, n // 2)}",
+            "market": str(markets[i]),
+            "line": float(lines[i]),
+            "last5_str": "" if missing[i] else " ".join(str(int(v)) for v in vals[i]),
+            "is_goblin": bool(goblin[i]),
+            "is_demon": bool(demon[i]),
+        })
+    return board
+
+def normalized_board(board: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{**p, "last5": normalize_last5(p["last5_str"])} for p in board]
+
+def synthetic_history(rows: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Slips + props history with `rows` prop legs (3 legs per slip), built column-wise.
+    """
+    rng = np.random.default_rng(seed)
+    n_slips = max(1, rows // 3)
+    slip_ids = np.char.add("s", np.arange(n_slips).astype(str))
+    days = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 365, n_slips)), unit="D")
+    created = days.strftime("%Y-%m-%dT12:00:00").to_numpy()
+    leg = {"player": "Player 1", "sport": "NBA", "market": "Points", "line": 10.5, "pick": "MORE",
+           "score": 80.0, "grade": "ELITE", "last5": [11.0, 12.0, 9.0, 14.0, 13.0]}
+    legs_json = json.dumps([leg] * 3)
+    slips = pd.DataFrame({
+        "slip_id": slip_ids, "created_at": created, "bankroll": rng.choice([20.0, 60.0, 100.0, 200.0], n_slips),
+        "aggression": 1, "stake": 5.0, "slip_type": "3-PICK FLEX", "action": "PLAY", "reason": "bench",
+        "result": rng.choice(["W", "L", "PARTIAL", ""], n_slips), "payout": "", "notes": "", "legs_json": legs_json,
+    })
+    idx = np.arange(rows)
+    sid = slip_ids[np.minimum(idx // 3, n_slips - 1)]
+    props = pd.DataFrame({
+        "slip_id": sid,
+        "prop_id": np.char.add(np.char.add(sid.astype(str), "-"), (idx % 3 + 1).astype(str)),
+        "created_at": created[np.minimum(idx // 3, n_slips - 1)],
+        "player": np.char.add("Player ", (idx % 500).astype(str)),
+        "market": rng.choice(DEFAULT_MARKETS, rows),
+        "side": rng.choice(["MORE", "LESS"], rows),
+        "line": rng.choice([0.5, 4.5, 10.5, 24.5], rows),
+        "score": np.round(rng.uniform(55, 95, rows), 2),
+        "result": rng.choice(["WIN", "LOSS", "PUSH", ""], rows),
+    })
+    return {"slips": slips, "props": props}
+
+# -----------------------------
+# TIMING
+# -----------------------------
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+def _repeat_for(n: int) -> int:
+    return 7 if n <= 1_000 else 3 if n <= 100_000 else 1
+
+def bench_scoring(sizes: List[int]) -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for n in sizes:
+        raw = synthetic_board(n, seed=1)
+        board = normalized_board(raw)
+        scored = [score_prop(p) for p in board]
+        elig = _eligible(scored, demons_blocked=True)
+        r = _repeat_for(n)
+        cases = {
+            "normalize_last5": lambda: [normalize_last5(p["last5_str"]) for p in raw],
+            "normalize_last5_column": lambda: normalize_last5_column([p["last5_str"] for p in raw]),
+            "score_prop": lambda: [score_prop(p) for p in board],
+            "score_board": lambda: score_board(board),
+            "_eligible": lambda: _eligible(scored, demons_blocked=True),
+            "build_recommendations_locked": lambda: [
+                build_recommendations_locked(scored, b, True, 0) for b in (20.0, 60.0, 100.0, 200.0)
+            ],
+            "build_recommendations_locked[presorted]": lambda: [
+                build_recommendations_locked(scored, b, True, 0, eligible=elig) for b in (20.0, 60.0, 100.0, 200.0)
+            ],
+            "build_recommendations_locked[optimal]": lambda: [
+                build_recommendations_locked(scored, b, True, 0, eligible=elig, mode="optimal") for b in (20.0, 60.0, 100.0, 200.0)
+            ],
+        }
+        for name, fn in cases.items():
+            out[f"{name}/{n}"] = {"n": n, "seconds": _time(fn, r)}
+    return out
+
+def bench_tracking(sizes: List[int], backend: str) -> Dict[str, Dict[str, Any]]:
+    import tracking
+
+    out = {}
+    for rows in sizes:
+        tmp = tempfile.mkdtemp(prefix="pp_bench_")
+        try:
+            with tracking.use_tracking_dir(tmp, backend):
+                hist = synthetic_history(rows, seed=2)
+                hist["slips"].to_csv(tracking.SLIPS_PATH, index=False)
+                hist["props"].to_csv(tracking.PROPS_PATH, index=False)
+                if backend == "sqlite":
+                    tracking.import_csv_to_sqlite()
+                tracking.rebuild_aggregates()  # so the first timed write doesn't build the store
+
+                slip_row = hist["slips"].iloc[0].to_dict()
+                prop_rows = hist["props"].iloc[:3].to_dict("records")
+                target_slip = str(hist["slips"]["slip_id"].iloc[len(hist["slips"]) // 2])
+                target_prop = f"{target_slip}-2"
+                r = _repeat_for(rows)
+                cases = {
+                    "save_slip": lambda: tracking.save_slip(slip_row),
+                    "save_props": lambda: tracking.save_props(prop_rows),
+                    "update_slip_result": lambda: tracking.update_slip_result(target_slip, "W", "11.25", "bench"),
+                    "update_prop_result": lambda: tracking.update_prop_result(target_slip, target_prop, "WIN"),
+                    "load_props[cold]": lambda: (tracking._invalidate(tracking.PROPS_PATH), tracking._invalidate(tracking.DB_PATH), tracking.load_props()),
+                }
+                for name, fn in cases.items():
+                    out[f"{name}[{backend}]/{rows}"] = {"n": rows, "seconds": _time(fn, r)}
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return out
+
+# -----------------------------
+# CONCURRENT WRITE STRESS
+# -----------------------------
+def _stress_worker(tmp: str, backend: str, worker: int, threads: int, ops: int) -> Dict[str, Any]:
+    """
+    One process: `threads` sessions, each saving `ops` slips (3 legs) and then updating
+    one leg and the slip. Returns the state every session expects to see, built only from
+    writes that returned successfully, plus each failed session's traceback.
+    """
+    import tracking
+
+    with tracking.use_tracking_dir(tmp, backend):
+        return _stress_sessions(worker, threads, ops)
+
+def _stress_sessions(worker: int, threads: int, ops: int) -> Dict[str, Any]:
+    import tracking
+
+    tracking.COMPACT_BYTES = 16 * 1024  # exercise compaction under contention
+
+    slips, props, errors = {}, {}, []
+    done = [0]
+    lock = threading.Lock()
+
+    def wrote(**state):
+        with lock:
+            done[0] += 1
+            for table, rows in state.items():
+                (slips if table == "slips" else props).update(rows)
+
+    def session(t: int):
+        try:
+            for k in range(ops):
+                slip_id = f"w{worker}t{t}k{k}"
+                legs = [f"{slip_id}-{i}" for i in (1, 2, 3)]
+                tracking.save_slip({"slip_id": slip_id, "created_at": "2024-01-01T00:00:00", "bankroll": 100.0,
+                                    "aggression": 1, "stake": 5.0, "slip_type": "3-PICK FLEX", "action": "PLAY",
+                                    "reason": "stress", "result": "", "payout": "", "notes": "", "legs_json": "[]"})
+                wrote(slips={slip_id: ""})
+                tracking.save_props([{"slip_id": slip_id, "prop_id": p, "created_at": "2024-01-01T00:00:00",
+                                      "player": "P", "market": "Points", "side": "MORE", "line": 1.5, "score": 80.0,
+                                      "result": ""} for p in legs])
+                wrote(props={p: "" for p in legs})
+                leg = legs[k % 3]
+                leg_res = "WIN" if k % 2 else "LOSS"
+                slip_res = "W" if k % 2 else "L"
+                err = tracking.update_prop_result(slip_id, leg, leg_res)
+                if err:
+                    raise RuntimeError(err)
+                wrote(props={leg: leg_res})
+                err = tracking.update_slip_result(slip_id, slip_res, "", f"n{k}")
+                if err:
+                    raise RuntimeError(err)
+                wrote(slips={slip_id: slip_res})
+        except Exception:
+            with lock:
+                errors.append(f"session w{worker}t{t}: {traceback.format_exc()}")
+
+    t0 = time.perf_counter()
+    pool = [threading.Thread(target=session, args=(t,)) for t in range(threads)]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    return {"slips": slips, "props": props, "errors": errors, "done": done[0],
+            "seconds": time.perf_counter() - t0, "writes": tracking.write_stats()}
+
+def bench_stress(processes: int, threads: int, ops: int, backend: str) -> Dict[str, Any]:
+    """
+    Run the write stress across processes, then check every write is present exactly once
+    and the aggregates match the history. Any failed session is a problem too.
+    """
+    import tracking
+
+    tmp = tempfile.mkdtemp(prefix="pp_stress_")
+    try:
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processes) as ex:
+            futs = [ex.submit(_stress_worker, tmp, backend, w, threads, ops) for w in range(processes)]
+            parts = [f.result() for f in futs]
+        seconds = time.perf_counter() - t0
+
+        with tracking.use_tracking_dir(tmp, backend):
+            return _stress_check(parts, seconds)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _stress_check(parts: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """
+    Compare the workers' expected state with what tracking reads back (tracking is
+    already pointed at the stress directory).
+    """
+    import aggregates
+    import tracking
+
+    for path in (tracking.SLIPS_PATH, tracking.PROPS_PATH, tracking.DB_PATH):
+        tracking._invalidate(path)
+    slips_df, props_df = tracking.load_slips(), tracking.load_props()
+
+    want_slips = {k: v for p in parts for k, v in p["slips"].items()}
+    want_props = {k: v for p in parts for k, v in p["props"].items()}
+    got_slips = dict(zip(slips_df["slip_id"].astype(str), slips_df["result"].fillna("").astype(str)))
+    got_props = dict(zip(props_df["prop_id"].astype(str), props_df["result"].fillna("").astype(str)))
+    problems = [e for p in parts for e in p["errors"]]
+    if len(slips_df) != len(want_slips):
+        problems.append(f"slips: {len(slips_df)} rows, expected {len(want_slips)}")
+    if len(props_df) != len(want_props):
+        problems.append(f"props: {len(props_df)} rows, expected {len(want_props)}")
+    problems += [f"slip {k}: {got_slips.get(k)!r} != {v!r}" for k, v in want_slips.items() if got_slips.get(k) != v]
+    problems += [f"prop {k}: {got_props.get(k)!r} != {v!r}" for k, v in want_props.items() if got_props.get(k) != v]
+    problems += [f"aggregates {d}" for d in aggregates.verify(slips_df, props_df)]
+
+    writes = sum(p["writes"]["writes"] for p in parts)
+    commits = sum(p["writes"]["commits"] for p in parts)
+    total = sum(p["done"] for p in parts)  # successful save_slip / save_props / update calls
+    return {
+        "n": total,
+        "seconds": seconds,
+        "writes_per_sec": round(total / seconds, 1),
+        "avg_batch": round(writes / commits, 2) if commits else None,
+        "problems": problems,
+    }
+
+# -----------------------------
+# REPORT + BASELINE
+# -----------------------------
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta: float) -> List[str]:
+    """
+    Cases slower than baseline by more than `tolerance` (fraction) and `min_delta` seconds.
+    """
+    regressions = []
+    for key, cur in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        slower = cur["seconds"] - base["seconds"]
+        if cur["seconds"] > base["seconds"] * (1 + tolerance) and slower > min_delta:
+            regressions.append(f"{key}: {base['seconds'] * 1e3:.2f}ms -> {cur['seconds'] * 1e3:.2f}ms")
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark scoring, recommendations and tracking.")
+    ap.add_argument("--profile", choices=list(PROFILES), default="quick")
+    ap.add_argument("--only", choices=["scoring", "tracking"], help="run one group")
+    ap.add_argument("--backend", choices=["csv", "sqlite"], default="csv", help="tracking backend to time")
+    ap.add_argument("-o", "--output", default="bench_report.json")
+    ap.add_argument("--baseline", help="fail (exit 1) on regressions against this report")
+    ap.add_argument("--save-baseline", action="store_true", help="also write the report to bench_baseline.json")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown fraction")
+    ap.add_argument("--min-delta", type=float, default=0.002, help="ignore slowdowns under this many seconds")
+    ap.add_argument("--stress", action="store_true", help="run only the concurrent tracking write stress")
+    ap.add_argument("--processes", type=int, default=4)
+    ap.add_argument("--threads", type=int, default=4, help="sessions per process")
+    ap.add_argument("--ops", type=int, default=25, help="slips saved + updated per session")
+    args = ap.parse_args(argv)
+
+    if args.stress:
+        r = bench_stress(args.processes, args.threads, args.ops, args.backend)
+        print(f"stress[{args.backend}] {args.processes}x{args.threads} sessions: {r['n']} writes in "
+              f"{r['seconds']:.2f}s ({r['writes_per_sec']}/s, avg group commit {r['avg_batch']})")
+        if r["problems"]:
+            print(f"\n{len(r['problems'])} PROBLEM(S) (failed sessions / lost updates):\n"
+                  + "\n".join(r["problems"][:20]), file=sys.stderr)
+            return 1
+        print("No failed sessions or lost updates.")
+        return 0
+
+    prof = PROFILES[args.profile]
+    results = {}
+    if args.only in (None, "scoring"):
+        results.update(bench_scoring(prof["boards"]))
+    if args.only in (None, "tracking"):
+        results.update(bench_tracking(prof["histories"], args.backend))
+    for r in results.values():
+        r["per_item_us"] = round(r["seconds"] / max(1, r["n"]) * 1e6, 3)
+
+    report = {
+        "meta": {
+            "profile": args.profile,
+            "backend": args.backend,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open("bench_baseline.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    width = max(len(k) for k in results) if results else 0
+    for key, r in results.items():
+        print(f"{key:<{width}}  {r['seconds'] * 1e3:10.3f} ms  {r['per_item_us']:10.3f} us/item")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_delta)
+        if regressions:
+            print("\nREGRESSIONS:\n" + "\n".join(regressions), file=sys.stderr)
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+from bisect import bisect_left
+from typing import List, Dict, Any, Tuple, Optional
+
+from models import Prop
+from slip_logic import score_prop_cached
+
+def _fingerprint(prop: Any) -> Any:
+    if isinstance(prop, Prop):
+        return prop  # frozen: an edit is a new, unequal Prop
+    return tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in prop.items())
+
+class _SortedIndex:
+    """
+    Scored props kept in (-score, seq) order: score descending, ties in board order
+    (same order as the stable sort in slip_logic._eligible).
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []
+        self._items: List[Dict[str, Any]] = []
+
+    def insert(self, key: Tuple[float, int], item: Dict[str, Any]):
+        i = bisect_left(self._keys, key)
+        self._keys.insert(i, key)
+        self._items.insert(i, item)
+
+    def remove(self, key: Tuple[float, int]):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+            del self._items[i]
+
+    def items(self) -> List[Dict[str, Any]]:
+        return self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class BoardIndex:
+    """
+    Incrementally scored board.
+    sync() only rescores props that are new or edited (by prop_id + content), and scores
+    through the process-wide cache (slip_logic.score_prop_cached);
+    ranked() / eligible() are kept sorted on insert/remove instead of re-sorting per rerun.
+    """
+
+    def __init__(self):
+        self._scored: Dict[Tuple[str, bool], Tuple[tuple, Dict[str, Any]]] = {}  # (prop_id, demons_blocked) -> (fingerprint, scored)
+        self._seq: Dict[str, int] = {}    # prop_id -> first-seen order
+        self._keys: Dict[str, Tuple[float, int]] = {}  # prop_id -> index key currently in use
+        self._next_seq = 0
+        self._demons_blocked: Optional[bool] = None
+        self._all = _SortedIndex()
+        self._elig = _SortedIndex()
+        self.rescored = 0  # props scored by the last sync()
+
+    def _is_eligible(self, p: Dict[str, Any]) -> bool:
+        if p.get("pick") not in ("MORE", "LESS"):
+            return False
+        return not (self._demons_blocked and bool(p.get("is_demon", False)))
+
+    def _drop(self, pid: str):
+        key = self._keys.pop(pid, None)
+        if key is not None:
+            self._all.remove(key)
+            self._elig.remove(key)
+
+    def _add(self, pid: str, scored: Dict[str, Any]):
+        key = (-scored.get("score", 0.0), self._seq[pid])
+        self._keys[pid] = key
+        self._all.insert(key, scored)
+        if self._is_eligible(scored):
+            self._elig.insert(key, scored)
+
+    def sync(self, board: List[Dict[str, Any]], demons_blocked: bool):
+        """
+        Bring the index in line with `board` (Props or prop dicts with prop_id).
+        """
+        self.rescored = 0
+        if demons_blocked != self._demons_blocked:
+            self._demons_blocked = demons_blocked
+            self._keys.clear()
+            self._all = _SortedIndex()
+            self._elig = _SortedIndex()
+
+        live = set()
+        for p in board:
+            pid = str(p.get("prop_id", ""))
+            live.add(pid)
+            if pid not in self._seq:
+                self._seq[pid] = self._next_seq
+                self._next_seq += 1
+
+            fp = _fingerprint(p)
+            cached = self._scored.get((pid, demons_blocked))
+            if cached is not None and cached[0] == fp:
+                if pid not in self._keys:
+                    self._add(pid, cached[1])
+                continue
+
+            scored = score_prop_cached(p, demons_blocked=demons_blocked)  # shared across sessions
+            self.rescored += 1
+            self._scored[(pid, demons_blocked)] = (fp, scored)
+            self._drop(pid)
+            self._add(pid, scored)
+
+        for pid in [pid for pid in self._seq if pid not in live]:
+            self._drop(pid)
+            del self._seq[pid]
+            self._scored.pop((pid, True), None)
+            self._scored.pop((pid, False), None)
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """
+        All scored props, best first.
+        """
+        return self._all.items()
+
+    def eligible(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Eligible props (MORE/LESS, demons filtered), best first; top-k if k is given.
+        Same list slip_logic._eligible would build from ranked().
+        """
+        items = self._elig.items()
+        return items if k is None else items[:k]
@@ -0,0 +1,249 @@
+"""
+Bulk board import: CSV / JSON / JSONL uploads or pasted text -> Props.
+
+    props, errors = import_board(uploaded_file)          # format from the file name
+    props, errors = import_board(text, fmt="csv")
+
+Rows are read in chunks (CSV records via the csv module, JSONL line by line) and each
+chunk is validated and parsed column-wise (last5 through normalize_last5_column). Bad
+rows are reported as {"row": n, "error": ...} (n = data row, header and blank lines not
+counted) and skipped; the rest of the batch still imports. is_goblin / is_demon take
+the same true/false, 1/0, yes/no values as batch.py (blank = false).
+
+Columns / keys: player, line (required); sport, market, last5, game, is_goblin,
+is_demon, prop_id (optional). pp_board_backup.json ({"board": [...]}) loads as-is.
+"""
+import csv
+import io
+import json
+import uuid
+from typing import List, Dict, Any, Tuple, Iterator, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+from batch import parse_flag
+from models import Prop
+from slip_logic import normalize_last5_column
+
+CHUNK_ROWS = 5_000
+FORMATS = ["csv", "json", "jsonl"]
+
+ALIASES = {"last_5": "last5", "last5_str": "last5", "goblin": "is_goblin", "demon": "is_demon", "id": "prop_id"}
+
+def sniff_format(text: str, name: str = "") -> str:
+    """
+    File extension if it names a format, else JSON/JSONL by the first character, else CSV.
+    """
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if ext in FORMATS:
+        return ext
+    head = text.lstrip()[:1]
+    if head == "[":
+        return "json"
+    if head == "{":
+        first = text.lstrip().split("\n", 1)[0].strip()
+        try:
+            obj = json.loads(first)
+        except ValueError:
+            return "json"  # pretty-printed object
+        return "json" if isinstance(obj, dict) and "board" in obj else "jsonl"
+    return "csv"
+
+# -----------------------------
+# CHUNK READERS -> (row numbers, DataFrame of strings/objects, errors)
+# -----------------------------
+def _csv_header(fields: List[str]) -> List[str]:
+    names, seen = [], {}
+    for f in fields:
+        name = f.strip()
+        if name in seen:  # repeated column: keep it apart like pandas does ("line.1")
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+def _csv_chunks(text: str) -> Iterator[Tuple[List[int], pd.DataFrame, List[Dict[str, Any]]]]:
+    first = text.lstrip().split("\n", 1)[0]
+    sep = "\t" if "\t" in first else ","  # pasted spreadsheet rows are tab-separated
+    header: Optional[List[str]] = None
+    batch, rows, errors = [], [], []
+    n = 0
+    for fields in csv.reader(io.StringIO(text), delimiter=sep, skipinitialspace=True):
+        if not any(f.strip() for f in fields):
+            continue  # blank line
+        if header is None:
+            header = _csv_header(fields)
+            continue
+        n += 1
+        if len(fields) > len(header):
+            errors.append({"row": n, "error": f"Too many fields: {sep.join(fields)[:80]}"})
+        else:
+            batch.append(fields + [""] * (len(header) - len(fields)))
+            rows.append(n)
+        if len(batch) >= CHUNK_ROWS:
+            yield rows, pd.DataFrame(batch, columns=header, dtype=object), errors
+            batch, rows, errors = [], [], []
+    if batch or errors:
+        yield rows, pd.DataFrame(batch, columns=header, dtype=object), errors
+
+def _records_chunks(records: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[List[int], pd.DataFrame, List[Dict[str, Any]]]]:
+    batch, rows, errors = [], [], []
+    for n, rec in records:
+        if isinstance(rec, dict) and "_error" not in rec:
+            batch.append(rec)
+            rows.append(n)
+        else:
+            errors.append({"row": n, "error": rec["_error"] if isinstance(rec, dict) else "Not a JSON object."})
+        if len(batch) >= CHUNK_ROWS:
+            yield rows, pd.DataFrame.from_records(batch), errors
+            batch, rows, errors = [], [], []
+    if batch or errors:
+        yield rows, pd.DataFrame.from_records(batch), errors
+
+def _jsonl_records(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    for n, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield n, json.loads(line)
+        except ValueError as e:
+            yield n, {"_error": f"Bad JSON: {e}"}
+
+def _json_records(text: str) -> Iterator[Tuple[int, Any]]:
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("board", [data])  # pp_board_backup.json or a single prop
+    if not isinstance(data, list):
+        raise ValueError("JSON must be a list of props or an object with a 'board' list.")
+    return enumerate(data, start=1)
+
+# -----------------------------
+# COLUMN-WISE VALIDATION
+# -----------------------------
+def _text(df: pd.DataFrame, col: str) -> List[str]:
+    if col not in df.columns:
+        return [""] * len(df)
+    return ["" if v is None or v != v else str(v).strip() for v in df[col].tolist()]  # v != v: NaN
+
+def _flag(df: pd.DataFrame, col: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (values, bad) for a goblin/demon column through batch.parse_flag; blank = False.
+    """
+    n = len(df)
+    values, bad = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    if col not in df.columns:
+        return values, bad
+    for i, v in enumerate(df[col].tolist()):
+        if v is None or (isinstance(v, float) and v != v) or (isinstance(v, str) and not v.strip()):
+            continue
+        try:
+            values[i] = parse_flag(col, v.item() if isinstance(v, np.generic) else v)
+        except ValueError:
+            bad[i] = True
+    return values, bad
+
+def _last5_text(v: Any) -> Any:
+    if isinstance(v, (list, tuple)):
+        return " ".join(str(x) for x in v)
+    return v
+
+def _chunk_props(rows: List[int], df: pd.DataFrame) -> Tuple[List[Tuple[int, Prop]], List[Dict[str, Any]]]:
+    """
+    Validate + convert one chunk to (row number, Prop) pairs.
+    `rows` is the row number of each record.
+    """
+    n = len(df)
+    if n == 0:
+        return [], []
+    row_no = np.asarray(rows)
+    df = df.rename(columns=lambda c: ALIASES.get(str(c).strip().lower(), str(c).strip().lower()))
+
+    player = _text(df, "player")
+    line = pd.to_numeric(pd.Series(_text(df, "line"), dtype=object), errors="coerce").to_numpy(dtype=float)
+    raw5 = [_last5_text(v) for v in df["last5"].tolist()] if "last5" in df.columns else [""] * n
+    has5 = np.array([isinstance(v, str) and v.strip() != "" for v in raw5], dtype=bool)
+    mat, valid5 = normalize_last5_column(raw5)
+    (goblin, bad_goblin), (demon, bad_demon) = _flag(df, "is_goblin"), _flag(df, "is_demon")
+
+    problems = [
+        (np.array([not v for v in player], dtype=bool), "Player is required."),
+        (np.isnan(line), "Line must be a number."),
+        (line == 0.0, "Line must be set (not 0)."),
+        (has5 & ~valid5, "last5 must have exactly 5 numbers."),
+        (bad_goblin, "is_goblin must be true/false, 1/0 or yes/no."),
+        (bad_demon, "is_demon must be true/false, 1/0 or yes/no."),
+    ]
+    bad = np.zeros(n, dtype=bool)
+    errors = []
+    for mask, msg in problems:
+        new = mask & ~bad
+        errors.extend({"row": int(r), "error": msg} for r in row_no[new])
+        bad |= new
+
+    sport = [v.upper() or "OTHER" for v in _text(df, "sport")]
+    market = [v or "Other" for v in _text(df, "market")]
+    game = _text(df, "game")
+    pid = _text(df, "prop_id")
+    last5 = [tuple(r) for r in mat.tolist()]
+
+    props = []
+    for i in np.flatnonzero(~bad).tolist():
+        props.append((int(row_no[i]), Prop(
+            prop_id=pid[i] or str(uuid.uuid4())[:8],
+            sport=sport[i],
+            player=player[i],
+            market=market[i],
+            line=float(line[i]),
+            last5=last5[i] if valid5[i] else (),
+            is_goblin=bool(goblin[i]),
+            is_demon=bool(demon[i]),
+            game=game[i],
+        )))
+    return props, errors
+
+# -----------------------------
+# ENTRY POINT
+# -----------------------------
+def import_board(src: Any, fmt: Optional[str] = None, existing_ids: Iterable[str] = ()) -> Tuple[List[Prop], List[Dict[str, Any]]]:
+    """
+    Parse a board from an uploaded file (anything with .read()), bytes or text.
+    Returns (props, errors). prop_ids already in `existing_ids` or repeated within the
+    import are reported and skipped, so re-importing a backup doesn't duplicate props.
+    """
+    name = getattr(src, "name", "") or ""
+    if hasattr(src, "read"):
+        src = src.read()
+    text = src.decode("utf-8-sig") if isinstance(src, bytes) else str(src)
+    if not text.strip():
+        return [], []
+    fmt = fmt or sniff_format(text, name)
+
+    try:
+        if fmt == "csv":
+            chunks = _csv_chunks(text)
+        elif fmt == "jsonl":
+            chunks = _records_chunks(_jsonl_records(io.StringIO(text)))
+        else:
+            chunks = _records_chunks(_json_records(text))
+        props, errors = [], []
+        for rows, df, read_errors in chunks:
+            errors.extend(read_errors)
+            p, e = _chunk_props(rows, df)
+            props.extend(p)
+            errors.extend(e)
+    except (ValueError, csv.Error) as e:
+        return [], [{"row": 0, "error": f"Could not read {fmt.upper()}: {e}"}]
+
+    seen = set(str(i) for i in existing_ids)
+    kept = []
+    for row, p in props:
+        if p.prop_id in seen:
+            errors.append({"row": row, "error": f"Duplicate prop_id {p.prop_id} skipped."})
+            continue
+        seen.add(p.prop_id)
+        kept.append(p)
+    errors.sort(key=lambda e: e["row"])
+    return kept, errors
@@ -0,0 +1,296 @@
+"""
+Fitted P(win) for scored props, trained on graded legs in the tracking history.
+
+    python calibration.py fit                  # logistic on score_prop's features
+    python calibration.py fit --method isotonic  # monotone map of the heuristic score
+    python calibration.py show
+
+    p = calibration.predict_props(board_index.ranked())   # NaN for PASS rows
+    df = score_board(board, p_win=True)                    # adds a p_win column
+
+Features are the ones score_prop already adds up: hits on the picked side, the capped
+avg-vs-line cushion, goblin, demon and the market-class flags. props_history keeps only
+the final score, so hits / cushion come from the legs_json snapshot in slips_history
+and goblin / demon are read back from the score's residual (+6 / -30).
+
+The fitted artifact is a small JSON file (PP_CALIBRATION_PATH, default calibration.json),
+read once per process; fit() replaces the in-memory copy.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from markets import REGISTRY, VARIANCE_PENALTY, VOLUME_BONUS
+
+ARTIFACT_PATH = os.environ.get("PP_CALIBRATION_PATH", "calibration.json")
+METHODS = ["logistic", "isotonic"]
+FEATURES = ["hits", "cushion", "goblin", "demon", "high_variance", "volume"]
+L2 = 1.0          # ridge on the logistic coefficients (not the intercept)
+MIN_ROWS = 30     # refuse to fit on fewer graded legs
+
+_lock = threading.Lock()
+_loaded: Dict[str, Dict[str, Any]] = {}
+_missing: Dict[str, Optional[Tuple[int, int]]] = {}  # path -> (mtime_ns, size) of the unreadable file, None = absent
+
+# -----------------------------
+# FEATURES
+# -----------------------------
+def feature_matrix(hits: Any, diff: Any, is_goblin: Any, is_demon: Any, penalty: Any, bonus: Any) -> np.ndarray:
+    """
+    (n, len(FEATURES)) design matrix, each column scaled to 0..1 like its score term.
+    """
+    return np.column_stack([
+        np.asarray(hits, dtype=float) / 5.0,
+        np.minimum(np.asarray(diff, dtype=float) * 6.0, 18.0) / 18.0,
+        np.asarray(is_goblin, dtype=float),
+        np.asarray(is_demon, dtype=float),
+        np.asarray(penalty, dtype=float),
+        np.asarray(bonus, dtype=float),
+    ])
+
+def training_frame(slips: pd.DataFrame, props: pd.DataFrame) -> pd.DataFrame:
+    """
+    Graded WIN/LOSS legs joined to their legs_json snapshot: one row per leg with the
+    FEATURES columns, score and y (1 = WIN). Legs without a usable snapshot are dropped.
+    """
+    from slip_logic import LEG_WIN, LEG_LOSS, last5_matrix
+
+    res = props["result"].astype(str).str.strip().str.upper()
+    graded = props[res.isin(LEG_WIN | LEG_LOSS)].assign(y=res.isin(LEG_WIN).astype(int))
+    cols = FEATURES + ["score", "y"]
+    if graded.empty or slips.empty:
+        return pd.DataFrame(columns=cols)
+
+    snap = []
+    for slip_id, legs_json in zip(slips["slip_id"].astype(str), slips["legs_json"].tolist()):
+        try:
+            legs = json.loads(legs_json) if isinstance(legs_json, str) and legs_json else []
+        except ValueError:
+            continue
+        for i, leg in enumerate(legs, start=1):
+            snap.append((f"{slip_id}-{i}", leg.get("market", ""), leg.get("line"), leg.get("last5")))
+    if not snap:
+        return pd.DataFrame(columns=cols)
+    legs = pd.DataFrame(snap, columns=["prop_id", "leg_market", "leg_line", "last5"]).drop_duplicates("prop_id")
+    df = graded.assign(prop_id=graded["prop_id"].astype(str)).merge(legs, on="prop_id", how="inner")
+
+    line = pd.to_numeric(df["leg_line"], errors="coerce").to_numpy(dtype=float)
+    score = pd.to_numeric(df["score"], errors="coerce").to_numpy(dtype=float)
+    mat, valid = last5_matrix(df["last5"].tolist())
+    more = df["side"].astype(str).str.upper().to_numpy() == "MORE"
+    col = line[:, None]
+    hits = np.where(more, (mat > col).sum(axis=1), (mat < col).sum(axis=1))
+    diff = np.abs(mat.mean(axis=1) - line)
+    penalty, bonus = REGISTRY.flags(REGISTRY.codes(df["leg_market"].astype(str).to_numpy()))
+
+    base = 50.0 + hits * 8.0 + np.minimum(diff * 6.0, 18.0) \
+        - np.where(penalty, VARIANCE_PENALTY, 0.0) + np.where(bonus, VOLUME_BONUS, 0.0)
+    resid = score - base
+    demon = resid < -15.0
+    goblin = (resid + np.where(demon, 30.0, 0.0)) > 3.0
+
+    keep = valid & (line > 0) & ~np.isnan(score)
+    X = feature_matrix(hits, diff, goblin, demon, penalty, bonus)[keep]
+    out = pd.DataFrame(X, columns=FEATURES)
+    out["score"] = score[keep]
+    out["y"] = df["y"].to_numpy()[keep]
+    return out
+
+# -----------------------------
+# FITTING
+# -----------------------------
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float = L2, iters: int = 50) -> Tuple[np.ndarray, float]:
+    """
+    Ridge logistic regression by Newton / IRLS (a few (k+1)x(k+1) solves).
+    """
+    A = np.column_stack([np.ones(len(X)), X])
+    w = np.zeros(A.shape[1])
+    ridge = np.full(A.shape[1], l2)
+    ridge[0] = 0.0
+    for _ in range(iters):
+        p = _sigmoid(A @ w)
+        grad = A.T @ (p - y) + ridge * w
+        hess = (A * (p * (1 - p))[:, None]).T @ A + np.diag(ridge) + 1e-9 * np.eye(len(w))
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return w[1:], float(w[0])
+
+def fit_isotonic(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Non-decreasing step map x -> P(y=1) by pool-adjacent-violators over distinct x.
+    Returns (knots, values) for np.interp.
+    """
+    ux, inv = np.unique(x, return_inverse=True)
+    wins = np.bincount(inv, weights=y).tolist()
+    cnt = np.bincount(inv).astype(float).tolist()
+    blocks: List[List[float]] = []  # [wins, count, first knot index, last knot index]
+    for i, (w, c) in enumerate(zip(wins, cnt)):
+        blocks.append([w, c, i, i])
+        while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] >= blocks[-1][0] / blocks[-1][1]:
+            w2, c2, _, hi = blocks.pop()
+            blocks[-1][0] += w2
+            blocks[-1][1] += c2
+            blocks[-1][3] = hi
+    vals = np.empty(len(ux))
+    for w, c, lo, hi in blocks:
+        vals[lo:hi + 1] = w / c
+    return ux, vals
+
+def _metrics(p: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return {
+        "brier": round(float(np.mean((p - y) ** 2)), 5),
+        "logloss": round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 5),
+    }
+
+def fit(slips: pd.DataFrame, props: pd.DataFrame, method: str = "logistic") -> Dict[str, Any]:
+    """
+    Fit a calibration artifact from tracking histories.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    df = training_frame(slips, props)
+    if len(df) < MIN_ROWS:
+        raise ValueError(f"Need at least {MIN_ROWS} graded legs with a legs_json snapshot (have {len(df)}).")
+    X, y = df[FEATURES].to_numpy(), df["y"].to_numpy(dtype=float)
+    art: Dict[str, Any] = {
+        "method": method,
+        "features": FEATURES,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n": int(len(df)),
+        "base_rate": round(float(y.mean()), 4),
+    }
+    if method == "logistic":
+        coef, intercept = fit_logistic(X, y)
+        art.update(coef=coef.round(6).tolist(), intercept=round(intercept, 6))
+    else:
+        knots, vals = fit_isotonic(df["score"].to_numpy(), y)
+        art.update(knots=knots.tolist(), values=vals.round(6).tolist())
+    art["fit"] = _metrics(_predict(art, X, df["score"].to_numpy()), y)
+    art["baseline"] = _metrics(np.full(len(y), y.mean()), y)
+    return art
+
+# -----------------------------
+# ARTIFACT
+# -----------------------------
+def save(art: Dict[str, Any], path: str = None):
+    path = path or ARTIFACT_PATH
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(art, f, indent=2)
+    os.replace(tmp, path)
+    with _lock:
+        _loaded[path] = art
+        _missing.pop(path, None)
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def load(path: str = None) -> Optional[Dict[str, Any]]:
+    """
+    The artifact at `path`, read from disk on first use only (None until one exists).
+    A missing or unreadable file is remembered too and only retried once it changes.
+    """
+    path = path or ARTIFACT_PATH
+    with _lock:
+        if path in _loaded:
+            return _loaded[path]
+        stamp = _stamp(path)
+        if path in _missing and _missing[path] == stamp:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                art = json.load(f)
+        except (OSError, ValueError):
+            _missing[path] = stamp
+            return None
+        _missing.pop(path, None)
+        _loaded[path] = art
+        return art
+
+def forget(path: str = None):
+    with _lock:
+        _loaded.pop(path or ARTIFACT_PATH, None)
+        _missing.pop(path or ARTIFACT_PATH, None)
+
+# -----------------------------
+# BATCH INFERENCE
+# -----------------------------
+def _predict(art: Dict[str, Any], X: np.ndarray, score: np.ndarray) -> np.ndarray:
+    if art["method"] == "isotonic":
+        return np.interp(score, art["knots"], art["values"])
+    return _sigmoid(X @ np.asarray(art["coef"]) + art["intercept"])
+
+def predict_arrays(hits: Any, diff: Any, is_goblin: Any, is_demon: Any, penalty: Any, bonus: Any,
+                   score: Any, ok: Any, art: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    P(win) per row from score_arrays-style columns; NaN where ok is False or no artifact exists.
+    """
+    art = art or load()
+    ok = np.asarray(ok, dtype=bool)
+    if art is None:
+        return np.full(len(ok), np.nan)
+    X = feature_matrix(hits, diff, is_goblin, is_demon, penalty, bonus)
+    p = _predict(art, X, np.asarray(score, dtype=float))
+    return np.where(ok, p, np.nan)
+
+def predict_props(items: List[Any], art: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    P(win) for scored props (ScoredProps or score_prop dicts), in order.
+    """
+    n = len(items)
+    if n == 0:
+        return np.empty(0)
+    pick = np.array([p.get("pick") for p in items], dtype=object)
+    hm = np.array([p.get("hits_more", 0) for p in items], dtype=float)
+    hl = np.array([p.get("hits_less", 0) for p in items], dtype=float)
+    avg = np.array([np.nan if p.get("avg_last5") is None else p.get("avg_last5") for p in items], dtype=float)
+    line = np.array([p.get("line", 0.0) for p in items], dtype=float)
+    penalty, bonus = REGISTRY.flags(REGISTRY.codes(np.array([p.get("market", "") for p in items], dtype=object)))
+    return predict_arrays(
+        np.where(pick == "MORE", hm, hl), np.abs(avg - line),
+        [bool(p.get("is_goblin", False)) for p in items], [bool(p.get("is_demon", False)) for p in items],
+        penalty, bonus,
+        [p.get("score", 0.0) for p in items], np.isin(pick, ["MORE", "LESS"]), art,
+    )
+
+def main(argv: List[str] = None) -> int:
+    import tracking
+
+    ap = argparse.ArgumentParser(description="Fit or inspect the P(win) calibration artifact.")
+    ap.add_argument("cmd", choices=["fit", "show"])
+    ap.add_argument("--method", choices=METHODS, default="logistic")
+    ap.add_argument("--out", default=ARTIFACT_PATH)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "show":
+        art = load(args.out)
+        print(json.dumps(art, indent=2) if art else f"No artifact at {args.out}.")
+        return 0 if art else 1
+    try:
+        art = fit(tracking.load_slips(), tracking.load_props(), args.method)
+    except ValueError as e:
+        print(e)
+        return 1
+    save(art, args.out)
+    print(f"Fitted {art['method']} on {art['n']} legs -> {args.out}: fit {art['fit']} vs base rate {art['baseline']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Local player game-log store: fills last5 (and a last-N summary) when a prop is added.
+
+Stat CSVs are ingested into SQLite (default gamelog.db, PP_GAMELOG_DB):
+
+    games    (player_key, market_key, date) -> value        WITHOUT ROWID, clustered on the key
+    rolling  (player_key, market_key)       -> last5, last-N window, mean, games
+    sources  path -> size / mtime / byte offset already ingested
+
+A lookup is one primary-key read of `rolling`, so it stays well under a millisecond at
+millions of game rows. Refresh only reads bytes appended since the last ingest (files
+that shrank or changed header are re-read in full) and only recomputes `rolling` for the
+player/markets that got new games.
+
+CSV shapes:
+    long:  player, date, market, value
+    wide:  player, date, PTS, REB, AST, ...  (one column per stat; PRA / PR / RA derived)
+
+    python gamelog.py import stats/*.csv
+    python gamelog.py lookup "Alperen Sengun" Points --line 18.5
+"""
+import os
+import io
+import sys
+import glob
+import json
+import time
+import sqlite3
+import argparse
+import unicodedata
+from dataclasses import replace
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+import pandas as pd
+
+from models import Prop
+
+DB_PATH = os.environ.get("PP_GAMELOG_DB", "gamelog.db")
+GAMELOG_DIR = os.environ.get("PP_GAMELOG_DIR", "gamelogs")
+WINDOW = int(os.environ.get("PP_GAMELOG_WINDOW", "10"))  # last-N summary; last5 is always 5
+
+# wide-CSV stat headers -> market names used on the board
+STAT_ALIASES = {
+    "pts": "Points", "points": "Points",
+    "reb": "Rebounds", "trb": "Rebounds", "rebounds": "Rebounds",
+    "ast": "Assists", "assists": "Assists",
+    "3pm": "3PT Made", "fg3m": "3PT Made", "3pt made": "3PT Made",
+    "stl": "Steals", "blk": "Blocks", "tov": "Turnovers", "min": "Minutes",
+    "shots": "Shots", "sog": "Shots on Target", "shots on target": "Shots on Target",
+    "passes": "Passes Attempted", "passes attempted": "Passes Attempted",
+    "saves": "Goalie Saves", "goalie saves": "Goalie Saves",
+    "goals": "Goals", "fantasy": "Fantasy Score", "fantasy score": "Fantasy Score",
+}
+COMBOS = {"PRA": ["Points", "Rebounds", "Assists"], "PR": ["Points", "Rebounds"], "RA": ["Rebounds", "Assists"]}
+ID_COLUMNS = {"player", "date", "game", "team", "opponent", "opp", "season", "game_id"}
+
+DDL = [
+    """CREATE TABLE IF NOT EXISTS games (
+        player_key TEXT, market_key TEXT, date TEXT, value REAL,
+        PRIMARY KEY (player_key, market_key, date)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS rolling (
+        player_key TEXT, market_key TEXT, player TEXT, market TEXT, window_n INTEGER,
+        games INTEGER, last_date TEXT, last5 TEXT, lastn TEXT, mean_n REAL,
+        PRIMARY KEY (player_key, market_key)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS sources (
+        path TEXT PRIMARY KEY, size INTEGER, mtime REAL, offset INTEGER, header TEXT)""",
+]
+
+_ready = set()
+
+def key(s: Any) -> str:
+    """
+    Match key for player/market names: case, accents and spacing ignored ("Jokić" == "jokic").
+    """
+    s = unicodedata.normalize("NFKD", str(s or ""))
+    return " ".join("".join(c for c in s if not unicodedata.combining(c)).lower().split())
+
+def market_key(market: Any) -> str:
+    return key(STAT_ALIASES.get(key(market), market))
+
+def _init(con: sqlite3.Connection, timeout: float = 30.0):
+    """
+    WAL mode + schema, retried while another process sets up the same file (see
+    tracking_sqlite._init: that lock error skips the busy timeout).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            for stmt in DDL:
+                con.execute(stmt)
+            con.commit()
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() >= deadline:
+                raise
+            con.rollback()
+            time.sleep(0.01)
+
+def connect(path: str = None) -> sqlite3.Connection:
+    path = path or DB_PATH
+    fresh = path not in _ready or not os.path.exists(path)
+    con = sqlite3.connect(path, timeout=30)
+    if fresh:
+        _init(con)
+        _ready.add(path)
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+# -----------------------------
+# PARSING
+# -----------------------------
+def _long_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Any supported CSV shape -> player, market, date, value rows (bad dates / values dropped).
+    """
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    if "player" not in df.columns or "date" not in df.columns:
+        raise ValueError("Game log CSV needs 'player' and 'date' columns.")
+
+    if "market" in df.columns and "value" in df.columns:
+        out = df[["player", "market", "date", "value"]].copy()
+        out["market"] = out["market"].map(lambda m: STAT_ALIASES.get(key(m), str(m).strip()))
+    else:
+        stats = {c: STAT_ALIASES.get(c, c.title()) for c in df.columns if c not in ID_COLUMNS}
+        wide = df[["player", "date"] + list(stats)].rename(columns=stats)
+        for combo, parts in COMBOS.items():
+            if combo not in wide.columns and all(p in wide.columns for p in parts):
+                wide[combo] = sum(pd.to_numeric(wide[p], errors="coerce") for p in parts)
+        out = wide.melt(id_vars=["player", "date"], var_name="market", value_name="value")
+
+    out["value"] = pd.to_numeric(out["value"], errors="coerce")
+    out["date"] = pd.to_datetime(out["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    out["player"] = out["player"].astype(str).str.strip()
+    out = out.dropna(subset=["value", "date"])
+    out = out[out["player"] != ""]
+    for col in ["player", "market"]:
+        codes, uniques = pd.factorize(out[col])  # key() once per distinct name
+        out[col + "_key"] = pd.Index([key(u) for u in uniques], dtype=object)[codes].to_numpy()
+    return out.sort_values(["player_key", "market_key", "date"], kind="stable")  # insert in primary-key order
+
+def _read_new(path: str, known: Optional[Tuple[int, float, int, str]]) -> Tuple[Optional[str], int, str]:
+    """
+    CSV text still to ingest (header + lines past the stored offset), new offset, header.
+    None when the file is unchanged. The offset stops before an unterminated last line,
+    so a line still being written is read again (rows are keyed, re-reading is harmless).
+    """
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = 0
+        if known is not None:
+            size, mtime, offset, old_header = known
+            if (st.st_size, st.st_mtime) == (size, mtime):
+                return None, offset, old_header
+            if st.st_size >= offset and header.decode("utf-8-sig") == old_header:
+                start = offset  # append-only log: read the tail only
+        f.seek(start)
+        data = f.read()
+    text = data.decode("utf-8-sig") if start == 0 else header.decode("utf-8-sig") + data.decode("utf-8")
+    return text, start + data.rfind(b"\n") + 1, header.decode("utf-8-sig")
+
+# -----------------------------
+# INGEST
+# -----------------------------
+def _refresh_rolling(con: sqlite3.Connection, keys: Iterable[Tuple[str, str, str, str]], window: int):
+    rows = []
+    for pk, mk, player, market in keys:
+        recent = con.execute(
+            "SELECT date, value FROM games WHERE player_key = ? AND market_key = ? ORDER BY date DESC LIMIT ?",
+            (pk, mk, max(window, 5)),
+        ).fetchall()
+        games = con.execute(
+            "SELECT COUNT(*) FROM games WHERE player_key = ? AND market_key = ?", (pk, mk)
+        ).fetchone()[0]
+        vals = [v for _, v in reversed(recent)]  # oldest -> newest, like a typed last5
+        last5 = vals[-5:] if len(vals) >= 5 else []
+        lastn = vals[-window:]
+        rows.append((
+            pk, mk, player, market, window, games, recent[0][0] if recent else None,
+            json.dumps(last5), json.dumps(lastn), sum(lastn) / len(lastn) if lastn else None,
+        ))
+    con.executemany("INSERT OR REPLACE INTO rolling VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+def ingest(paths: List[str], path: str = None, window: int = None) -> Dict[str, int]:
+    """
+    Ingest new rows from stat CSVs. Returns counts of files read, game rows and
+    player/markets refreshed. Unchanged files cost one stat() each.
+    """
+    window = window or WINDOW
+    con = connect(path)
+    counts = {"files": 0, "rows": 0, "keys": 0, "skipped": 0}
+    try:
+        with con:
+            touched: Dict[Tuple[str, str], Tuple[str, str]] = {}
+            for src in paths:
+                src = os.path.abspath(src)
+                row = con.execute("SELECT size, mtime, offset, header FROM sources WHERE path = ?", (src,)).fetchone()
+                text, offset, header = _read_new(src, row)
+                if text is None:
+                    counts["skipped"] += 1
+                    continue
+                df = _long_frame(pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False))
+                con.executemany(
+                    "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?)",
+                    zip(*(df[c].tolist() for c in ["player_key", "market_key", "date", "value"])),
+                )
+                for pk, mk, player, market in df[["player_key", "market_key", "player", "market"]].drop_duplicates(
+                    ["player_key", "market_key"], keep="last"
+                ).itertuples(index=False, name=None):
+                    touched[(pk, mk)] = (player, market)
+                st = os.stat(src)
+                con.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                    (src, st.st_size, st.st_mtime, offset, header),
+                )
+                counts["files"] += 1
+                counts["rows"] += len(df)
+            _refresh_rolling(con, [(pk, mk, p, m) for (pk, mk), (p, m) in touched.items()], window)
+            counts["keys"] = len(touched)
+    finally:
+        con.close()
+    return counts
+
+def ingest_dir(directory: str = None, path: str = None, window: int = None) -> Dict[str, int]:
+    """
+    ingest() every *.csv under `directory` (default GAMELOG_DIR).
+    """
+    directory = directory or GAMELOG_DIR
+    return ingest(sorted(glob.glob(os.path.join(directory, "**", "*.csv"), recursive=True)), path, window)
+
+def rebuild_rolling(path: str = None, window: int = None) -> int:
+    """
+    Recompute `rolling` for every player/market (after changing the window).
+    """
+    window = window or WINDOW
+    con = connect(path)
+    try:
+        with con:
+            keys = con.execute("SELECT player_key, market_key, player, market FROM rolling").fetchall()
+            _refresh_rolling(con, keys, window)
+        return len(keys)
+    finally:
+        con.close()
+
+# -----------------------------
+# LOOKUP
+# -----------------------------
+def _lookup(con: sqlite3.Connection, player: str, market: str, line: Optional[float]) -> Optional[Dict[str, Any]]:
+    row = con.execute(
+        "SELECT player, market, window_n, games, last_date, last5, lastn, mean_n FROM rolling "
+        "WHERE player_key = ? AND market_key = ?",
+        (key(player), market_key(market)),
+    ).fetchone()
+    if row is None:
+        return None
+    out = {
+        "player": row[0], "market": row[1], "window": row[2], "games": row[3], "last_date": row[4],
+        "last5": json.loads(row[5]), "lastn": json.loads(row[6]), "mean_n": row[7],
+    }
+    if line is not None:
+        out["hits_more_n"] = sum(1 for v in out["lastn"] if v > line)
+        out["hits_less_n"] = sum(1 for v in out["lastn"] if v < line)
+    return out
+
+def lookup(player: str, market: str, line: Optional[float] = None, path: str = None) -> Optional[Dict[str, Any]]:
+    """
+    Precomputed summary for one player/market, or None if the log has nothing for it.
+    last5 is oldest -> newest ([] with fewer than 5 games); with a line, adds
+    hits_more_n / hits_less_n over the last-N window.
+    """
+    path = path or DB_PATH
+    if not os.path.exists(path):
+        return None
+    con = connect(path)  # one connection per call: Streamlit runs sessions on many threads
+    try:
+        return _lookup(con, player, market, line)
+    finally:
+        con.close()
+
+def fill_last5(props: List[Prop], path: str = None) -> Tuple[List[Prop], int]:
+    """
+    Props with an empty last5 get it from the game log (one connection for the batch).
+    Returns (props, number filled).
+    """
+    path = path or DB_PATH
+    if not os.path.exists(path) or all(p.last5 for p in props):
+        return list(props), 0
+    out, filled = [], 0
+    con = connect(path)
+    try:
+        for p in props:
+            if not p.last5:
+                hit = _lookup(con, p.player, p.market, None)
+                if hit and hit["last5"]:
+                    p = replace(p, last5=tuple(float(v) for v in hit["last5"]))
+                    filled += 1
+            out.append(p)
+    finally:
+        con.close()
+    return out, filled
+
+def reset(path: str = None):
+    path = path or DB_PATH
+    for f in [path, path + "-wal", path + "-shm"]:
+        if os.path.exists(f):
+            os.remove(f)
+    _ready.discard(path)
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description="Player game-log store for last5 auto-fill.")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--window", type=int, default=WINDOW)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="ingest new rows from stat CSVs (files or directories)")
+    imp.add_argument("paths", nargs="*", default=[GAMELOG_DIR])
+    sub.add_parser("rebuild", help="recompute rolling windows (after changing --window)")
+    look = sub.add_parser("lookup", help="show last5 / last-N for a player and market")
+    look.add_argument("player")
+    look.add_argument("market")
+    look.add_argument("--line", type=float)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "import":
+        files = []
+        for p in args.paths:
+            files += sorted(glob.glob(os.path.join(p, "**", "*.csv"), recursive=True)) if os.path.isdir(p) else [p]
+        print(json.dumps(ingest(files, args.db, args.window)))
+    elif args.cmd == "rebuild":
+        print(f"Rebuilt {rebuild_rolling(args.db, args.window)} player/markets")
+    else:
+        hit = lookup(args.player, args.market, args.line, args.db)
+        print(json.dumps(hit) if hit else "Not found.")
+        return 0 if hit else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Market registry: resolves each distinct market string once to a cached classification.
+
+score_prop adjusts by market class: high-variance markets -4, volume markets +2.
+Known markets come from an explicit table (built-ins + optional JSON config); anything
+else falls back to the keyword rules, and the result is cached with the rule that fired
+so every classification can be audited.
+
+Config file (PP_MARKETS_CONFIG or load_registry(path)):
+
+    {
+      "keywords": {"high_variance": ["goals", "3pt"], "volume": ["rebounds"]},
+      "markets": {"Blocks": {"class": "high_variance", "sport": "NBA"}}
+    }
+"""
+import os
+import json
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+VARIANCE_PENALTY = 4.0
+VOLUME_BONUS = 2.0
+
+# Keyword fallback (substring match on the lowercased market) for markets not in the table
+HIGH_VARIANCE_KEYS = ["goals", "3pt", "steals", "blocks", "aces"]
+VOLUME_KEYS = ["rebounds", "passes", "minutes", "assists", "pra", "fantasy"]
+
+# class -> (penalty, bonus)
+CLASSES = {
+    "standard": (False, False),
+    "high_variance": (True, False),
+    "volume": (False, True),
+    "mixed": (True, True),  # matches both keyword lists, e.g. "Goals + Passes"
+}
+
+# Built-in markets in dropdown order: name -> (class, sport).
+# Classes are what the keyword rules give these names, so scores are unchanged.
+BUILTIN_MARKETS = {
+    "Points": ("standard", "NBA"),
+    "Rebounds": ("volume", "NBA"),
+    "Assists": ("volume", "NBA"),
+    "PRA": ("volume", "NBA"),
+    "PR": ("standard", "NBA"),
+    "RA": ("standard", "NBA"),
+    "3PT Made": ("high_variance", "NBA"),
+    "Shots": ("standard", "SOCCER"),
+    "Shots on Target": ("standard", "SOCCER"),
+    "Passes Attempted": ("volume", "SOCCER"),
+    "Goalie Saves": ("standard", "SOCCER"),
+    "Goals": ("high_variance", "SOCCER"),
+    "Fantasy Score": ("volume", ""),
+    "Other": ("standard", ""),
+}
+
+@dataclass(frozen=True, slots=True)
+class MarketClass:
+    code: int
+    name: str
+    variance: str       # key of CLASSES
+    penalty: bool
+    bonus: bool
+    adjustment: float   # net score adjustment
+    sport: str
+    rule: str           # "table", "config" or "keyword:<matched keys>"
+
+class MarketRegistry:
+    """
+    Market string -> MarketClass, resolved once per distinct string.
+    Codes are dense ints; penalty/bonus arrays are indexed by code for the batch paths.
+    """
+
+    def __init__(self, table: Optional[Dict[str, Any]] = None, high_variance_keys: Optional[List[str]] = None,
+                 volume_keys: Optional[List[str]] = None):
+        self.high_variance_keys = [k.lower() for k in (high_variance_keys or HIGH_VARIANCE_KEYS)]
+        self.volume_keys = [k.lower() for k in (volume_keys or VOLUME_KEYS)]
+        self._table: Dict[str, Any] = {}  # lowercased name -> (class, sport, rule)
+        self._by_name: Dict[str, MarketClass] = {}
+        self._classes: List[MarketClass] = []
+        self._penalty = np.zeros(0, dtype=bool)
+        self._bonus = np.zeros(0, dtype=bool)
+        self._lock = threading.Lock()
+        for name, (cls, sport) in BUILTIN_MARKETS.items():
+            self.define(name, cls, sport, rule="table")
+        for name, (cls, sport) in (table or {}).items():
+            self.define(name, cls, sport, rule="config")
+
+    def define(self, name: str, variance: str, sport: str = "", rule: str = "config"):
+        if variance not in CLASSES:
+            raise ValueError(f"Unknown market class {variance!r} for {name!r}; use one of {list(CLASSES)}")
+        key = name.strip().lower()
+        with self._lock:
+            self._table[key] = (variance, sport, rule)
+            # names already resolved to this key are reclassified in place: their codes stay
+            # valid, and codes() / flags() taken before the define see the new class
+            stale = [mc for m, mc in self._by_name.items() if m.strip().lower() == key]
+            if stale:
+                penalty, bonus = self._penalty.copy(), self._bonus.copy()
+                for old in stale:
+                    mc = self._market_class(old.code, old.name, variance, sport, rule)
+                    self._classes[mc.code] = self._by_name[mc.name] = mc
+                    penalty[mc.code], bonus[mc.code] = mc.penalty, mc.bonus
+                self._penalty, self._bonus = penalty, bonus
+
+    @staticmethod
+    def _market_class(code: int, market: str, variance: str, sport: str, rule: str) -> MarketClass:
+        pen, bon = CLASSES[variance]
+        return MarketClass(
+            code=code, name=market, variance=variance, penalty=pen, bonus=bon,
+            adjustment=-VARIANCE_PENALTY * pen + VOLUME_BONUS * bon, sport=sport, rule=rule,
+        )
+
+    def _classify(self, market: str):
+        key = market.strip().lower()
+        if key in self._table:
+            return self._table[key]
+        m = market.lower()
+        hv = [k for k in self.high_variance_keys if k in m]
+        vol = [k for k in self.volume_keys if k in m]
+        variance = "mixed" if hv and vol else "high_variance" if hv else "volume" if vol else "standard"
+        return variance, "", "keyword:" + ",".join(hv + vol) if hv or vol else "keyword:none"
+
+    def resolve(self, market: Any) -> MarketClass:
+        market = market if isinstance(market, str) else ""
+        mc = self._by_name.get(market)
+        if mc is not None:
+            return mc
+        with self._lock:
+            mc = self._by_name.get(market)
+            if mc is None:
+                mc = self._market_class(len(self._classes), market, *self._classify(market))
+                self._classes.append(mc)
+                self._penalty = np.append(self._penalty, mc.penalty)
+                self._bonus = np.append(self._bonus, mc.bonus)
+                self._by_name[market] = mc
+            return mc
+
+    def codes(self, markets: Any) -> np.ndarray:
+        """
+        Integer market codes for a column of market strings (each distinct string resolved once).
+        """
+        idx, uniques = pd.factorize(pd.Series(markets, dtype=object), use_na_sentinel=False)
+        lookup = np.array([self.resolve(m).code for m in uniques], dtype=np.int64)
+        return lookup[idx] if len(lookup) else np.zeros(0, dtype=np.int64)
+
+    def flags(self, codes: np.ndarray):
+        """
+        (penalty, bonus) bool arrays for market codes.
+        """
+        return self._penalty[codes], self._bonus[codes]
+
+    def audit(self) -> pd.DataFrame:
+        """
+        Every market resolved so far with its class, adjustment and the rule that decided it.
+        """
+        for name in BUILTIN_MARKETS:
+            self.resolve(name)
+        return pd.DataFrame([
+            {"code": m.code, "market": m.name, "class": m.variance, "adjustment": m.adjustment,
+             "sport": m.sport, "rule": m.rule}
+            for m in self._classes
+        ])
+
+def load_registry(path: str) -> MarketRegistry:
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    kw = cfg.get("keywords", {})
+    table = {name: (spec.get("class", "standard"), spec.get("sport", "")) for name, spec in cfg.get("markets", {}).items()}
+    return MarketRegistry(table, kw.get("high_variance"), kw.get("volume"))
+
+def _default_registry() -> MarketRegistry:
+    path = os.environ.get("PP_MARKETS_CONFIG", "")
+    return load_registry(path) if path else MarketRegistry()
+
+REGISTRY = _default_registry()
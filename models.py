@@ -0,0 +1,172 @@
+"""
+Compact board objects.
+
+Prop / ScoreResult / ScoredProp / Slip are slotted and read like the dicts the rest
+of the code passes around (p["score"], p.get("player", "")), so slip_logic and app.py
+work with either. A ScoredProp points at its Prop and a shared ScoreResult instead of
+copying every field, and a Slip points at its ScoredProps.
+"""
+from dataclasses import dataclass, fields, asdict
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
+
+import pandas as pd
+
+class _DictLike:
+    """
+    Read-only dict view over slots, for code written against prop dicts.
+    """
+    __slots__ = ()
+    _keys: Tuple[str, ...] = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._keys:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((k, self[k]) for k in self._keys)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: self[k] for k in self._keys}
+
+@dataclass(frozen=True, slots=True)
+class Prop(_DictLike):
+    prop_id: str
+    sport: str
+    player: str
+    market: str
+    line: float
+    last5: Tuple[float, ...] = ()
+    is_goblin: bool = False
+    is_demon: bool = False
+    game: str = ""
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Prop":
+        if isinstance(d, Prop):
+            return d
+        return cls(
+            prop_id=str(d.get("prop_id", "")),
+            sport=str(d.get("sport", "")),
+            player=str(d.get("player", "")),
+            market=str(d.get("market", "") or ""),
+            line=float(d.get("line", 0.0)),
+            last5=tuple(float(v) for v in (d.get("last5") or ())),
+            is_goblin=bool(d.get("is_goblin", False)),
+            is_demon=bool(d.get("is_demon", False)),
+            game=str(d.get("game", "") or ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["last5"] = list(self.last5)
+        return d
+
+@dataclass(frozen=True, slots=True)
+class ScoreResult(_DictLike):
+    """
+    The scoring outcome alone; identical inputs can share one instance.
+    """
+    pick: str
+    hits_more: int
+    hits_less: int
+    avg_last5: Optional[float]
+    score: float
+    grade: str
+    why: str
+
+@dataclass(frozen=True, slots=True)
+class ScoredProp(_DictLike):
+    prop: Prop
+    result: ScoreResult
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SCORE_FIELDS:
+            return getattr(self.result, key)
+        if key in PROP_FIELDS:
+            return getattr(self.prop, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in SCORE_FIELDS or key in PROP_FIELDS
+
+    def keys(self) -> Tuple[str, ...]:
+        return PROP_FIELDS + SCORE_FIELDS
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((k, self[k]) for k in self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.prop.to_dict(), **self.result.to_dict()}
+
+# leg fields copied by slip_logic._build_slip
+LEG_FIELDS = ("player", "sport", "market", "line", "pick", "score", "grade", "last5")
+
+@dataclass(frozen=True, slots=True)
+class Slip(_DictLike):
+    slip_type: str
+    stake: float
+    legs_scored: Tuple[ScoredProp, ...]
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "legs":
+            return self.legs()
+        if key in ("slip_type", "stake"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in ("slip_type", "stake", "legs")
+
+    def keys(self) -> Tuple[str, ...]:
+        return ("slip_type", "stake", "legs")
+
+    def legs(self) -> List[Dict[str, Any]]:
+        """
+        Leg dicts in the shape _build_slip produces (for JSON / tracking rows).
+        """
+        return [{f: (list(p[f]) if f == "last5" else p[f]) for f in LEG_FIELDS} for p in self.legs_scored]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"slip_type": self.slip_type, "stake": self.stake, "legs": self.legs()}
+
+PROP_FIELDS = tuple(f.name for f in fields(Prop))
+SCORE_FIELDS = tuple(f.name for f in fields(ScoreResult))
+Prop._keys = PROP_FIELDS
+ScoreResult._keys = SCORE_FIELDS
+
+def as_props(items: Iterable[Any]) -> List[Prop]:
+    """
+    Adapter for dict callers: list of dicts (or Props) -> list of Props.
+    """
+    return [Prop.from_dict(p) for p in items]
+
+def props_frame(items: List[Prop]) -> pd.DataFrame:
+    """
+    DataFrame built column by column (no per-row dicts).
+    """
+    cols = {f: [getattr(p, f) for p in items] for f in PROP_FIELDS}
+    cols["last5"] = [list(v) for v in cols["last5"]]
+    return pd.DataFrame(cols, columns=list(PROP_FIELDS))
+
+def scored_frame(items: List[ScoredProp]) -> pd.DataFrame:
+    """
+    Props + score columns, built column by column.
+    """
+    props = [s.prop for s in items]
+    df = props_frame(props)
+    for f in SCORE_FIELDS:
+        df[f] = [getattr(s.result, f) for s in items]
+    return df
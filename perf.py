@@ -0,0 +1,168 @@
+"""
+Lightweight per-stage timing for the app pipeline.
+
+    perf.begin_run("rerun")                 # app.py, when the perf panel is on
+    with perf.stage("board.sync", rows=n):  # any block
+        ...
+    @perf.timed("tracking.load_props", rows=len)
+    def load_props(): ...
+    run = perf.end_run()                    # {"total_ms", "stages": {name: {ms, calls, rows}}}
+
+Timings are only collected while a run is active on the current thread (one Streamlit
+session = one script thread); otherwise stage() returns a shared no-op and timed()
+functions cost one attribute check. Finished runs go to a bounded in-memory log that
+export_json() dumps for trending.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+from typing import List, Dict, Any, Optional, Callable
+
+LOG_SIZE = int(os.environ.get("PP_PERF_LOG_SIZE", "500"))
+
+_local = threading.local()
+_log_lock = threading.Lock()
+_log: deque = deque(maxlen=LOG_SIZE)
+
+class _Run:
+    __slots__ = ("label", "started_at", "t0", "stages")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.t0 = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}  # name -> [seconds, calls, rows]
+
+    def add(self, name: str, seconds: float, rows: Optional[int], calls: int = 1):
+        s = self.stages.get(name)
+        if s is None:
+            s = self.stages[name] = [0.0, 0, 0]
+        s[0] += seconds
+        s[1] += calls
+        if rows:
+            s[2] += int(rows)
+
+class _Stage:
+    __slots__ = ("run", "name", "rows", "t0")
+
+    def __init__(self, run: _Run, name: str, rows: Optional[int]):
+        self.run, self.name, self.rows = run, name, rows
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.run.add(self.name, time.perf_counter() - self.t0, self.rows)
+        return False
+
+class _NoStage:
+    __slots__ = ("rows",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_STAGE = _NoStage()
+
+def active() -> bool:
+    return getattr(_local, "run", None) is not None
+
+def begin_run(label: str = "rerun"):
+    _local.run = _Run(label)
+
+def cancel_run():
+    """
+    Drop the current thread's run without logging it (e.g. one cut short by st.rerun()).
+    """
+    _local.run = None
+
+def stage(name: str, rows: Optional[int] = None):
+    """
+    Context manager timing a block; set `.rows` inside the block if the count is known late.
+    """
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NO_STAGE
+    return _Stage(run, name, rows)
+
+def count(name: str, rows: int):
+    """
+    Add rows to a stage without timing anything.
+    """
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.add(name, 0.0, rows, calls=0)
+
+def timed(name: str, rows: Optional[Callable[[Any], int]] = None):
+    """
+    Decorator form of stage(); `rows(result)` gives the rows processed.
+    """
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, "run", None)
+            if run is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            out = fn(*args, **kwargs)
+            run.add(name, time.perf_counter() - t0, rows(out) if rows else None)
+            return out
+        return wrapper
+    return deco
+
+def end_run() -> Optional[Dict[str, Any]]:
+    """
+    Close the current thread's run, append it to the metrics log and return it.
+    """
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+    _local.run = None
+    rec = {
+        "label": run.label,
+        "started_at": run.started_at,
+        "total_ms": round((time.perf_counter() - run.t0) * 1e3, 3),
+        "stages": {
+            k: {"ms": round(v[0] * 1e3, 3), "calls": v[1], "rows": v[2]} for k, v in run.stages.items()
+        },
+    }
+    with _log_lock:
+        _log.append(rec)
+    return rec
+
+def history() -> List[Dict[str, Any]]:
+    with _log_lock:
+        return list(_log)
+
+def summary() -> List[Dict[str, Any]]:
+    """
+    Per-stage p50 / p95 / max ms over the metrics log.
+    """
+    per: Dict[str, List[float]] = {}
+    runs = history()
+    for rec in runs:
+        per.setdefault("(total)", []).append(rec["total_ms"])
+        for k, v in rec["stages"].items():
+            per.setdefault(k, []).append(v["ms"])
+    out = []
+    for k, vals in per.items():
+        vals.sort()
+        out.append({
+            "stage": k, "runs": len(vals),
+            "p50_ms": vals[len(vals) // 2], "p95_ms": vals[min(len(vals) - 1, int(len(vals) * 0.95))],
+            "max_ms": vals[-1],
+        })
+    return out
+
+def export_json() -> str:
+    return json.dumps({"exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": history()}, indent=2)
+
+def clear():
+    with _log_lock:
+        _log.clear()
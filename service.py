@@ -0,0 +1,573 @@
+"""
+Local HTTP service: scoring, recommendations and tracking without the Streamlit page.
+
+    python service.py serve --port 8765 --workers 4
+    python service.py load --path /score --requests 5000 --concurrency 64   # load-test it
+
+JSON in / JSON out over HTTP/1.1 (keep-alive):
+
+    GET  /health
+    GET  /metrics                 per-route count / errors / p50 / p95 / max ms, req/s, batching
+    POST /normalize_last5         {"last5": "13 14 16 9 9"} or {"values": ["..", ..]}
+    POST /score                   {"props": [..], "demons_blocked": true}  -> score_prop per prop
+    POST /recommend               a batch.py record: {"board": [..], "bankroll": 60, "mode": ..}
+    POST /tracking/slips          {"slip": {..}, "props": [..]}   save_slip + save_props
+    POST /tracking/slip_result    {"slip_id", "result", "payout", "notes"}
+    POST /tracking/prop_result    {"slip_id", "prop_id", "result"}
+    GET  /tracking/slips          ?offset=&limit=&since=&until=&result=&search=   (page_slips)
+    GET  /tracking/props          same, plus &market=                             (page_props)
+
+/score and /recommend go through a micro-batcher: requests queued within BATCH_WINDOW_MS
+(up to BATCH_MAX_PROPS props) are sent to the worker process pool as one job, and the
+workers also encode the JSON replies, so the event loop only parses and routes. At most
+2 x workers jobs are in flight; under load the queue grows and batches get bigger
+instead of the pool backlog. Tracking calls run on threads (tracking.py serializes writes).
+"""
+import os
+import sys
+import json
+import math
+import time
+import signal
+import asyncio
+import argparse
+import statistics
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+from batch import _prop, parse_flag, process_record
+from slip_logic import normalize_last5, score_prop
+
+HOST = os.environ.get("PP_SERVICE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("PP_SERVICE_PORT", "8765"))
+WORKERS = int(os.environ.get("PP_SERVICE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+BATCH_WINDOW_MS = 2.0      # how long a batch waits for company once the first request is queued
+BATCH_MAX_PROPS = 5_000    # props per pool job
+MAX_BODY = 8 * 1024 * 1024
+LATENCY_WINDOW = 10_000    # recent latencies kept per route for percentiles
+RATE_WINDOW_S = 10.0       # recent throughput window
+
+DEFAULTS = {"bankroll": 20.0, "demons_blocked": True, "slips_already_saved": 0, "mode": "greedy"}
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+class BadRequest(ValueError):
+    pass
+
+# -----------------------------
+# JSON
+# -----------------------------
+def _json_safe(obj: Any) -> Any:
+    """
+    NaN / inf -> null (avg_last5 is NaN without last5), so replies are strict JSON.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    return obj
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "item"):  # numpy scalars
+        return _json_safe(obj.item())
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+def encode(payload: Any) -> bytes:
+    return json.dumps(_json_safe(payload), default=_default, allow_nan=False).encode("utf-8")
+
+# -----------------------------
+# REQUEST CHECKS
+# -----------------------------
+def _check_props(props: Any, field: str) -> List[Dict[str, Any]]:
+    """
+    Client mistakes in a prop list -> BadRequest (400) before the list reaches the pool,
+    so errors coming back from a worker are real failures (500).
+    """
+    if not isinstance(props, list) or not all(isinstance(p, dict) for p in props):
+        raise BadRequest(f"'{field}' must be a list of prop objects.")
+    for i, p in enumerate(props):
+        try:
+            line = float(p.get("line", 0.0))
+        except (TypeError, ValueError):
+            line = math.nan
+        if not math.isfinite(line):
+            raise BadRequest(f"{field}[{i}].line must be a number, got {p.get('line')!r}.")
+        last5 = p.get("last5")
+        if not (last5 is None or isinstance(last5, str) or (isinstance(last5, list) and all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in last5))):
+            raise BadRequest(f"{field}[{i}].last5 must be a string or a list of numbers.")
+        for flag in ("is_goblin", "is_demon"):
+            if p.get(flag) is not None:
+                try:
+                    parse_flag(flag, p[flag])
+                except ValueError as e:
+                    raise BadRequest(f"{field}[{i}]: {e}")
+    return props
+
+# -----------------------------
+# WORKER JOBS (run in the process pool)
+# -----------------------------
+def _score(body: Dict[str, Any]) -> Dict[str, Any]:
+    demons_blocked = parse_flag("demons_blocked", body.get("demons_blocked", DEFAULTS["demons_blocked"]))
+    return {"scored": [score_prop(_prop(p), demons_blocked=demons_blocked) for p in body["props"]]}
+
+def _recommend(body: Dict[str, Any]) -> Dict[str, Any]:
+    out = process_record("request", body, {**DEFAULTS, "include_scored": bool(body.get("include_scored"))})
+    out.pop("source", None)
+    return out
+
+JOBS = {"score": _score, "recommend": _recommend}
+
+def run_jobs(jobs: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[int, bytes]]:
+    """
+    One pool round trip for a batch of requests -> (status, encoded reply) per request.
+    """
+    out = []
+    for kind, body in jobs:
+        try:
+            res = JOBS[kind](body)
+            out.append((400 if "error" in res else 200, encode(res)))
+        except Exception as e:
+            out.append((500, encode({"error": f"{type(e).__name__}: {e}"})))
+    return out
+
+# -----------------------------
+# METRICS
+# -----------------------------
+class Metrics:
+    """
+    Request latency / throughput counters per route, plus micro-batch sizes.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.recent: deque = deque()  # completion times within RATE_WINDOW_S
+        self.batches = self.batched_requests = self.batched_props = 0
+
+    def record(self, route: str, ms: float, ok: bool):
+        r = self.routes.get(route)
+        if r is None:
+            r = self.routes[route] = {"count": 0, "errors": 0, "ms": deque(maxlen=LATENCY_WINDOW)}
+        r["count"] += 1
+        r["errors"] += not ok
+        r["ms"].append(ms)
+        now = time.monotonic()
+        self.recent.append(now)
+        while self.recent and self.recent[0] < now - RATE_WINDOW_S:
+            self.recent.popleft()
+
+    def batch(self, requests: int, props: int):
+        self.batches += 1
+        self.batched_requests += requests
+        self.batched_props += props
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        while self.recent and self.recent[0] < now - RATE_WINDOW_S:
+            self.recent.popleft()
+        uptime = time.time() - self.started
+        total = sum(r["count"] for r in self.routes.values())
+        routes = {}
+        for name, r in sorted(self.routes.items()):
+            ms = sorted(r["ms"])
+            routes[name] = {
+                "count": r["count"], "errors": r["errors"],
+                "p50_ms": round(ms[len(ms) // 2], 3) if ms else None,
+                "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3) if ms else None,
+                "max_ms": round(ms[-1], 3) if ms else None,
+            }
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": total,
+            "req_per_sec": round(total / uptime, 1) if uptime > 0 else None,
+            "req_per_sec_recent": round(len(self.recent) / RATE_WINDOW_S, 1),
+            "batches": self.batches,
+            "mean_batch_requests": round(self.batched_requests / self.batches, 2) if self.batches else None,
+            "mean_batch_props": round(self.batched_props / self.batches, 1) if self.batches else None,
+            "routes": routes,
+        }
+
+# -----------------------------
+# MICRO-BATCHER
+# -----------------------------
+class Batcher:
+    """
+    Queue of (kind, body, props, future); run() groups queued requests into pool jobs.
+    """
+    def __init__(self, pool: Optional[ProcessPoolExecutor], metrics: Metrics, workers: int,
+                 window_ms: float = BATCH_WINDOW_MS, max_props: int = BATCH_MAX_PROPS):
+        self.pool, self.metrics = pool, metrics
+        self.window = window_ms / 1000.0
+        self.max_props = max_props
+        self.slots = asyncio.Semaphore(max(1, workers) * 2)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.inflight: set = set()  # dispatch tasks (the loop only keeps weak references)
+
+    async def submit(self, kind: str, body: Dict[str, Any], props: int) -> Tuple[int, bytes]:
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((kind, body, max(1, props), fut))
+        return await fut
+
+    def _drain(self, batch: list, n: int) -> int:
+        while n < self.max_props and not self.queue.empty():
+            item = self.queue.get_nowait()
+            batch.append(item)
+            n += item[2]
+        return n
+
+    async def run(self):
+        while True:
+            first = await self.queue.get()
+            await self.slots.acquire()  # waits while the pool is saturated; the queue keeps filling
+            batch = [first]
+            n = self._drain(batch, first[2])
+            if n < self.max_props and self.window > 0:
+                await asyncio.sleep(self.window)
+                n = self._drain(batch, n)
+            task = asyncio.ensure_future(self._dispatch(batch, n))
+            self.inflight.add(task)
+            task.add_done_callback(self.inflight.discard)
+
+    async def drain(self):
+        """
+        Wait for the batches already sent to the pool.
+        """
+        while self.inflight:
+            await asyncio.gather(*list(self.inflight), return_exceptions=True)
+
+    async def _dispatch(self, batch: list, n: int):
+        try:
+            jobs = [(kind, body) for kind, body, _, _ in batch]
+            results = await asyncio.get_running_loop().run_in_executor(self.pool, run_jobs, jobs)
+            for (_, _, _, fut), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+        except Exception as e:
+            for _, _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        finally:
+            self.metrics.batch(len(batch), n)
+            self.slots.release()
+
+# -----------------------------
+# SERVICE
+# -----------------------------
+class Service:
+    def __init__(self, workers: int = WORKERS, window_ms: float = BATCH_WINDOW_MS):
+        self.workers = workers
+        self.window_ms = window_ms
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.metrics = Metrics()
+        self.batcher: Optional[Batcher] = None
+        self.routes = {
+            "/health": {"GET": self.health},
+            "/metrics": {"GET": self.metrics_view},
+            "/normalize_last5": {"POST": self.normalize},
+            "/score": {"POST": self.score},
+            "/recommend": {"POST": self.recommend},
+            "/tracking/slips": {"GET": self.slips_page, "POST": self.save_slips},
+            "/tracking/props": {"GET": self.props_page},
+            "/tracking/slip_result": {"POST": self.slip_result},
+            "/tracking/prop_result": {"POST": self.prop_result},
+        }
+
+    async def start(self, host: str = HOST, port: int = PORT) -> asyncio.AbstractServer:
+        self.batcher = Batcher(self.pool, self.metrics, self.workers, self.window_ms)
+        self._batch_task = asyncio.ensure_future(self.batcher.run())
+        if self.pool is not None:  # fork the workers now rather than on the first request
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[loop.run_in_executor(self.pool, run_jobs, []) for _ in range(self.workers)])
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def drain(self):
+        if self.batcher is not None:
+            await self.batcher.drain()
+
+    def close(self):
+        if self.batcher is not None:
+            self._batch_task.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)  # don't leave orphaned workers
+
+    # -- HTTP --
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3:
+                    await self._send(writer, 400, encode({"error": "Bad request line."}), False)
+                    break
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    k, _, v = line.partition(":")
+                    if k:
+                        headers[k.strip().lower()] = v.strip()
+                conn = headers.get("connection", "").lower()
+                keep = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    await self._send(writer, 400, encode({"error": "Chunked bodies are not supported."}), False)
+                    break
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._send(writer, 400, encode({"error": "Bad Content-Length."}), False)
+                    break
+                if length > MAX_BODY:
+                    await self._send(writer, 413, encode({"error": f"Body over {MAX_BODY} bytes."}), False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                t0 = time.perf_counter()
+                route, status, reply = await self.dispatch(method, target, body)
+                self.metrics.record(route, (time.perf_counter() - t0) * 1e3, status < 400)
+                await self._send(writer, status, reply, keep)
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:  # never let a connection task die with an unretrieved exception
+            try:
+                await self._send(writer, 500, encode({"error": f"{type(e).__name__}: {e}"}), False)
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, reply: bytes, keep: bool):
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(reply)}\r\n"
+            f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode("latin-1") + reply
+        )
+        await writer.drain()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[str, int, bytes]:
+        """
+        -> (route label for metrics, status, encoded reply).
+        """
+        url = urlsplit(target)
+        methods = self.routes.get(url.path)
+        if methods is None:
+            return "(not found)", 404, encode({"error": f"No route {url.path}."})
+        route = f"{method} {url.path}"
+        handler = methods.get(method)
+        if handler is None:
+            return route, 405, encode({"error": f"{url.path} allows {', '.join(methods)}."})
+        try:
+            if method == "POST":
+                try:
+                    payload = json.loads(body or b"{}")
+                except (json.JSONDecodeError, ValueError) as e:  # incl. bytes that aren't UTF-8
+                    raise BadRequest(f"Bad JSON: {e}")
+                if not isinstance(payload, dict):
+                    raise BadRequest("Body must be a JSON object.")
+            else:
+                payload = dict(parse_qsl(url.query))
+            status, reply = await handler(payload)
+        except BadRequest as e:
+            status, reply = 400, {"error": str(e)}
+        except Exception as e:
+            status, reply = 500, {"error": f"{type(e).__name__}: {e}"}
+        return route, status, reply if isinstance(reply, bytes) else encode(reply)
+
+    # -- handlers: (payload) -> (status, dict or encoded bytes) --
+    async def health(self, q):
+        return 200, {"ok": True, "workers": self.workers}
+
+    async def metrics_view(self, q):
+        return 200, self.metrics.snapshot()
+
+    async def normalize(self, body):
+        if "values" in body:
+            if not isinstance(body["values"], list):
+                raise BadRequest("'values' must be a list of strings.")
+            return 200, {"last5": [normalize_last5(str(v)) for v in body["values"]]}
+        return 200, {"last5": normalize_last5(str(body.get("last5", "")))}
+
+    async def score(self, body):
+        props = _check_props(body.get("props"), "props")
+        try:
+            parse_flag("demons_blocked", body.get("demons_blocked", DEFAULTS["demons_blocked"]))
+        except ValueError as e:
+            raise BadRequest(str(e))
+        return await self.batcher.submit("score", body, len(props))
+
+    async def recommend(self, body):
+        board = _check_props(body.get("board"), "board")
+        return await self.batcher.submit("recommend", body, len(board))
+
+    async def save_slips(self, body):
+        import tracking
+
+        slip, props = body.get("slip"), body.get("props", [])
+        if not isinstance(slip, dict) or not slip.get("slip_id") or not isinstance(props, list):
+            raise BadRequest("Need 'slip' (with slip_id) and a 'props' list.")
+
+        def save():
+            tracking.save_slip(slip)
+            if props:
+                tracking.save_props(props)
+
+        await asyncio.to_thread(save)
+        return 200, {"saved": {"slips": 1, "props": len(props)}}
+
+    async def slip_result(self, body):
+        import tracking
+
+        args = [str(body.get(k, "")) for k in ("slip_id", "result", "payout", "notes")]
+        err = await asyncio.to_thread(tracking.update_slip_result, *args)
+        return (400, {"error": err}) if err else (200, {"updated": args[0]})
+
+    async def prop_result(self, body):
+        import tracking
+
+        args = [str(body.get(k, "")) for k in ("slip_id", "prop_id", "result")]
+        err = await asyncio.to_thread(tracking.update_prop_result, *args)
+        return (400, {"error": err}) if err else (200, {"updated": args[1]})
+
+    async def slips_page(self, q):
+        import tracking
+
+        return await self._page(tracking.page_slips, q, ("since", "until", "result", "search"))
+
+    async def props_page(self, q):
+        import tracking
+
+        return await self._page(tracking.page_props, q, ("since", "until", "result", "market", "search"))
+
+    async def _page(self, fn, q, keys):
+        import tracking
+
+        try:
+            offset = int(q.get("offset", 0))
+            limit = int(q.get("limit", tracking.PAGE_SIZE))
+        except ValueError:
+            raise BadRequest("offset / limit must be integers.")
+        filters = {k: q[k] for k in keys if k in q}
+        df, total = await asyncio.to_thread(fn, max(0, offset), max(0, limit), **filters)
+        return 200, {"total": int(total), "offset": offset, "rows": df.to_dict("records")}
+
+async def serve(host: str = HOST, port: int = PORT, workers: int = WORKERS, window_ms: float = BATCH_WINDOW_MS):
+    service = Service(workers, window_ms)
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{port} ({workers} worker processes)", file=sys.stderr)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+    try:
+        async with server:
+            await stop.wait()
+        await service.drain()  # answer what's already in the pool before it shuts down
+    finally:
+        service.close()
+
+# -----------------------------
+# LOAD TEST
+# -----------------------------
+async def load_test(host: str, port: int, path: str, body: Optional[Dict[str, Any]], requests: int,
+                    concurrency: int) -> Dict[str, Any]:
+    """
+    `requests` calls spread over `concurrency` keep-alive connections -> req/s and latency.
+    """
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    method = "GET" if body is None else "POST"
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n").encode("latin-1")
+    latencies: List[float] = []
+    errors = 0
+    todo = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in todo:
+                t0 = time.perf_counter()
+                writer.write(head + data)
+                await writer.drain()
+                status_line = await reader.readuntil(b"\r\n")
+                rest = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in rest.decode("latin-1").split("\r\n"):
+                    k, _, v = line.partition(":")
+                    if k.strip().lower() == "content-length":
+                        length = int(v)
+                await reader.readexactly(length)
+                latencies.append((time.perf_counter() - t0) * 1e3)
+                errors += not status_line.startswith(b"HTTP/1.1 200")
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(max(1, concurrency))])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "req_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+def main(argv: List[str] = None):
+    ap = argparse.ArgumentParser(description="Local HTTP service for scoring, recommendations and tracking.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve")
+    s.add_argument("--host", default=HOST)
+    s.add_argument("--port", type=int, default=PORT)
+    s.add_argument("--workers", type=int, default=WORKERS, help="scoring processes (0 = threads in this process)")
+    s.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW_MS)
+    l = sub.add_parser("load")
+    l.add_argument("--host", default=HOST)
+    l.add_argument("--port", type=int, default=PORT)
+    l.add_argument("--path", default="/score", choices=["/score", "/recommend", "/normalize_last5", "/health"])
+    l.add_argument("--props", type=int, default=10, help="synthetic props per request")
+    l.add_argument("--requests", type=int, default=2000)
+    l.add_argument("--concurrency", type=int, default=32)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.workers, args.batch_window_ms))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    from bench import synthetic_board
+
+    board = [{**p, "last5": p.pop("last5_str")} for p in synthetic_board(args.props)]  # pasted-string last5
+    body = {
+        "/score": {"props": board},
+        "/recommend": {"board": board, "bankroll": 100},
+        "/normalize_last5": {"values": [p["last5"] for p in board]},
+        "/health": None,
+    }[args.path]
+    stats = asyncio.run(load_test(args.host, args.port, args.path, body, args.requests, args.concurrency))
+    print(json.dumps(stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Monte Carlo EV for FLEX slips.
+
+    probs = leg_probabilities(slip_legs(slip))          # per-leg hit probability
+    sim = simulate_slip(probs, slip["slip_type"], slip["stake"], corr=correlation_matrix(legs))
+    sim["ev"], sim["p_bust"], sim["tiers"]               # $ EV, P(payout 0), P(k legs hit)
+
+Leg probabilities come from last5 hit counts shrunk toward a prior (50% by default, or a
+historical hit rate by grade from aggregates.leg_table("grade")); a fitted p_win from
+calibration.py wins when present. Trials are drawn in NumPy batches: independent legs
+compare uniforms against p, correlated legs use a Gaussian copula (correlated normals
+against NormalDist.inv_cdf(p)), so marginals stay exactly p. Payouts come from
+slip_logic.payout_table, the same FLEX tiers tracking settles with.
+"""
+from functools import lru_cache
+from statistics import NormalDist
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+import perf
+from models import Slip
+from slip_logic import MIN_BET, decide_more_less, payout_table, slip_size
+
+TRIALS = 200_000
+BATCH = 50_000          # trials per NumPy batch (bounds memory at any trial count)
+SEED = 7                # fixed so a rerun shows the same numbers for the same slip
+PRIOR_STRENGTH = 4.0    # pseudo-games the prior is worth against the 5 observed
+SAME_GAME_RHO = 0.15    # default leg correlations for correlation_matrix
+SAME_PLAYER_RHO = 0.35
+
+_PAYOUTS = payout_table()
+
+# -----------------------------
+# LEG PROBABILITIES
+# -----------------------------
+def slip_legs(slip: Any) -> List[Any]:
+    """
+    Legs with every field available (a Slip keeps its ScoredProps, which carry game).
+    """
+    return list(slip.legs_scored) if isinstance(slip, Slip) else list(slip["legs"])
+
+def leg_probabilities(legs: Sequence[Any], prior: Optional[Dict[str, float]] = None,
+                      p_win: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    P(hit) per leg: (hits + k * prior) / (5 + k) on the picked side of last5, where the
+    prior is `prior[grade]` (else `prior["all"]`, else 0.5). A fitted probability
+    (`p_win` by prop_id, or the leg's own p_win) is used as-is.
+    """
+    prior = prior or {}
+    p_win = p_win or {}
+    out = np.empty(len(legs))
+    for i, leg in enumerate(legs):
+        p = p_win.get(str(leg.get("prop_id", "")), leg.get("p_win"))
+        if p is not None and p == p:
+            out[i] = float(p)
+            continue
+        last5 = list(leg.get("last5") or [])
+        line = float(leg.get("line") or 0.0)
+        pick = leg.get("pick", "")
+        if len(last5) == 5:
+            _, hm, hl = decide_more_less(last5, line)
+            hits = hm if pick == "MORE" else hl
+            n = 5.0
+        else:
+            hits, n = 0.0, 0.0
+        base = prior.get(leg.get("grade", ""), prior.get("all", 0.5))
+        base = 0.5 if base is None or base != base else float(base)
+        out[i] = (hits + PRIOR_STRENGTH * base) / (n + PRIOR_STRENGTH)
+    return np.clip(out, 1e-6, 1 - 1e-6)
+
+def correlation_matrix(legs: Sequence[Any], same_game: float = SAME_GAME_RHO,
+                       same_player: float = SAME_PLAYER_RHO) -> np.ndarray:
+    """
+    Default leg correlations: `same_player` for two legs on one player, `same_game` for
+    legs sharing a game, 0 otherwise.
+    """
+    n = len(legs)
+    players = [str(l.get("player", "")).strip().lower() for l in legs]
+    games = [str(l.get("game", "") or "").strip().lower() for l in legs]
+    corr = np.eye(n)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if players[i] and players[i] == players[j]:
+                corr[i, j] = corr[j, i] = same_player
+            elif games[i] and games[i] == games[j]:
+                corr[i, j] = corr[j, i] = same_game
+    return corr
+
+def _cholesky(corr: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        # nearest PSD: clip negative eigenvalues, renormalize the diagonal
+        w, v = np.linalg.eigh(corr)
+        fixed = (v * np.maximum(w, 1e-9)) @ v.T
+        d = np.sqrt(np.diag(fixed))
+        return np.linalg.cholesky(fixed / np.outer(d, d) + 1e-12 * np.eye(len(d)))
+
+# -----------------------------
+# SIMULATION
+# -----------------------------
+def _win_counts(probs: np.ndarray, chol: Optional[np.ndarray], trials: int, seed: int) -> np.ndarray:
+    """
+    Histogram of legs hit (length n + 1) over `trials` draws.
+    """
+    n = len(probs)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(n + 1, dtype=np.int64)
+    if chol is not None:
+        z_cut = np.array([NormalDist().inv_cdf(float(p)) for p in probs])
+    for start in range(0, trials, BATCH):
+        m = min(BATCH, trials - start)
+        if chol is None:
+            hits = rng.random((m, n), dtype=np.float32) < probs.astype(np.float32)
+        else:
+            hits = rng.standard_normal((m, n)) @ chol.T < z_cut
+        counts += np.bincount(hits.sum(axis=1), minlength=n + 1)
+    return counts
+
+@lru_cache(maxsize=256)
+def _simulate_cached(probs: Tuple[float, ...], chol: Optional[Tuple[float, ...]], trials: int, seed: int) -> np.ndarray:
+    n = len(probs)
+    c = None if chol is None else np.array(chol).reshape(n, n)
+    return _win_counts(np.array(probs), c, trials, seed)
+
+@perf.timed("simulate.simulate_slip")
+def simulate_slip(
+    probs: Sequence[float],
+    slip_type: str = "",
+    stake: float = MIN_BET,
+    corr: Optional[np.ndarray] = None,
+    trials: int = TRIALS,
+    seed: int = SEED,
+) -> Dict[str, Any]:
+    """
+    Outcome distribution of one FLEX slip. Returns:
+      tiers      P(exactly k legs hit), k = 0..n
+      ev_mult    expected payout multiplier
+      ev         expected profit in $ at `stake` (payout - stake)
+      p_bust     P(payout 0)
+      p_profit   P(payout > stake)
+      stdev      stdev of profit in $
+    `corr` (n x n) switches from independent legs to a Gaussian copula.
+    """
+    p = np.clip(np.asarray(probs, dtype=float), 1e-6, 1 - 1e-6)
+    n = len(p)
+    size = slip_size(slip_type) or n
+    if n < 2 or size != n or n >= _PAYOUTS.shape[0]:
+        raise ValueError(f"Need 2–{_PAYOUTS.shape[0] - 1} legs matching the slip size (got {n} for {slip_type!r}).")
+    chol = None
+    if corr is not None:
+        corr = np.asarray(corr, dtype=float)
+        if corr.shape != (n, n):
+            raise ValueError(f"corr must be {n}x{n}.")
+        if not np.allclose(corr, np.eye(n)):
+            chol = tuple(np.round(_cholesky(corr), 12).ravel().tolist())
+    counts = _simulate_cached(tuple(np.round(p, 12).tolist()), chol, int(trials), int(seed))
+
+    tiers = counts / counts.sum()
+    mult = _PAYOUTS[n, : n + 1]
+    ev_mult = float(tiers @ mult)
+    var_mult = float(tiers @ (mult - ev_mult) ** 2)
+    stake = float(stake)
+    return {
+        "legs": n,
+        "trials": int(trials),
+        "tiers": tiers.round(6).tolist(),
+        "ev_mult": round(ev_mult, 4),
+        "ev": round(stake * (ev_mult - 1.0), 2),
+        "p_bust": round(float(tiers[mult == 0].sum()), 4),
+        "p_profit": round(float(tiers[mult > 1.0].sum()), 4),
+        "stdev": round(stake * var_mult ** 0.5, 2),
+    }
+
+def simulate_recommendation(rec: Dict[str, Any], prior: Optional[Dict[str, float]] = None,
+                            correlated: bool = True, trials: int = TRIALS,
+                            p_win: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    simulate_slip for every slip of a PLAY recommendation (build_recommendations_locked).
+    """
+    out = []
+    for slip in rec.get("slips", []):
+        legs = slip_legs(slip)
+        corr = correlation_matrix(legs) if correlated else None
+        out.append(simulate_slip(leg_probabilities(legs, prior, p_win), slip["slip_type"], slip["stake"], corr, trials))
+    return out
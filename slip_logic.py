@@ -1,23 +1,21 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Sequence, Union
+from collections import OrderedDict
+import os
 import math
+import time
+import threading
 
-# iPhone-friendly dropdown list
-DEFAULT_MARKETS = [
-    "Points",
-    "Rebounds",
-    "Assists",
-    "PRA",
-    "PR",
-    "RA",
-    "3PT Made",
-    "Shots",
-    "Shots on Target",
-    "Passes Attempted",
-    "Goalie Saves",
-    "Goals",
-    "Fantasy Score",
-    "Other",
-]
+import numpy as np
+import pandas as pd
+
+from models import Prop, ScoredProp, ScoreResult, Slip, props_frame
+import perf
+from markets import REGISTRY, BUILTIN_MARKETS, VARIANCE_PENALTY, VOLUME_BONUS
+
+PropLike = Union[Dict[str, Any], Prop, ScoredProp]
+
+# iPhone-friendly dropdown list (market classes live in markets.BUILTIN_MARKETS)
+DEFAULT_MARKETS = list(BUILTIN_MARKETS)
 
 MIN_BET = 5.0  # PrizePicks minimum
 
@@ -40,6 +38,53 @@ def normalize_last5(s: str) -> List[float]:
         return []
     return vals
 
+_ROW_SEP = " \x01 "  # row delimiter token for normalize_last5_column
+
+def _parse_float(token: str) -> Optional[float]:
+    try:
+        return float(token)
+    except:
+        return None
+
+def normalize_last5_column(values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    normalize_last5 over a whole column of pasted strings at once.
+    Returns an (n, 5) float matrix plus a mask of rows that gave exactly 5 values
+    (the rows where normalize_last5 would not return []).
+    Each distinct token is parsed once, so a big import costs about as much as its vocabulary.
+    """
+    texts = [v if isinstance(v, str) else "" for v in values]
+    n = len(texts)
+    mat = np.full((n, 5), np.nan)
+    if n == 0:
+        return mat, np.zeros(0, dtype=bool)
+
+    # one C-level replace + split for the whole column; rows are delimited by a sentinel token
+    joined = _ROW_SEP.join(texts).replace(",", " ").replace("|", " ")
+    tokens = np.array(joined.split(), dtype=object)
+    is_sep = tokens == _ROW_SEP.strip()
+    if is_sep.sum() != n - 1:  # sentinel inside a value: keep rows apart the slow way
+        vals = [normalize_last5(t) for t in texts]
+        valid = np.array([len(v) == 5 for v in vals], dtype=bool)
+        if valid.any():
+            mat[valid] = [v for v in vals if v]
+        return mat, valid
+    rows = np.cumsum(is_sep)[~is_sep]
+    codes, uniques = pd.factorize(tokens[~is_sep])
+
+    parsed = [_parse_float(t) for t in uniques]
+    ok_u = np.array([v is not None for v in parsed], dtype=bool)
+    val_u = np.array([np.nan if v is None else v for v in parsed], dtype=float)
+    ok = ok_u[codes]
+    rows, vals = rows[ok], val_u[codes[ok]]
+
+    counts = np.bincount(rows, minlength=n)
+    valid = counts == 5
+    keep = valid[rows]
+    rows, vals = rows[keep], vals[keep]
+    mat[rows, np.arange(len(rows)) % 5] = vals  # kept rows contribute exactly 5 tokens, in order
+    return mat, valid
+
 def decide_more_less(last5: List[float], line: float) -> Tuple[str, int, int]:
     """
     Returns (pick, hits_more, hits_less).
@@ -59,12 +104,22 @@ def decide_more_less(last5: List[float], line: float) -> Tuple[str, int, int]:
     avg = sum(last5) / 5.0
     return ("MORE", hits_more, hits_less) if avg >= line else ("LESS", hits_more, hits_less)
 
-def score_prop(prop: Dict[str, Any], demons_blocked: bool = True) -> Dict[str, Any]:
+def score_prop(prop: PropLike, demons_blocked: bool = True) -> PropLike:
     """
     Conservative scoring tuned for Aggression 1.
     - Requires last5 to be considered strong.
     - Strong boost for 4/5 or 5/5 hits.
     - Penalize demon (and can be blocked entirely in recommendations).
+    A Prop returns a ScoredProp (no field copies); a dict returns the dict plus score fields.
+    """
+    fields = _score_fields(prop)
+    if isinstance(prop, Prop):
+        return ScoredProp(prop, ScoreResult(**fields))
+    return {**prop, **fields}
+
+def _score_fields(prop: PropLike) -> Dict[str, Any]:
+    """
+    pick / hits_more / hits_less / avg_last5 / score / grade / why for one prop.
     """
     player = prop.get("player", "")
     market = prop.get("market", "")
@@ -80,7 +135,6 @@ def score_prop(prop: Dict[str, Any], demons_blocked: bool = True) -> Dict[str, A
 
     if line <= 0:
         return {
-            **prop,
             "pick": "PASS",
             "hits_more": 0,
             "hits_less": 0,
@@ -93,7 +147,6 @@ def score_prop(prop: Dict[str, Any], demons_blocked: bool = True) -> Dict[str, A
     if not last5 or len(last5) != 5:
         # Missing last5 = we do NOT trust it in bankroll mode
         return {
-            **prop,
             "pick": "PASS",
             "hits_more": 0,
             "hits_less": 0,
@@ -125,13 +178,13 @@ def score_prop(prop: Dict[str, Any], demons_blocked: bool = True) -> Dict[str, A
         score -= 30.0
         reasons.append("Demon penalty")
 
-    # Market risk adjustments
-    m = (market or "").lower()
-    if any(k in m for k in ["goals", "3pt", "steals", "blocks", "aces"]):
-        score -= 4.0
+    # Market risk adjustments (classified once per distinct market, see markets.py)
+    mc = REGISTRY.resolve(market)
+    if mc.penalty:
+        score -= VARIANCE_PENALTY
         reasons.append("High-variance market penalty")
-    if any(k in m for k in ["rebounds", "passes", "minutes", "assists", "pra", "fantasy"]):
-        score += 2.0
+    if mc.bonus:
+        score += VOLUME_BONUS
         reasons.append("Volume-market bonus")
 
     # Clamp
@@ -149,7 +202,6 @@ def score_prop(prop: Dict[str, Any], demons_blocked: bool = True) -> Dict[str, A
     why = f"{pick} | hits={hits}/5 | avg={avg:.2f} vs line={line:.2f} | " + ("; ".join(reasons) if reasons else "standard")
 
     return {
-        **prop,
         "pick": pick,
         "hits_more": hm,
         "hits_less": hl,
@@ -159,6 +211,344 @@ def score_prop(prop: Dict[str, Any], demons_blocked: bool = True) -> Dict[str, A
         "why": why,
     }
 
+# -----------------------------
+# SHARED SCORE CACHE
+# -----------------------------
+# ScoreResults keyed by the content of what _score_fields reads plus the demons flag.
+# Module-level, so every Streamlit session in the process shares it, and identical Props
+# entered in different sessions share one ScoreResult instance. Plain dict props still
+# skip rescoring on a hit, but get a fresh dict per call (it carries the caller's fields
+# and may be mutated), so only Prop inputs share result objects.
+SCORE_CACHE_SIZE = int(os.environ.get("PP_SCORE_CACHE_SIZE", "50000"))
+SCORE_CACHE_TTL = float(os.environ.get("PP_SCORE_CACHE_TTL", "21600"))  # seconds; 0 = never expire
+
+_score_lock = threading.Lock()
+_score_cache: "OrderedDict[tuple, Tuple[float, ScoreResult]]" = OrderedDict()  # key -> (expires_at, result)
+_score_stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+def score_key(prop: PropLike, demons_blocked: bool = True) -> Tuple[Any, ...]:
+    """
+    Content key of the scoring inputs: the market's registry flags, line, last5, goblin,
+    demon and the demons flag. Only bools and floats, so its hash() is stable across
+    processes (no str hash randomization) and equal keys mean equal inputs. Player and
+    prop_id don't affect the score, so the same line on another board hits too.
+    """
+    return (
+        market_flags(prop.get("market", "")),
+        float(prop.get("line", 0.0)),
+        tuple(map(float, prop.get("last5") or ())),
+        bool(prop.get("is_goblin", False)),
+        bool(prop.get("is_demon", False)),
+        bool(demons_blocked),
+    )
+
+def score_prop_cached(prop: PropLike, demons_blocked: bool = True) -> PropLike:
+    """
+    score_prop through the shared LRU / TTL cache (same return types as score_prop).
+    A Prop gets a ScoredProp over the shared ScoreResult; a dict gets a new dict.
+    """
+    key = score_key(prop, demons_blocked)
+    now = time.monotonic()
+    result = None
+    with _score_lock:
+        hit = _score_cache.get(key)
+        if hit is not None and hit[0] > now:
+            _score_cache.move_to_end(key)
+            _score_stats["hits"] += 1
+            result = hit[1]
+        else:
+            if hit is not None:
+                del _score_cache[key]
+                _score_stats["expired"] += 1
+            _score_stats["misses"] += 1
+    if result is None:
+        result = ScoreResult(**_score_fields(prop))
+        with _score_lock:
+            other = _score_cache.get(key)
+            if other is not None and other[0] > now:
+                result = other[1]  # another session scored it meanwhile; share that one
+            else:
+                _score_cache[key] = (now + SCORE_CACHE_TTL if SCORE_CACHE_TTL > 0 else math.inf, result)
+                while len(_score_cache) > SCORE_CACHE_SIZE:
+                    _score_cache.popitem(last=False)
+                    _score_stats["evictions"] += 1
+    else:
+        perf.count("slip_logic.score_cache_hit", 1)
+    if isinstance(prop, Prop):
+        return ScoredProp(prop, result)
+    return {**prop, **result.to_dict()}
+
+def score_cache_stats() -> Dict[str, Any]:
+    with _score_lock:
+        lookups = _score_stats["hits"] + _score_stats["misses"]
+        return {
+            **_score_stats,
+            "entries": len(_score_cache),
+            "hit_rate": round(_score_stats["hits"] / lookups, 4) if lookups else None,
+        }
+
+def clear_score_cache():
+    with _score_lock:
+        _score_cache.clear()
+        for k in _score_stats:
+            _score_stats[k] = 0
+
+# -----------------------------
+# BATCH SCORING (NumPy)
+# -----------------------------
+SCORED_COLS = ["pick", "hits_more", "hits_less", "avg_last5", "score", "grade", "why"]
+
+BoardLike = Union[pd.DataFrame, Sequence[Dict[str, Any]], Dict[str, Any]]
+
+def market_flags(market: str) -> Tuple[bool, bool]:
+    """
+    (high_variance_penalty, volume_bonus) for one market string, from the market registry.
+    """
+    mc = REGISTRY.resolve(market)
+    return (mc.penalty, mc.bonus)
+
+def last5_matrix(values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack last5 values into an (n, 5) float matrix plus a validity mask.
+    Accepts an (n, 5) array (NaN rows = missing) or a sequence of lists (anything
+    that isn't a length-5 list/tuple/array = missing, like score_prop).
+    """
+    if isinstance(values, np.ndarray) and values.ndim == 2:
+        if values.shape[1] != 5:
+            return np.full((len(values), 5), np.nan), np.zeros(len(values), dtype=bool)
+        mat = values.astype(float, copy=False)
+        return mat, ~np.isnan(mat).any(axis=1)
+
+    n = len(values)
+    mat = np.full((n, 5), np.nan)
+    valid = np.zeros(n, dtype=bool)
+    for i, v in enumerate(values):
+        if isinstance(v, (list, tuple, np.ndarray)) and len(v) == 5:
+            mat[i] = v
+            valid[i] = True
+    return mat, valid
+
+def score_arrays(
+    line: Any,
+    last5: Any,
+    is_goblin: Any,
+    is_demon: Any,
+    penalty: Any,
+    bonus: Any,
+) -> Dict[str, np.ndarray]:
+    """
+    Core of score_prop over whole columns in one pass.
+    `penalty` / `bonus` are the per-row market flags (see market_flags).
+    Returns pick, hits_more, hits_less, avg (NaN when score_prop gives None),
+    score (clamped, unrounded), grade and ok (False = PASS/FADE row).
+    """
+    line = np.asarray(line, dtype=float)
+    mat, valid = last5_matrix(last5)
+    ok = valid & (line > 0)
+
+    col = line[:, None]
+    hm = np.where(ok, (mat > col).sum(axis=1), 0)
+    hl = np.where(ok, (mat < col).sum(axis=1), 0)
+
+    # left-to-right like sum(last5) so the float result is identical
+    avg = (mat[:, 0] + mat[:, 1] + mat[:, 2] + mat[:, 3] + mat[:, 4]) / 5.0
+    more = (hm > hl) | ((hm == hl) & (avg >= line))
+
+    hits = np.where(more, hm, hl)
+    diff = np.abs(avg - line)
+
+    # same operation order as score_prop
+    score = 50.0 + hits * 8.0
+    score = score + np.minimum(diff * 6.0, 18.0)
+    score = score + np.where(np.asarray(is_goblin, dtype=bool), 6.0, 0.0)
+    score = score - np.where(np.asarray(is_demon, dtype=bool), 30.0, 0.0)
+    score = score - np.where(np.asarray(penalty, dtype=bool), VARIANCE_PENALTY, 0.0)
+    score = score + np.where(np.asarray(bonus, dtype=bool), VOLUME_BONUS, 0.0)
+    score = np.where(ok, np.clip(score, 0.0, 100.0), 0.0)
+
+    grade = np.select([score >= 78, score >= 70, score >= 62], ["ELITE", "STRONG", "OK"], "FADE").astype(object)
+    pick = np.where(ok, np.where(more, "MORE", "LESS"), "PASS").astype(object)
+
+    return {
+        "pick": pick,
+        "hits_more": hm,
+        "hits_less": hl,
+        "avg": np.where(ok, avg, np.nan),
+        "score": score,
+        "grade": grade,
+        "ok": ok,
+    }
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized round(x, 2) that agrees with Python's round().
+    np.round goes through x*100 and can differ on near-half values; those few are redone in Python.
+    """
+    out = np.round(values, 2)
+    scaled = values * 100.0
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        out[i] = round(float(values[i]), 2)
+    return out
+
+def _board_frame(board: BoardLike) -> Tuple[pd.DataFrame, Any]:
+    """
+    Normalize a board to (frame of 1-D columns, last5 values).
+    """
+    if isinstance(board, pd.DataFrame):
+        df = board
+    elif isinstance(board, dict):
+        df = pd.DataFrame({k: v for k, v in board.items() if np.ndim(v) == 1})
+        if "last5" in board and np.ndim(board["last5"]) == 2:
+            return df, np.asarray(board["last5"], dtype=float)
+    else:
+        items = list(board)
+        if items and all(isinstance(p, (Prop, ScoredProp)) for p in items):
+            df = props_frame([p.prop if isinstance(p, ScoredProp) else p for p in items])
+        else:
+            df = pd.DataFrame(items)
+    last5 = df["last5"].tolist() if "last5" in df.columns else [None] * len(df)
+    return df, last5
+
+@perf.timed("slip_logic.score_board", rows=len)
+def score_board(board: BoardLike, demons_blocked: bool = True, with_why: bool = True, p_win: bool = False) -> pd.DataFrame:
+    """
+    Vectorized score_prop for a whole board.
+    board: DataFrame, list of prop dicts / Props, or dict of columns
+    (line, last5 as list column or (n, 5) matrix, is_goblin, is_demon, and market
+    or integer market_code from markets.REGISTRY.codes()).
+    Returns the board columns plus pick/hits_more/hits_less/avg_last5/score/grade/why,
+    row for row equal to score_prop (avg_last5 is NaN where score_prop gives None).
+    p_win=True adds the fitted P(win) from calibration.py (NaN without an artifact).
+    """
+    df, last5 = _board_frame(board)
+    n = len(df)
+
+    def column(name: str, default: Any) -> pd.Series:
+        if name not in df.columns:
+            return pd.Series([default] * n, index=df.index)
+        return df[name].where(df[name].notna(), default)
+
+    line = column("line", 0.0).astype(float).to_numpy()
+    is_goblin = column("is_goblin", False).astype(bool).to_numpy()
+    is_demon = column("is_demon", False).astype(bool).to_numpy()
+    if "market_code" in df.columns:
+        codes = df["market_code"].to_numpy(dtype=np.int64)  # from REGISTRY.codes()
+    else:
+        codes = REGISTRY.codes(column("market", "").to_numpy())
+    penalty, bonus = REGISTRY.flags(codes)
+
+    r = score_arrays(line, last5, is_goblin, is_demon, penalty, bonus)
+    ok = r["ok"]
+
+    out = df.copy()
+    out["pick"] = r["pick"]
+    out["hits_more"] = r["hits_more"]
+    out["hits_less"] = r["hits_less"]
+    avg, score = round2(r["avg"]), round2(r["score"])
+    out["avg_last5"] = avg
+    out["score"] = score
+    out["grade"] = r["grade"]
+
+    if p_win:
+        import calibration  # imports slip_logic for training; only needed in this mode
+
+        # from the rounded avg_last5 / score, like calibration.predict_props on score_prop rows
+        hits = np.where(r["pick"] == "MORE", r["hits_more"], r["hits_less"])
+        out["p_win"] = calibration.predict_arrays(
+            hits, np.abs(avg - line), is_goblin, is_demon, penalty, bonus, score, ok
+        )
+
+    if with_why:
+        # 16 possible reason suffixes; build each once
+        combo = is_goblin * 8 + is_demon * 4 + penalty * 2 + bonus
+        suffixes = []
+        for c in range(16):
+            reasons = [txt for bit, txt in ((8, "Goblin bonus"), (4, "Demon penalty"),
+                                            (2, "High-variance market penalty"), (1, "Volume-market bonus")) if c & bit]
+            suffixes.append("; ".join(reasons) if reasons else "standard")
+        hits = np.where(r["pick"] == "MORE", r["hits_more"], r["hits_less"])
+        why = [
+            f"{p} | hits={h}/5 | avg={a:.2f} vs line={l:.2f} | {suffixes[c]}" if o
+            else ("Invalid line." if l <= 0 else "Missing last5 data (required).")
+            for p, h, a, l, c, o in zip(r["pick"], hits.tolist(), r["avg"].tolist(), line.tolist(), combo.tolist(), ok.tolist())
+        ]
+        out["why"] = why
+
+    return out
+
+# -----------------------------
+# FLEX PAYOUTS
+# -----------------------------
+# Payout multiplier by slip size -> legs hit (anything missing pays 0).
+# 2-pick has no flex tier and pays like a power play.
+FLEX_PAYOUTS = {
+    2: {2: 3.0},
+    3: {3: 2.25, 2: 1.25},
+    4: {4: 5.0, 3: 1.5},
+    5: {5: 10.0, 4: 2.0, 3: 0.4},
+    6: {6: 25.0, 5: 2.0, 4: 0.4},
+}
+
+def slip_size(slip_type: str) -> int:
+    """
+    '3-PICK FLEX (2nd slip)' -> 3. Returns 0 when the type has no size.
+    """
+    head = str(slip_type or "").split("-", 1)[0].strip()
+    return int(head) if head.isdigit() else 0
+
+def payout_multiplier(size: int, wins: int, voids: int = 0) -> float:
+    """
+    Multiplier on stake for a slip of `size` legs with `wins` hits.
+    PUSH/DNP legs (`voids`) drop the slip to the next smaller size; a slip reduced
+    below 2 live legs is refunded (1.0).
+    """
+    live = size - voids
+    if live < 2:
+        return 1.0
+    return FLEX_PAYOUTS.get(live, {}).get(wins, 0.0)
+
+# Leg results as stored in props_history.result (W / L accepted as short forms)
+LEG_WIN = {"WIN", "W"}
+LEG_LOSS = {"LOSS", "L"}
+LEG_VOID = {"PUSH", "DNP"}
+LEG_RESULTS = LEG_WIN | LEG_LOSS | LEG_VOID
+
+def settle_slip(slip_type: str, stake: float, leg_results: List[Any]) -> Optional[Tuple[str, float]]:
+    """
+    (slip result, payout) from leg results, or None while any leg is ungraded.
+    Result is W (every live leg hit), PARTIAL (a flex tier paid), L (nothing paid)
+    or REFUND (PUSH/DNP left fewer than 2 live legs).
+    """
+    res = ["" if r is None or r != r else str(r).strip().upper() for r in leg_results]
+    if not res or any(r not in LEG_RESULTS for r in res):
+        return None
+    size = slip_size(slip_type) or len(res)
+    wins = sum(1 for r in res if r in LEG_WIN)
+    voids = sum(1 for r in res if r in LEG_VOID)
+    mult = payout_multiplier(size, wins, voids)
+    live = size - voids
+    if live < 2:
+        result = "REFUND"
+    elif mult == 0.0:
+        result = "L"
+    elif wins >= live:
+        result = "W"
+    else:
+        result = "PARTIAL"
+    stake = float(stake) if stake == stake else 0.0
+    return result, round(stake * mult, 2)
+
+def payout_table(max_size: int = 6) -> np.ndarray:
+    """
+    payout_multiplier as a [live_legs, wins] array for vectorized settlement.
+    """
+    t = np.zeros((max_size + 1, max_size + 1))
+    for live in range(max_size + 1):
+        for wins in range(live + 1):
+            t[live, wins] = payout_multiplier(live, wins)
+    return t
+
 # -----------------------------
 # LOCKED BANKROLL GATES
 # -----------------------------
@@ -207,6 +597,7 @@ def _gates(bankroll: float) -> Dict[str, Any]:
         "max_daily_risk": MIN_BET * 2,
     }
 
+@perf.timed("slip_logic._eligible", rows=len)
 def _eligible(scored_props: List[Dict[str, Any]], demons_blocked: bool) -> List[Dict[str, Any]]:
     out = []
     for p in scored_props:
@@ -218,27 +609,23 @@ def _eligible(scored_props: List[Dict[str, Any]], demons_blocked: bool) -> List[
     out.sort(key=lambda x: x.get("score", 0.0), reverse=True)
     return out
 
+# Elite gates by slip size: (floor for every leg, floor for the best leg).
+ELITE_FLOORS = {2: (70.0, 74.0), 3: (70.0, 78.0), 4: (78.0, 78.0), 5: (80.0, 80.0), 6: (82.0, 82.0)}
+
 def _is_elite_for_size(props: List[Dict[str, Any]], size: int) -> bool:
     """
-    Very strict thresholds for bankroll mode.
+    Very strict thresholds for bankroll mode (ELITE_FLOORS on the top `size` of score-sorted props).
     """
-    if len(props) < size:
+    if size not in ELITE_FLOORS or len(props) < size:
         return False
+    floor, top_floor = ELITE_FLOORS[size]
     top = props[:size]
-    if size == 2:
-        return top[0]["score"] >= 74 and top[1]["score"] >= 70
-    if size == 3:
-        return all(p["score"] >= 70 for p in top) and sum(1 for p in top if p["score"] >= 78) >= 1
-    if size == 4:
-        return all(p["score"] >= 78 for p in top)
-    if size == 5:
-        return all(p["score"] >= 80 for p in top)
-    if size == 6:
-        return all(p["score"] >= 82 for p in top)
-    return False
-
-def _build_slip(props: List[Dict[str, Any]], size: int, slip_type: str, stake: float) -> Dict[str, Any]:
+    return all(p["score"] >= floor for p in top) and top[0]["score"] >= top_floor
+
+def _build_slip(props: List[Dict[str, Any]], size: int, slip_type: str, stake: float) -> Union[Dict[str, Any], Slip]:
     top = props[:size]
+    if top and all(isinstance(p, ScoredProp) for p in top):
+        return Slip(slip_type, stake, tuple(top))  # legs by reference
     legs = []
     for p in top:
         legs.append({
@@ -253,11 +640,205 @@ def _build_slip(props: List[Dict[str, Any]], size: int, slip_type: str, stake: f
         })
     return {"slip_type": slip_type, "stake": stake, "legs": legs}
 
+def _play(slips: List[Union[Dict[str, Any], Slip]], g: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Enforce max daily risk and wrap slips as a PLAY recommendation.
+    """
+    stake = g["stake_per_slip"]
+    total_risk = sum(s["stake"] for s in slips)
+    if total_risk > g["max_daily_risk"]:
+        # Trim to fit
+        slips = slips[: max(1, int(g["max_daily_risk"] // stake))]
+
+    summary = f"{len(slips)} slip(s) • Stake total ${sum(s['stake'] for s in slips):.2f} • Gates: max {g['max_slips']} slip/day"
+    return {
+        "action": "PLAY",
+        "summary": summary,
+        "reason": "Locked bankroll mode: plays only when board meets elite thresholds; otherwise SKIP.",
+        "slips": slips,
+    }
+
+# -----------------------------
+# SLIP OPTIMIZER (mode="optimal")
+# -----------------------------
+OPT_MAX_PER_GAME = 1       # legs allowed from the same game (props with a "game" key)
+OPT_NODE_BUDGET = 200_000  # search safety valve; best slip found so far is returned
+
+def _player_key(p: Dict[str, Any]) -> str:
+    return str(p.get("player", "")).strip().lower() or f"#{id(p)}"
+
+def _game_key(p: Dict[str, Any]) -> Optional[str]:
+    g = str(p.get("game", "") or "").strip().lower()
+    return g or None
+
+@perf.timed("slip_logic.optimize_slip")
+def optimize_slip(
+    elig: List[Dict[str, Any]],
+    size: int,
+    elite: bool = True,
+    exclude: Sequence[Dict[str, Any]] = (),
+    max_per_game: int = OPT_MAX_PER_GAME,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Best `size`-leg slip (highest total score) from score-sorted `elig`:
+    one leg per player, at most `max_per_game` legs per game, none of `exclude`,
+    and passing the ELITE_FLOORS gate when `elite`. Returns legs best-first or None.
+
+    Branch-and-bound over the sorted list: a branch is cut once its score plus the next
+    best remaining scores can't beat the incumbent, or once the remaining props can't
+    fill the slip under the game caps.
+    """
+    floor, top_floor = ELITE_FLOORS.get(size, (math.inf, math.inf)) if elite else (-math.inf, -math.inf)
+    skip = {id(p) for p in exclude}
+
+    # Dominance: only a player's best prop, and a game's best `max_per_game` players,
+    # can be in an optimal slip (swapping in a better one keeps every constraint, since
+    # all of a player's props are in the same game).
+    seen_players, per_game = set(), {}
+    cands = []
+    for p in elig:
+        if id(p) in skip or p.get("score", 0.0) < floor:
+            continue
+        pk = _player_key(p)
+        if pk in seen_players:
+            continue
+        seen_players.add(pk)
+        gk = _game_key(p)
+        if gk is not None:
+            if per_game.get(gk, 0) >= max_per_game:
+                continue
+            per_game[gk] = per_game.get(gk, 0) + 1
+        cands.append(p)
+
+    n = len(cands)
+    if n < size:
+        return None
+    scores = [float(p.get("score", 0.0)) for p in cands]
+    games = [_game_key(p) for p in cands]
+    prefix = [0.0]
+    for sc in scores:
+        prefix.append(prefix[-1] + sc)
+
+    # capacity[i] = most legs cands[i:] could ever supply under the game caps
+    capacity = [0] * (n + 1)
+    counts: Dict[str, int] = {}
+    for i in range(n - 1, -1, -1):
+        gk = games[i]
+        add = 1
+        if gk is not None:
+            counts[gk] = counts.get(gk, 0) + 1
+            add = 1 if counts[gk] <= max_per_game else 0
+        capacity[i] = capacity[i + 1] + add
+
+    best: Dict[str, Any] = {"total": -math.inf, "legs": None}
+    chosen: List[int] = []
+    used_games: Dict[str, int] = {}
+    nodes = [0]
+
+    def dfs(start: int, total: float):
+        need = size - len(chosen)
+        if need == 0:
+            if total > best["total"]:
+                best["total"] = total
+                best["legs"] = list(chosen)
+            return
+        for i in range(start, n - need + 1):
+            nodes[0] += 1
+            if nodes[0] > OPT_NODE_BUDGET:
+                return
+            if total + prefix[i + need] - prefix[i] <= best["total"]:
+                return  # scores only fall from here on
+            if not chosen and scores[i] < top_floor:
+                return
+            if capacity[i] < need:
+                return
+            gk = games[i]
+            if gk is not None and used_games.get(gk, 0) >= max_per_game:
+                continue
+            chosen.append(i)
+            if gk is not None:
+                used_games[gk] = used_games.get(gk, 0) + 1
+            dfs(i + 1, total + scores[i])
+            chosen.pop()
+            if gk is not None:
+                used_games[gk] -= 1
+
+    dfs(0, 0.0)
+    if best["legs"] is None:
+        return None
+    return [cands[i] for i in best["legs"]]  # every leg >= floor, the first >= top_floor
+
+def _memo(cache: Optional[Dict[Any, Any]], key: Any, fn):
+    """
+    fn() through `cache` (a dict shared by calls on the same eligible list), or directly.
+    """
+    if cache is None:
+        return fn()
+    if key not in cache:
+        cache[key] = fn()
+    return cache[key]
+
+def _recommend_optimal(elig: List[Dict[str, Any]], bankroll: float, g: Dict[str, Any], slips_already_saved: int,
+                       cache: Optional[Dict[Any, Any]] = None) -> Dict[str, Any]:
+    """
+    Same locked gate policy as the greedy path, but each slip is the best legal
+    combination from optimize_slip and the slips never share a leg.
+    """
+    def best(size: int, elite: bool = True, exclude: Any = ()) -> Optional[List[Dict[str, Any]]]:
+        return _memo(cache, ("opt", size, elite, tuple(id(p) for p in exclude)),
+                     lambda: optimize_slip(elig, size, elite=elite, exclude=exclude))
+
+    stake = g["stake_per_slip"]
+    primary = None
+    primary_size = g["allowed_sizes"][0]
+
+    if bankroll < 50:
+        if g["allow_3_if_elite"]:
+            primary = best(3)
+            if primary is not None:
+                primary_size = 3
+        if primary is None:
+            # default 2-pick, no elite requirement (same as greedy)
+            primary = best(primary_size, elite=False)
+            if primary is None:
+                return {"action": "SKIP", "reason": "Not enough eligible props with last5 data."}
+
+    if bankroll >= 50:
+        primary = best(3)
+        primary_size = 3
+        if primary is None:
+            primary = best(2)
+            primary_size = 2
+            if primary is None:
+                return {"action": "SKIP", "reason": "Board not strong enough for bankroll mode today."}
+
+    slips = [_build_slip(primary, primary_size, f"{primary_size}-PICK FLEX", stake)]
+
+    if g["max_slips"] >= 2 and slips_already_saved == 0 and bankroll >= 85:
+        second = best(3, exclude=primary)
+        if second is not None:
+            slips.append(_build_slip(second, 3, "3-PICK FLEX (2nd slip)", stake))
+        else:
+            second = best(2, exclude=primary)
+            if second is not None:
+                slips.append(_build_slip(second, 2, "2-PICK FLEX (2nd slip)", stake))
+
+    if g["allow_6"] and bankroll >= 150 and len(slips) == 1 and g["max_slips"] >= 2:
+        bonus = best(6, exclude=primary)
+        if bonus is not None:
+            slips.append(_build_slip(bonus, 6, "6-PICK FLEX (BONUS — INSANE BOARD)", stake))
+
+    return _play(slips, g)
+
+@perf.timed("slip_logic.build_recommendations_locked")
 def build_recommendations_locked(
     scored_props: List[Dict[str, Any]],
     bankroll: float,
     demons_blocked: bool,
     slips_already_saved: int,
+    eligible: Optional[List[Dict[str, Any]]] = None,
+    mode: str = "greedy",
+    elite_cache: Optional[Dict[Any, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Returns either SKIP or PLAY recommendations (one or two slips) under locked bankroll gates.
@@ -265,6 +846,13 @@ def build_recommendations_locked(
     Your choices:
     - Allow 2 slips when board is strong (B), but only when bankroll gates allow.
     - 6-pick only when bankroll >= 150 AND board is insane.
+
+    `eligible` may pass an already filtered + score-sorted list (e.g. BoardIndex.eligible())
+    to skip the _eligible pass.
+    mode="greedy" takes the top props in score order; mode="optimal" searches for the
+    best slips with one leg per player / game (see optimize_slip).
+    `elite_cache` (an empty dict, reused only with the same `eligible` list) memoizes the
+    elite checks / optimizer searches across calls; see scenario_matrix.
     """
     if bankroll <= 0:
         return {"action": "SKIP", "reason": "Bankroll is $0."}
@@ -275,12 +863,19 @@ def build_recommendations_locked(
     if slips_already_saved >= g["max_slips"]:
         return {"action": "SKIP", "reason": "Daily slip limit reached (locked)."}
 
-    elig = _eligible(scored_props, demons_blocked=demons_blocked)
+    elig = eligible if eligible is not None else _eligible(scored_props, demons_blocked=demons_blocked)
 
     # Not enough data
     if len(elig) < 2:
         return {"action": "SKIP", "reason": "Not enough eligible props with last5 data."}
 
+    if mode == "optimal":
+        return _recommend_optimal(elig, bankroll, g, slips_already_saved, elite_cache)
+
+    def elite(start: int, size: int) -> bool:
+        # _is_elite_for_size on elig[start:]
+        return _memo(elite_cache, (start, size), lambda: _is_elite_for_size(elig[start:] if start else elig, size))
+
     slips = []
     stake = g["stake_per_slip"]
 
@@ -288,22 +883,22 @@ def build_recommendations_locked(
     primary_size = g["allowed_sizes"][0]  # default preference by gate (2 or 3)
     # For bankroll < 50, default 2-pick unless elite 3 exists
     if bankroll < 50 and g["allow_3_if_elite"]:
-        if _is_elite_for_size(elig, 3):
+        if elite(0, 3):
             primary_size = 3
 
     # For 50–84, prefer 3, but if not elite enough, fallback to 2 or skip
     if 50 <= bankroll < 85:
-        if not _is_elite_for_size(elig, 3):
+        if not elite(0, 3):
             # allow 2 if elite, else skip
-            if _is_elite_for_size(elig, 2):
+            if elite(0, 2):
                 primary_size = 2
             else:
                 return {"action": "SKIP", "reason": "Board not strong enough for bankroll mode today."}
 
     # For >=85, prefer 3; if not strong, fallback to 2 or skip
     if bankroll >= 85:
-        if not _is_elite_for_size(elig, 3):
-            if _is_elite_for_size(elig, 2):
+        if not elite(0, 3):
+            if elite(0, 2):
                 primary_size = 2
             else:
                 return {"action": "SKIP", "reason": "Board not strong enough for bankroll mode today."}
@@ -318,30 +913,81 @@ def build_recommendations_locked(
         # second slip should be at least 2-pick elite or 3-pick strong depending on bankroll
         if bankroll >= 85:
             # Prefer second 3-pick if remaining is elite
-            if _is_elite_for_size(remaining, 3):
+            if elite(primary_size, 3):
                 slips.append(_build_slip(remaining, 3, "3-PICK FLEX (2nd slip)", stake))
             # else maybe second 2-pick if elite
-            elif _is_elite_for_size(remaining, 2):
+            elif elite(primary_size, 2):
                 slips.append(_build_slip(remaining, 2, "2-PICK FLEX (2nd slip)", stake))
 
     # Bonus 6-pick rule: only bankroll >= 150 AND insane board
     # AND it counts as slip #2, so only show it if we have capacity and first slip exists.
     if g["allow_6"] and bankroll >= 150 and len(slips) == 1 and g["max_slips"] >= 2:
         # Use the top 6 overall only if insane; do NOT force it.
-        if _is_elite_for_size(elig, 6):
+        if elite(0, 6):
             # Offer 6-pick as second slip (still $5 stake)
             slips.append(_build_slip(elig, 6, "6-PICK FLEX (BONUS — INSANE BOARD)", stake))
 
-    # Enforce max daily risk
-    total_risk = sum(s["stake"] for s in slips)
-    if total_risk > g["max_daily_risk"]:
-        # Trim to fit
-        slips = slips[: max(1, int(g["max_daily_risk"] // stake))]
+    return _play(slips, g)
 
-    summary = f"{len(slips)} slip(s) • Stake total ${sum(s['stake'] for s in slips):.2f} • Gates: max {g['max_slips']} slip/day"
-    return {
-        "action": "PLAY",
-        "summary": summary,
-        "reason": "Locked bankroll mode: plays only when board meets elite thresholds; otherwise SKIP.",
-        "slips": slips,
-    }
\ No newline at end of file
+# -----------------------------
+# SCENARIO MATRIX
+# -----------------------------
+SCENARIO_BANKROLLS = [20.0, 35.0, 50.0, 65.0, 85.0, 110.0, 150.0, 200.0]
+
+# bankroll thresholds where _gates / build_recommendations_locked change behaviour
+GATE_EDGES = (50.0, 85.0, 150.0)
+
+def gate_key(bankroll: float) -> int:
+    """
+    Which locked gate a bankroll falls in (-1 for $0); equal keys get equal recommendations.
+    """
+    if bankroll <= 0:
+        return -1
+    return sum(bankroll >= edge for edge in GATE_EDGES)
+
+@perf.timed("slip_logic.scenario_matrix", rows=len)
+def scenario_matrix(
+    scored_props: List[Dict[str, Any]],
+    bankrolls: Sequence[float] = SCENARIO_BANKROLLS,
+    demons: Sequence[bool] = (True, False),
+    saved: Sequence[int] = (0, 1),
+    mode: str = "greedy",
+) -> List[Dict[str, Any]]:
+    """
+    build_recommendations_locked over every bankroll x demons_blocked x slips_already_saved
+    in one pass. The eligible set is sorted once (demons allowed; the demons-blocked set is
+    the same order minus demons, as the sort is stable), the elite checks / optimizer
+    searches are shared across the grid, and bankrolls in the same gate reuse one result,
+    so each row's "rec" equals the per-call recommendation.
+    """
+    with_demons = _eligible(scored_props, demons_blocked=False)
+    rows = []
+    for demons_blocked in demons:
+        if demons_blocked:
+            elig = [p for p in with_demons if not bool(p.get("is_demon", False))]
+        else:
+            elig = with_demons
+        cache: Dict[Any, Any] = {}
+        by_gate: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for n_saved in saved:
+            for bankroll in bankrolls:
+                key = (gate_key(bankroll), n_saved)
+                if key not in by_gate:
+                    by_gate[key] = build_recommendations_locked(
+                        scored_props, bankroll, demons_blocked, n_saved,
+                        eligible=elig, mode=mode, elite_cache=cache,
+                    )
+                rec = by_gate[key]
+                slips = rec.get("slips", [])
+                rows.append({
+                    "bankroll": float(bankroll),
+                    "demons_blocked": bool(demons_blocked),
+                    "slips_saved": int(n_saved),
+                    "gate": key[0],
+                    "action": rec["action"],
+                    "slips": " + ".join(s["slip_type"].split(" ")[0] for s in slips),
+                    "stake": round(sum(float(s["stake"]) for s in slips), 2),
+                    "reason": rec.get("reason", ""),
+                    "rec": rec,
+                })
+    return rows
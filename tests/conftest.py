@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# flat module layout: make the repo root importable from tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(params=["csv", "sqlite"])
+def backend(request, tmp_path):
+    """
+    Tracking pointed at tmp_path on each backend, seeded with slip S1 (2-PICK POWER, $5)
+    and its legs S1-1, S1-2.
+    """
+    import tracking
+
+    with tracking.use_tracking_dir(str(tmp_path), request.param):
+        tracking.save_slip({"slip_id": "S1", "created_at": "2026-01-01T10:00:00", "bankroll": 100, "aggression": 1,
+                            "stake": 5.0, "slip_type": "2-PICK POWER", "action": "PLAY", "reason": "test"})
+        tracking.save_props([{"slip_id": "S1", "prop_id": f"S1-{i}", "created_at": "2026-01-01T10:00:00",
+                              "player": f"P{i}", "market": "Points", "side": "MORE", "line": 20.5, "score": 80}
+                             for i in (1, 2)])
+        yield request.param
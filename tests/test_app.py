@@ -0,0 +1,60 @@
+"""
+app.py smoke test: the board, scoring and tracking fragments render and act together
+(streamlit.testing AppTest, tracking pointed at tmp_path).
+"""
+import os
+
+import pytest
+
+import perf
+import tracking
+from models import Prop
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)  # game log, calibration artifact, ... in tmp_path too
+    perf.clear()
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    assert not at.exception, at.exception
+    yield at
+    perf.cancel_run()
+    perf.clear()
+
+def _board(n: int = 8) -> list:
+    return [Prop.from_dict({"prop_id": f"p{i}", "sport": "NBA", "player": f"P{i}", "market": "Points",
+                            "line": 10.5, "last5": [12, 13, 14, 15, 16]}) for i in range(n)]
+
+def test_add_prop_form(app):
+    app.text_input[0].set_value("Alperen Sengun")
+    line = [n for n in app.number_input if n.label == "Line"][0]
+    line.set_value(18.5)
+    app.text_input[1].set_value("20 21 19 22 25")
+    [b for b in app.button if "Add Prop" in b.label][0].click()
+    app.run()
+    assert not app.exception, app.exception
+    assert [(p.player, p.line, p.last5) for p in app.session_state.board] == [("Alperen Sengun", 18.5, (20.0, 21.0, 19.0, 22.0, 25.0))]
+
+def test_bulk_import_scores_the_new_board(app):
+    app.text_area[0].set_value("player,market,line,last5\nA,Points,10.5,12 13 14 15 16\nB,Points,abc,\n")
+    [b for b in app.button if "Import" in b.label][0].click()
+    app.run()
+    assert not app.exception, app.exception
+    assert [p.player for p in app.session_state.board] == ["A"]
+    assert any("1 rows skipped" in w.value for w in app.warning)
+
+def test_save_recommended_slips_reaches_tracking(app):
+    app.session_state.board = _board()
+    app.sidebar.number_input[0].set_value(160.0)
+    [c for c in app.sidebar.checkbox if "Performance panel" in c.label][0].set_value(True)
+    app.toggle(key="show_tracking").set_value(True)
+    app.run()
+    assert not app.exception, app.exception
+    [b for b in app.button if "Save recommended" in b.label][0].click()
+    app.run()
+    assert not app.exception, app.exception
+    saved = set(tracking.load_slips()["slip_id"]) - {"S1"}  # S1 is the backend fixture's seed
+    assert len(saved) == 2 and saved <= set(tracking.load_props()["slip_id"])
+    assert any(r["label"] == "rerun" for r in perf.history())
@@ -0,0 +1,112 @@
+"""
+archive.py: export / load roundtrip, compaction and predicate pushdown, on .npz parts
+and (when pyarrow is installed) Parquet parts.
+"""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import archive
+import tracking
+
+FORMATS = ["npz", pytest.param("parquet", marks=pytest.mark.skipif(archive.pq is None, reason="pyarrow not installed"))]
+
+def _history():
+    slips, props = [], []
+    for i, (day, markets) in enumerate([
+        ("2026-01-05", ["Points", "Rebounds"]), ("2026-01-20", ["Points", "Assists"]),
+        ("2026-02-03", ["Rebounds", "Rebounds"]), ("2026-03-09", ["Points", "PRA"]),
+    ]):
+        sid = f"S{i}"
+        legs = [{"sport": "NBA", "grade": "STRONG", "last5": [10, 12, 9, 14, 11]} for _ in markets]
+        slips.append({"slip_id": sid, "created_at": f"{day}T1{i}:00:00", "bankroll": 100, "aggression": 1,
+                      "stake": 5.0, "slip_type": "2-PICK POWER", "action": "PLAY", "reason": "test",
+                      "result": "WIN" if i % 2 else "", "payout": 15.0 if i % 2 else "", "notes": "",
+                      "legs_json": json.dumps(legs)})
+        for j, market in enumerate(markets, start=1):
+            props.append({"slip_id": sid, "prop_id": f"{sid}-{j}", "created_at": f"{day}T1{i}:00:00",
+                          "player": f"P{i}{j}", "market": market, "side": "MORE", "line": 10.5 + j,
+                          "score": 70.0 + i, "result": "WIN" if j == 1 else ""})
+    return pd.DataFrame(slips, columns=tracking.SLIP_COLS), pd.DataFrame(props, columns=tracking.PROP_COLS)
+
+def _plain(df: pd.DataFrame) -> list:
+    return json.loads(df.astype(object).where(df.notna(), None).to_json(orient="records", date_format="iso"))
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "archive")
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_export_load_roundtrip(root, fmt):
+    slips, props = _history()
+    assert archive.export(slips, props, root, fmt) == {"slips": 4, "legs": 8}
+    want = archive.normalize(slips, props)
+    for table in archive.TABLES:
+        got = archive.load(table, root=root)
+        assert list(got.columns) == list(archive.SCHEMAS[table])
+        assert _plain(got) == _plain(want[table].sort_values("created_at", kind="stable"))
+    legs = archive.load("legs", root=root, columns=["player", "last5_3"])
+    assert list(legs.columns) == ["player", "last5_3"] and legs["last5_3"].tolist() == [9.0] * 8
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_export_twice_keeps_one_part_per_month(root, fmt):
+    slips, props = _history()
+    archive.export(slips, props, root, fmt)
+    first = _plain(archive.load("legs", root=root))
+    archive.export(slips, props, root, fmt)
+    assert {(r["table"], r["month"], r["parts"]) for r in archive.stats(root)} == {
+        (t, m, 1) for t in archive.TABLES for m in ["2026-01", "2026-02", "2026-03"]}
+    assert _plain(archive.load("legs", root=root)) == first
+
+def test_failed_export_keeps_the_old_parts(root, monkeypatch):
+    slips, props = _history()
+    archive.export(slips, props, root, "npz")
+    before = _plain(archive.load("legs", root=root))
+
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(archive, "_write_part", fail)
+    with pytest.raises(OSError):
+        archive.export(slips, props, root, "npz")
+    assert _plain(archive.load("legs", root=root)) == before
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_compact_merges_closed_months_only(root, fmt):
+    slips, props = _history()
+    legs = archive.normalize(slips, props)["legs"]
+    for half in (legs.iloc[::2], legs.iloc[1::2]):
+        archive.write("legs", half, root, fmt)
+    before = _plain(archive.load("legs", root=root).sort_values(["created_at", "prop_id"]))
+
+    assert archive.compact("legs", before="2026-03", root=root, fmt=fmt) == {"partitions": 2, "parts_merged": 4}
+    parts = {r["month"]: r["parts"] for r in archive.stats(root) if r["table"] == "legs"}
+    assert parts == {"2026-01": 1, "2026-02": 1, "2026-03": 2}
+    after = archive.load("legs", root=root)
+    assert _plain(after.sort_values(["created_at", "prop_id"])) == before
+    assert archive.compact("legs", before="2026-03", root=root, fmt=fmt) == {"partitions": 0, "parts_merged": 0}
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_market_and_date_pushdown(root, fmt):
+    slips, props = _history()
+    archive.export(slips, props, root, fmt)
+    got = archive.load("legs", markets=["Points", "PRA"], root=root, columns=["prop_id", "market"])
+    assert got["prop_id"].tolist() == ["S0-1", "S1-1", "S3-1", "S3-2"]
+    assert set(got["market"]) == {"Points", "PRA"}
+
+    got = archive.load("legs", since="2026-01-10", until="2026-03-01", root=root, columns=["prop_id"])
+    assert got["prop_id"].tolist() == ["S1-1", "S1-2", "S2-1", "S2-2"]
+    assert [os.path.basename(d) for d in archive._partitions("legs", pd.Timestamp("2026-02-01"), pd.Timestamp("2026-03-01"), root)] == ["month=2026-02"]
+    assert archive.load("legs", markets=["Steals"], root=root, columns=["prop_id"]).empty
+
+def test_npz_part_without_the_market_is_skipped_unread(root):
+    slips, props = _history()
+    archive.export(slips, props, root, "npz")
+    [feb] = archive._parts(os.path.join(root, "legs", "month=2026-02"))  # Rebounds only
+    assert archive._read_part(feb, "legs", None, None, None, ["Points"]) is None
+    assert len(archive._read_part(feb, "legs", None, None, None, ["Rebounds"])) == 2
+
+def test_markets_filter_is_legs_only(root):
+    with pytest.raises(ValueError):
+        archive.load("slips", markets=["Points"], root=root)
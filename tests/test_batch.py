@@ -0,0 +1,31 @@
+"""
+batch.py record handling.
+"""
+import pytest
+
+import batch
+
+DEFAULTS = {"bankroll": 20.0, "demons_blocked": True, "slips_already_saved": 0, "mode": "greedy"}
+DEMON = {"prop_id": "d", "player": "D", "market": "Points", "line": 10.5, "last5": "12 13 14 15 16", "is_demon": True}
+
+@pytest.mark.parametrize("value, want", [
+    (True, True), (False, False), (1, True), (0, False),
+    ("true", True), ("FALSE", False), (" yes ", True), ("No", False), ("1", True), ("0", False),
+])
+def test_demons_blocked_flag_values(value, want):
+    out = batch.process_record("t", {"board": [DEMON], "demons_blocked": value}, DEFAULTS)
+    assert out["demons_blocked"] is want
+
+@pytest.mark.parametrize("value", ["maybe", "", None, 2, "t", [True]])
+def test_unknown_flag_values_are_errors(value):
+    out = batch.process_record("t", {"board": [DEMON], "demons_blocked": value}, DEFAULTS)
+    assert "demons_blocked" in out["error"]
+
+@pytest.mark.parametrize("value, want", [("yes", True), ("0", False), (1, True), (None, False)])
+def test_prop_flags_use_the_same_values(value, want):
+    out = batch.process_record("t", {"board": [{**DEMON, "is_demon": value}]}, {**DEFAULTS, "include_scored": True})
+    assert out["scored"][0]["is_demon"] is want
+
+def test_unknown_prop_flag_is_an_error():
+    out = batch.process_record("t", {"board": [{**DEMON, "is_goblin": "x"}]}, DEFAULTS)
+    assert "is_goblin" in out["error"]
@@ -0,0 +1,46 @@
+"""
+board_import.py row numbering and flag parsing.
+"""
+import pytest
+
+from board_import import import_board
+
+HEADER = "player,market,line,last5,is_goblin\n"
+
+def _errors(text: str, fmt: str = "csv") -> dict:
+    return {e["row"]: e["error"] for e in import_board(text, fmt=fmt)[1]}
+
+def test_csv_rows_count_rejected_lines():
+    props, errors = import_board(HEADER + "A,Points,10.5,1 2 3 4 5,\nB,Points,1,2,3,4,5,6\nC,Points,abc,,\n\nD,Points,4.5,,\n", fmt="csv")
+    assert [p.player for p in props] == ["A", "D"]
+    assert [e["row"] for e in errors] == [2, 3]
+    assert errors[0]["error"].startswith("Too many fields")
+    assert errors[1]["error"] == "Line must be a number."
+
+def test_csv_rows_across_chunks(monkeypatch):
+    import board_import
+
+    monkeypatch.setattr(board_import, "CHUNK_ROWS", 2)
+    rows = ["A,Points,1.5,,", "B,Points,1,2,3,4,5,6", "C,Points,x,,", "D,Points,2.5,,", "E,Points,,,", "F,Points,3.5,,"]
+    props, errors = import_board(HEADER + "\n".join(rows), fmt="csv")
+    assert [p.player for p in props] == ["A", "D", "F"]
+    assert [e["row"] for e in errors] == [2, 3, 5]
+
+def test_short_csv_rows_are_padded():
+    props, errors = import_board("player,line,is_demon\nA,10.5\n", fmt="csv")
+    assert errors == [] and props[0].line == 10.5 and props[0].is_demon is False
+
+@pytest.mark.parametrize("value, want", [("yes", True), ("TRUE", True), ("1", True), ("no", False), ("0", False), ("", False)])
+def test_csv_flags_match_batch(value, want):
+    props, errors = import_board(HEADER + f"A,Points,10.5,,{value}\n", fmt="csv")
+    assert errors == [] and props[0].is_goblin is want
+
+@pytest.mark.parametrize("value", ["t", "y", "x", "maybe"])
+def test_unknown_csv_flags_are_row_errors(value):
+    assert _errors(HEADER + f"A,Points,10.5,,{value}\n") == {1: "is_goblin must be true/false, 1/0 or yes/no."}
+
+def test_jsonl_flags_match_batch():
+    text = '{"player": "A", "line": 1.5, "is_demon": 1}\n{"player": "B", "line": 1.5, "is_demon": "x"}\n'
+    props, errors = import_board(text, fmt="jsonl")
+    assert [(p.player, p.is_demon) for p in props] == [("A", True)]
+    assert [e["row"] for e in errors] == [2]
@@ -0,0 +1,66 @@
+"""
+BoardIndex's incremental add / edit / remove against a full rescore of the board.
+"""
+import random
+
+import pytest
+
+from board import BoardIndex
+from models import Prop
+from slip_logic import _eligible, clear_score_cache, score_board
+
+# a few last5 shapes so many props tie on score (ties must keep board order)
+SHAPES = [[12, 14, 15, 13, 16], [8, 9, 12, 7, 10], [20, 22, 19, 25, 21], [], [5, 5, 5, 5, 5]]
+
+def _prop(rng: random.Random, pid: str) -> Prop:
+    return Prop.from_dict({
+        "prop_id": pid, "player": f"P{rng.randint(0, 9)}", "market": rng.choice(["Points", "Rebounds", "Steals"]),
+        "line": rng.choice([9.5, 11.5, 13.5, 19.5]), "last5": rng.choice(SHAPES),
+        "is_goblin": rng.random() < 0.2, "is_demon": rng.random() < 0.3,
+    })
+
+def _expected(board: list, demons_blocked: bool):
+    rows = score_board(board, demons_blocked=demons_blocked, with_why=False).to_dict("records")
+    ranked = sorted(rows, key=lambda r: r["score"], reverse=True)  # stable: ties in board order
+    return ranked, _eligible(rows, demons_blocked)
+
+def _ids_scores(rows: list) -> list:
+    return [(r["prop_id"], r["score"]) for r in rows]
+
+@pytest.mark.parametrize("seed", range(8))
+def test_incremental_index_matches_full_rescore(seed):
+    clear_score_cache()
+    rng = random.Random(seed)
+    index, board, next_id = BoardIndex(), [], 0
+    demons_blocked = True
+    for _ in range(40):
+        op = rng.random()
+        if op < 0.4 or not board:
+            for _ in range(rng.randint(1, 4)):
+                board.append(_prop(rng, f"p{next_id}"))
+                next_id += 1
+        elif op < 0.7:
+            i = rng.randrange(len(board))
+            board[i] = _prop(rng, board[i].prop_id)  # edit in place
+        elif op < 0.9:
+            del board[rng.randrange(len(board))]
+        else:
+            demons_blocked = not demons_blocked
+        index.sync(board, demons_blocked=demons_blocked)
+
+        ranked, elig = _expected(board, demons_blocked)
+        assert _ids_scores(index.ranked()) == _ids_scores(ranked)
+        assert _ids_scores(index.eligible()) == _ids_scores(elig)
+        assert _ids_scores(index.eligible(3)) == _ids_scores(elig[:3])
+
+def test_unchanged_board_is_not_rescored():
+    rng = random.Random(0)
+    board = [_prop(rng, f"p{i}") for i in range(10)]
+    index = BoardIndex()
+    index.sync(board, demons_blocked=True)
+    assert index.rescored == 10
+    index.sync(list(board), demons_blocked=True)
+    assert index.rescored == 0
+    board[3] = _prop(rng, "p3")
+    index.sync(board, demons_blocked=True)
+    assert index.rescored == 1
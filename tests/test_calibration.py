@@ -0,0 +1,58 @@
+"""
+calibration.py artifact loading and P(win) inference.
+"""
+import json
+
+import numpy as np
+import pytest
+
+import calibration
+from slip_logic import score_board, score_prop
+
+ARTIFACTS = {
+    "logistic": {"method": "logistic", "features": calibration.FEATURES,
+                 "coef": [2.0, 40.0, 0.3, -1.0, -0.2, 0.1], "intercept": -2.0},
+    "isotonic": {"method": "isotonic", "features": calibration.FEATURES,
+                 "knots": [60.0, 70.015, 80.0], "values": [0.4, 0.55, 0.7]},
+}
+
+@pytest.fixture
+def artifact_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "calibration.json")
+    monkeypatch.setattr(calibration, "ARTIFACT_PATH", path)
+    yield path
+    calibration.forget(path)
+
+@pytest.mark.parametrize("method", list(ARTIFACTS))
+def test_score_board_p_win_matches_predict_props(artifact_path, method):
+    calibration.save(ARTIFACTS[method], artifact_path)
+    # averages that land on a rounding edge (x.xx5), so the avg fed to the cushion matters
+    board = [
+        {"player": f"P{i}", "market": m, "line": line, "last5": last5, "is_goblin": i % 3 == 0}
+        for i, (m, line, last5) in enumerate([
+            ("Points", 20.5, [20.1, 20.2, 20.3, 20.2, 20.225]),
+            ("Rebounds", 7.5, [7.5, 7.51, 7.52, 7.53, 7.515]),
+            ("3PM", 2.5, [2.0, 3.0, 2.0, 3.0, 2.525]),
+            ("Assists", 4.5, [4.49, 4.5, 4.51, 4.5, 4.475]),
+        ])
+    ]
+    df = score_board(board, p_win=True)
+    want = calibration.predict_props([score_prop(p) for p in board])
+    np.testing.assert_array_equal(df["p_win"].to_numpy(), want)
+
+def test_missing_artifact_is_not_reread(artifact_path, monkeypatch):
+    reads = []
+    real_load = json.load
+    monkeypatch.setattr(calibration.json, "load", lambda f: reads.append(f.name) or real_load(f))
+
+    assert calibration.load() is None
+    with open(artifact_path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert calibration.load() is None and calibration.load() is None
+    assert len(reads) == 1  # the bad file once; the absent file is never opened twice
+
+    with open(artifact_path, "w", encoding="utf-8") as f:
+        json.dump(ARTIFACTS["logistic"], f)
+    assert calibration.load()["method"] == "logistic"
+    assert calibration.load()["method"] == "logistic"
+    assert len(reads) == 2
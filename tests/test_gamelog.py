@@ -0,0 +1,58 @@
+"""
+gamelog.py lookups: one connection per call, none left open per thread.
+"""
+import os
+import threading
+
+import pytest
+
+import gamelog
+from models import Prop
+
+def _open_handles(path: str) -> list:
+    out = []
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            target = os.readlink(f"/proc/self/fd/{fd}")
+        except OSError:
+            continue  # the listing's own fd, already closed
+        if target.startswith(path):
+            out.append(target)
+    return out
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "gamelog.db")
+    csv = tmp_path / "log.csv"
+    csv.write_text("player,date,PTS,REB\n" + "".join(f"Jokić,2026-01-{d:02d},{20 + d},{10 + d % 3}\n" for d in range(1, 9)))
+    gamelog.ingest([str(csv)], path=path)
+    yield path
+    gamelog.reset(path)
+
+def test_lookup_and_fill(db):
+    hit = gamelog.lookup("jokic", "pts", line=24.5, path=db)
+    assert hit["last5"] == [24.0, 25.0, 26.0, 27.0, 28.0] and (hit["hits_more_n"], hit["hits_less_n"]) == (4, 4)
+    assert gamelog.lookup("nobody", "Points", path=db) is None
+    props = [Prop.from_dict({"prop_id": "a", "player": "Jokic", "market": "Points", "line": 20.5}),
+             Prop.from_dict({"prop_id": "b", "player": "X", "market": "Points", "line": 20.5, "last5": [1, 2, 3, 4, 5]})]
+    out, filled = gamelog.fill_last5(props, path=db)
+    assert filled == 1 and out[0].last5 == (24.0, 25.0, 26.0, 27.0, 28.0) and out[1] is props[1]
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_threads_leave_no_connections_open(db):
+    hits = []
+    threads = [threading.Thread(target=lambda: hits.append(gamelog.lookup("Jokic", "Rebounds", path=db)))
+               for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    gamelog.fill_last5([Prop.from_dict({"prop_id": "a", "player": "Jokic", "market": "Points", "line": 1.5})], path=db)
+    assert len(hits) == 20 and all(h["games"] == 8 for h in hits)
+    assert _open_handles(db) == []
+
+def test_missing_db_is_not_created(tmp_path):
+    path = str(tmp_path / "none.db")
+    assert gamelog.lookup("Jokic", "Points", path=path) is None
+    assert gamelog.fill_last5([Prop.from_dict({"prop_id": "a", "player": "Jokic", "line": 1.5})], path=path)[1] == 0
+    assert not os.path.exists(path)
@@ -0,0 +1,70 @@
+"""
+tracking's load cache: writes from outside this process (another worker, a restore
+from backup) invalidate it through the (mtime, size) stamp; our own writes through
+_invalidate.
+"""
+import os
+import sqlite3
+
+import pytest
+
+import tracking
+
+EXTRA = ("S9", "2026-01-05T10:00:00", 50, 1, 1.0, "2-PICK POWER", "PLAY", "external", "", "", "", "")
+
+def _loads() -> list:
+    return tracking.load_slips()["slip_id"].tolist()
+
+def _hits() -> int:
+    return tracking.load_cache_stats()["hits"]
+
+def _warm() -> list:
+    first = _loads()
+    hits = _hits()
+    assert _loads() == first and _hits() == hits + 1
+    return first
+
+def test_external_append(backend):
+    assert _warm() == ["S1"]
+    if backend == "csv":
+        with open(tracking._journal_path(tracking.SLIPS_PATH), "a", encoding="utf-8") as f:
+            f.write(",".join(str(v) for v in EXTRA) + "\n")
+    else:
+        with sqlite3.connect(tracking.DB_PATH) as con:
+            con.execute(f"INSERT INTO slips ({','.join(tracking.SLIP_COLS)}) VALUES ({','.join('?' * len(EXTRA))})", EXTRA)
+        con.close()
+    assert _loads() == ["S1", "S9"]
+
+@pytest.mark.parametrize("backend", ["csv"], indirect=True)
+def test_csv_same_size_rewrite_with_new_mtime(backend):
+    tracking.compact_tracking()
+    path = tracking.SLIPS_PATH
+    assert _warm() == ["S1"]
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    st = os.stat(path)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text.replace("S1,", "S7,"))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert os.path.getsize(path) == st.st_size
+    assert _loads() == ["S7"]
+
+@pytest.mark.parametrize("backend", ["sqlite"], indirect=True)
+def test_sqlite_write_seen_through_the_wal(backend):
+    assert _warm() == ["S1"]
+    con = sqlite3.connect(tracking.DB_PATH)
+    try:
+        con.execute("UPDATE slips SET result = 'WIN' WHERE slip_id = 'S1'")
+        con.commit()
+        assert os.path.getsize(tracking.DB_PATH + "-wal") > 0  # still open: the change lives in the WAL
+        assert tracking.load_slips()["result"].tolist() == ["WIN"]
+    finally:
+        con.close()
+
+def test_own_writes_invalidate_even_with_an_unchanged_stamp(backend, monkeypatch):
+    monkeypatch.setattr(tracking, "_stamp", lambda paths: ("frozen",))
+    assert _warm() == ["S1"]
+    tracking.update_slip_result("S1", "WIN", "11.25", "")
+    assert tracking.load_slips()["result"].tolist() == ["WIN"]
+    tracking.save_slip({"slip_id": "S2", "created_at": "2026-01-02T10:00:00", "stake": 1.0, "slip_type": "2-PICK POWER"})
+    assert _loads() == ["S1", "S2"]
@@ -0,0 +1,34 @@
+"""
+markets.MarketRegistry: keyword fallback and define() after markets were resolved.
+"""
+import pytest
+
+from markets import MarketRegistry
+
+def test_keyword_fallback_records_the_rule():
+    reg = MarketRegistry()
+    assert (reg.resolve("Goals + Passes").variance, reg.resolve("Goals + Passes").rule) == ("mixed", "keyword:goals,passes")
+    assert reg.resolve("Points").rule == "table"
+    assert reg.resolve("Hits Allowed").variance == "standard"
+
+def test_define_updates_resolved_markets_in_place():
+    reg = MarketRegistry()
+    codes = reg.codes(["Blocks", "BLOCKS ", "Points", "Blocks"])
+    assert reg.resolve("Blocks").variance == "high_variance"
+    n = len(reg.audit())
+
+    reg.define("blocks", "volume", sport="NBA")
+    assert len(reg.audit()) == n  # no new codes; the old ones now mean the new class
+    for market in ["Blocks", "BLOCKS "]:
+        mc = reg.resolve(market)
+        assert (mc.variance, mc.adjustment, mc.sport, mc.rule) == ("volume", 2.0, "NBA", "config")
+    penalty, bonus = reg.flags(codes)
+    assert penalty.tolist() == [False] * 4 and bonus.tolist() == [True, True, False, True]
+    assert (reg.codes(["Blocks", "Points"]) == codes[[0, 2]]).all()
+
+def test_define_before_resolve_and_unknown_class():
+    reg = MarketRegistry()
+    reg.define("Hits Allowed", "high_variance")
+    assert reg.resolve("hits allowed").penalty
+    with pytest.raises(ValueError):
+        reg.define("Points", "wild")
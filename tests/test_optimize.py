@@ -0,0 +1,63 @@
+"""
+optimize_slip's branch-and-bound against exhaustive search.
+"""
+import itertools
+import random
+
+import pytest
+
+import slip_logic
+from slip_logic import ELITE_FLOORS, _is_elite_for_size, optimize_slip
+
+def _board(rng: random.Random, n: int) -> list:
+    # some players have two props; each player is in one game ("" = no game, uncapped)
+    game_of = {f"P{i}": rng.choice(["G1", "G2", "G3", ""]) for i in range(max(2, n - 3))}
+    elig = []
+    for _ in range(n):
+        player = rng.choice(list(game_of))
+        score = float(rng.choice([rng.randint(60, 95), rng.choice([70, 74, 78, 80, 82])]))
+        elig.append({"player": player, "game": game_of[player], "score": score})
+    elig.sort(key=lambda p: p["score"], reverse=True)
+    return elig
+
+def _legal(legs: list, size: int, elite: bool, exclude: list, max_per_game: int) -> bool:
+    players = [p["player"].lower() for p in legs]
+    games = [p["game"] for p in legs if p["game"]]
+    return (len(legs) == size and len(set(players)) == size
+            and all(games.count(g) <= max_per_game for g in games)
+            and not any(p is q for p in legs for q in exclude)
+            and (not elite or _is_elite_for_size(legs, size)))
+
+def _exhaustive(elig: list, size: int, elite: bool, exclude: list, max_per_game: int):
+    totals = [sum(p["score"] for p in combo) for combo in itertools.combinations(elig, size)
+              if _legal(list(combo), size, elite, exclude, max_per_game)]
+    return max(totals) if totals else None
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_exhaustive_search(seed):
+    rng = random.Random(seed)
+    elig = _board(rng, rng.randint(4, 11))
+    for size in ELITE_FLOORS:
+        for elite in (True, False):
+            exclude = rng.sample(elig, rng.randint(0, 2))
+            cap = rng.choice([1, 2])
+            legs = optimize_slip(elig, size, elite=elite, exclude=exclude, max_per_game=cap)
+            want = _exhaustive(elig, size, elite, exclude, cap)
+            if want is None:
+                assert legs is None
+            else:
+                assert legs is not None and _legal(legs, size, elite, exclude, cap)
+                assert sum(p["score"] for p in legs) == want
+
+def test_exhausted_budget_returns_best_found(monkeypatch):
+    rng = random.Random(1)
+    elig = _board(rng, 11)
+    full = optimize_slip(elig, 3, elite=False, max_per_game=1)
+
+    monkeypatch.setattr(slip_logic, "OPT_NODE_BUDGET", 0)
+    assert optimize_slip(elig, 3, elite=False, max_per_game=1) is None  # nothing found yet
+
+    monkeypatch.setattr(slip_logic, "OPT_NODE_BUDGET", 3)  # just enough for the first leaf
+    first = optimize_slip(elig, 3, elite=False, max_per_game=1)
+    assert first is not None and _legal(first, 3, False, [], 1)
+    assert sum(p["score"] for p in first) <= sum(p["score"] for p in full)
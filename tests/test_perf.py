@@ -0,0 +1,59 @@
+"""
+perf.py: timed() / stage() are no-ops without a run and record stages with one.
+"""
+import threading
+
+import pytest
+
+import perf
+
+@pytest.fixture(autouse=True)
+def clean():
+    perf.cancel_run()
+    perf.clear()
+    yield
+    perf.cancel_run()
+    perf.clear()
+
+@perf.timed("test.double", rows=len)
+def _double(items):
+    return items + items
+
+def test_disabled_is_a_no_op():
+    assert not perf.active()
+    assert perf.stage("test.block") is perf.stage("test.other")  # one shared no-op object
+    assert _double([1, 2]) == [1, 2, 1, 2]
+    with perf.stage("test.block", rows=3) as s:
+        s.rows = 5
+    perf.count("test.count", 7)
+    assert perf.end_run() is None and perf.history() == []
+
+def test_enabled_records_stages():
+    perf.begin_run("unit")
+    assert perf.active()
+    _double([1, 2])
+    _double([3])
+    with perf.stage("test.block") as s:
+        s.rows = 5
+    perf.count("test.block", 2)
+    run = perf.end_run()
+    assert not perf.active()
+    assert run["label"] == "unit" and run["total_ms"] >= 0
+    assert {k: (v["calls"], v["rows"]) for k, v in run["stages"].items()} == {"test.double": (2, 6), "test.block": (1, 7)}
+    assert perf.history() == [run]
+    assert {r["stage"] for r in perf.summary()} == {"(total)", "test.double", "test.block"}
+
+def test_runs_are_per_thread():
+    perf.begin_run("main")
+    seen = []
+    t = threading.Thread(target=lambda: seen.append((perf.active(), _double([1]))))
+    t.start()
+    t.join()
+    assert seen == [(False, [1, 1])]
+    assert "test.double" not in perf.end_run()["stages"]
+
+def test_cancelled_run_is_not_logged():
+    perf.begin_run()
+    _double([1])
+    perf.cancel_run()
+    assert perf.end_run() is None and perf.history() == []
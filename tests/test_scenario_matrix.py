@@ -0,0 +1,84 @@
+"""
+scenario_matrix rows against build_recommendations_locked, one call per row; and
+build_recommendations_locked on dict vs ScoredProp input.
+"""
+import copy
+import random
+
+import pytest
+
+from bench import synthetic_board
+from models import Prop, Slip
+from slip_logic import (build_recommendations_locked, gate_key, normalize_last5, scenario_matrix, score_board,
+                        score_prop, score_prop_cached)
+
+# several bankrolls per gate, and every gate edge from both sides
+BANKROLLS = [0.0, 5.0, 20.0, 49.99, 50.0, 60.0, 84.99, 85.0, 120.0, 149.99, 150.0, 400.0, 1000.0]
+
+def _strong_board(seed: int) -> list:
+    # lines well under the recent form, so the gates open and slips get built
+    rng = random.Random(seed)
+    board = []
+    for i in range(30):
+        base = rng.uniform(5, 30)
+        board.append({
+            "prop_id": f"s{i}", "player": f"Q{i % 12}", "market": rng.choice(["Points", "Rebounds", "PRA"]),
+            "line": round(base - rng.uniform(2, 9)) + 0.5, "game": f"G{i % 12 % 5}",
+            "last5": [round(base + rng.uniform(-2, 4), 1) for _ in range(5)],
+            "is_goblin": rng.random() < 0.1, "is_demon": rng.random() < 0.3,
+        })
+    return board
+
+def _scored(board: list) -> list:
+    board = [{**p, "last5": normalize_last5(p["last5_str"])} if "last5_str" in p else p for p in board]
+    return score_board(board, with_why=False).to_dict("records")
+
+BOARDS = {
+    "strong-1": lambda: _scored(_strong_board(1)),
+    "strong-2": lambda: _scored(_strong_board(2)),
+    "synthetic-20": lambda: _scored(synthetic_board(20)),
+    "synthetic-60": lambda: _scored(synthetic_board(60, seed=3)),
+}
+
+def test_bankrolls_share_gates():
+    keys = [gate_key(b) for b in BANKROLLS if b > 0]
+    assert sorted(set(keys)) == [0, 1, 2, 3] and all(keys.count(k) >= 2 for k in keys)
+
+@pytest.mark.parametrize("mode", ["greedy", "optimal"])
+@pytest.mark.parametrize("board", list(BOARDS))
+def test_rows_match_per_call_recommendations(board, mode):
+    scored = BOARDS[board]()
+    rows = scenario_matrix(scored, BANKROLLS, saved=(0, 1, 2), mode=mode)
+    assert len(rows) == len(BANKROLLS) * 2 * 3
+    for r in rows:
+        want = build_recommendations_locked(copy.deepcopy(scored), r["bankroll"], r["demons_blocked"],
+                                            r["slips_saved"], mode=mode)
+        assert r["rec"] == want, (r["bankroll"], r["demons_blocked"], r["slips_saved"])
+        assert r["gate"] == gate_key(r["bankroll"])
+
+def test_strong_boards_build_slips():
+    rows = [r for b in ("strong-1", "strong-2") for r in scenario_matrix(BOARDS[b](), BANKROLLS, saved=(0, 1, 2))]
+    assert len({r["action"] for r in rows}) > 1
+    assert any(r["slips"] for r in rows)
+
+def _plain(rec: dict) -> dict:
+    if "slips" not in rec:
+        return rec
+    return {**rec, "slips": [s.to_dict() if isinstance(s, Slip) else s for s in rec["slips"]]}
+
+@pytest.mark.parametrize("mode", ["greedy", "optimal"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_dict_and_scored_prop_input_agree(seed, mode):
+    board = [{**p, "sport": "NBA", "line": float(p["line"]), "last5": [float(v) for v in p["last5"]]}
+             for p in _strong_board(seed)]
+    as_dicts = [score_prop(p) for p in board]
+    as_scored = [score_prop_cached(Prop.from_dict(p)) for p in board]
+    played = 0
+    for bankroll in BANKROLLS:
+        for demons_blocked in (True, False):
+            want = build_recommendations_locked(as_dicts, bankroll, demons_blocked, 0, mode=mode)
+            got = build_recommendations_locked(as_scored, bankroll, demons_blocked, 0, mode=mode)
+            assert all(isinstance(s, Slip) for s in got.get("slips", []))
+            assert _plain(got) == want, (bankroll, demons_blocked)
+            played += want["action"] == "PLAY"
+    assert played
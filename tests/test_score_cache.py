@@ -0,0 +1,81 @@
+"""
+The process-wide score cache (slip_logic.score_prop_cached).
+"""
+import types
+
+import pytest
+
+import slip_logic
+from models import Prop
+from slip_logic import clear_score_cache, score_cache_stats, score_prop, score_prop_cached
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_score_cache()
+    yield
+    clear_score_cache()
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(slip_logic, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def _prop(i: int, **kw) -> Prop:
+    return Prop.from_dict({"prop_id": f"p{i}", "player": f"P{i}", "market": "Points", "line": 10.5 + i,
+                           "last5": [12, 13, 14, 15, 16], **kw})
+
+def test_hits_share_one_result_and_match_score_prop():
+    a = score_prop_cached(_prop(1))
+    b = score_prop_cached(_prop(1, prop_id="other", player="Someone"))  # same scoring inputs
+    assert a.result is b.result
+    assert a.to_dict() == score_prop(_prop(1)).to_dict()
+    assert score_cache_stats() == {"hits": 1, "misses": 1, "evictions": 0, "expired": 0, "entries": 1, "hit_rate": 0.5}
+
+def test_demons_flag_and_inputs_are_part_of_the_key():
+    score_prop_cached(_prop(1, is_demon=True), demons_blocked=True)
+    score_prop_cached(_prop(1, is_demon=True), demons_blocked=False)
+    score_prop_cached(_prop(1, is_goblin=True))
+    assert score_cache_stats()["misses"] == 3
+
+def test_dict_props_hit_but_get_fresh_dicts():
+    d = {"player": "A", "market": "Points", "line": 10.5, "last5": [12, 13, 14, 15, 16]}
+    a, b = score_prop_cached(d), score_prop_cached(dict(d))
+    assert a == b == score_prop(d)
+    assert a is not b
+    a["score"] = -1.0  # callers may mutate their copy
+    assert score_prop_cached(d)["score"] == b["score"]
+    assert score_cache_stats()["hits"] == 2
+
+def test_entries_expire_after_ttl(clock, monkeypatch):
+    monkeypatch.setattr(slip_logic, "SCORE_CACHE_TTL", 60.0)
+    first = score_prop_cached(_prop(1))
+    clock[0] += 59.0
+    assert score_prop_cached(_prop(1)).result is first.result
+    clock[0] += 2.0
+    assert score_prop_cached(_prop(1)).result is not first.result
+    stats = score_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["entries"]) == (1, 2, 1, 1)
+
+def test_zero_ttl_never_expires(clock, monkeypatch):
+    monkeypatch.setattr(slip_logic, "SCORE_CACHE_TTL", 0.0)
+    first = score_prop_cached(_prop(1))
+    clock[0] += 10 ** 9
+    assert score_prop_cached(_prop(1)).result is first.result
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(slip_logic, "SCORE_CACHE_SIZE", 2)
+    p1 = score_prop_cached(_prop(1))
+    score_prop_cached(_prop(2))
+    score_prop_cached(_prop(1))  # p1 is now the most recent
+    score_prop_cached(_prop(3))  # evicts p2
+    assert score_prop_cached(_prop(1)).result is p1.result
+    score_prop_cached(_prop(2))  # a miss again
+    stats = score_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 4, 2, 2)
+
+def test_clear_resets_entries_and_counters():
+    score_prop_cached(_prop(1))
+    score_prop_cached(_prop(1))
+    clear_score_cache()
+    assert score_cache_stats() == {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "entries": 0, "hit_rate": None}
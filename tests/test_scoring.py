@@ -0,0 +1,63 @@
+"""
+score_board (vectorized) against score_prop, row for row.
+"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from slip_logic import SCORED_COLS, score_board, score_prop
+
+MARKETS = ["Points", "Rebounds", "Assists", "PRA", "3PT Made", "Goals", "Steals", "Blocks", "Shots on Goal", ""]
+
+# averages on a rounding half (x.xx5) where np.round and round() disagree -> round2's Python fallback
+NEAR_HALF = [
+    [25.4, 22.0, 6.625, 10.0, 3.0],
+    [11.7, 29.375, 0.625, 5.5, 6.375],
+    [15.0, 6.1, 6.6, 28.875, 24.5],
+    [24.25, 19.25, 8.625, 1.7, 12.5],
+    [20.0, 6.5, 24.625, 23.4, 12.6],
+]
+
+def _board(n: int = 600, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    board = []
+    for i in range(n):
+        if i < len(NEAR_HALF):
+            last5 = NEAR_HALF[i]
+        elif i % 50 == 0:
+            last5 = rng.choice([[], None, [10.0, 11.0]])  # missing / short -> PASS
+        else:
+            last5 = [round(rng.uniform(0, 30) * 8) / 8 for _ in range(5)]
+        avg = sum(last5) / 5.0 if last5 and len(last5) == 5 else 10.0
+        line = rng.choice([avg, round(avg) + 0.5, avg + rng.uniform(-6, 6), 0.0 if i % 97 == 0 else 1.5])
+        board.append({
+            "prop_id": f"p{i}", "player": f"P{i % 40}", "market": rng.choice(MARKETS), "line": line,
+            "last5": last5, "is_goblin": rng.random() < 0.2, "is_demon": rng.random() < 0.2,
+        })
+    return board
+
+def _same(a, b) -> bool:
+    if a is None:
+        return isinstance(b, float) and math.isnan(b)
+    return a == b
+
+def test_board_covers_the_edge_cases():
+    avgs = [sum(l5) / 5.0 for l5 in NEAR_HALF]
+    assert all(np.round(a, 2) != round(a, 2) for a in avgs)
+    rows = [score_prop(p) for p in _board()]
+    assert {r["pick"] for r in rows} == {"MORE", "LESS", "PASS"}
+    assert {r["grade"] for r in rows} == {"ELITE", "STRONG", "OK", "FADE"}
+    why = " ".join(r["why"] for r in rows)
+    for reason in ["Goblin bonus", "Demon penalty", "High-variance market penalty", "Volume-market bonus"]:
+        assert reason in why
+
+@pytest.mark.parametrize("demons_blocked", [True, False])
+def test_score_board_matches_score_prop(demons_blocked):
+    board = _board()
+    df = score_board(board, demons_blocked=demons_blocked)
+    for i, (prop, row) in enumerate(zip(board, df.to_dict("records"))):
+        want = score_prop(prop, demons_blocked=demons_blocked)
+        diff = {c: (want[c], row[c]) for c in SCORED_COLS if not _same(want[c], row[c])}
+        assert not diff, f"row {i} ({prop}): {diff}"
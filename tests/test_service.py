@@ -0,0 +1,96 @@
+"""
+service.py request handling, in-process (workers=0: scoring runs on threads).
+"""
+import json
+import asyncio
+
+import pytest
+
+import service
+
+async def _exchange(raw: bytes):
+    svc = service.Service(workers=0, window_ms=0)
+    server = await svc.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+        svc.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+def _post(path: str, body: bytes, length=None) -> bytes:
+    length = len(body) if length is None else length
+    return (f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\nConnection: close\r\n\r\n").encode() + body
+
+@pytest.mark.parametrize("raw", [
+    _post("/score", b"{}", length="abc"),
+    _post("/score", b"{}", length="-1"),
+    _post("/score", b"not json"),
+    _post("/score", b"\xff\xfe"),
+    _post("/score", b"[1, 2]"),
+    _post("/score", b'{"props": "x"}'),
+    _post("/score", b'{"props": [], "demons_blocked": "maybe"}'),
+    _post("/recommend", b'{"board": [], "demons_blocked": "maybe"}'),
+    _post("/score", b'{}'),
+    _post("/score", b'{"props": [{"line": "abc", "last5": [1, 2, 3, 4, 5]}]}'),
+    _post("/score", b'{"props": [{"line": null, "last5": [1, 2, 3, 4, 5]}]}'),
+    _post("/score", b'{"props": [{"line": 5, "last5": ["a", "b", "c", "d", "e"]}]}'),
+    _post("/score", b'{"props": [{"line": 5, "last5": 5}]}'),
+    _post("/recommend", b'{"board": [{"line": "abc", "last5": [1, 2, 3, 4, 5]}]}'),
+    _post("/score", b'{"props": [{"line": 5, "is_goblin": "x"}]}'),
+    _post("/recommend", b'{"board": [{"line": 5, "is_demon": "maybe"}]}'),
+])
+def test_malformed_requests_get_400(raw):
+    status, reply = asyncio.run(_exchange(raw))
+    assert status == 400
+    assert "error" in reply
+
+def test_score_matches_score_prop():
+    from batch import _prop
+    from slip_logic import score_prop
+
+    props = [{"prop_id": "a", "player": "A", "market": "Points", "line": 10.5, "last5": "12 13 14 15 16"}]
+    status, reply = asyncio.run(_exchange(_post("/score", json.dumps({"props": props}).encode())))
+    assert status == 200
+    assert reply["scored"] == [service._json_safe(score_prop(_prop(p))) for p in props]
+
+def test_tracking_update_error_is_a_400(tmp_path, monkeypatch):
+    import aggregates
+    import tracking
+
+    monkeypatch.setattr(tracking, "BACKEND", "csv")
+    monkeypatch.setattr(tracking, "SLIPS_PATH", str(tmp_path / "slips.csv"))
+    monkeypatch.setattr(tracking, "PROPS_PATH", str(tmp_path / "props.csv"))
+    monkeypatch.setattr(aggregates, "DB_PATH", str(tmp_path / "agg.db"))
+    body = json.dumps({"slip_id": "nope", "prop_id": "nope-1", "result": "WIN"}).encode()
+    status, reply = asyncio.run(_exchange(_post("/tracking/prop_result", body)))
+    assert status == 400
+    assert reply == {"error": "No props yet."}
+
+def test_worker_failures_stay_500(monkeypatch):
+    monkeypatch.setitem(service.JOBS, "score", lambda body: 1 / 0)
+    status, reply = asyncio.run(_exchange(_post("/score", b'{"props": []}')))
+    assert status == 500
+    assert reply["error"].startswith("ZeroDivisionError")
+
+def test_drain_waits_for_inflight_batches():
+    async def go():
+        svc = service.Service(workers=0, window_ms=0)
+        await svc.start("127.0.0.1", 0)
+        try:
+            fut = asyncio.ensure_future(svc.batcher.submit("score", {"props": []}, 0))
+            await asyncio.sleep(0.01)
+            await svc.drain()
+            assert fut.done() and not svc.batcher.inflight
+            return await fut
+        finally:
+            svc.close()
+
+    assert asyncio.run(go()) == (200, b'{"scored": []}')
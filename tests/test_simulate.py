@@ -0,0 +1,54 @@
+"""
+simulate.py Monte Carlo against the closed-form FLEX EV for independent legs.
+"""
+import numpy as np
+import pytest
+
+import simulate
+from slip_logic import payout_multiplier
+
+TRIALS = 200_000
+
+def _exact_tiers(probs) -> np.ndarray:
+    # Poisson binomial: P(exactly k legs hit) for independent legs
+    dist = np.array([1.0])
+    for p in probs:
+        dist = np.append(dist * (1 - p), 0.0) + np.append(0.0, dist * p)
+    return dist
+
+@pytest.mark.parametrize("probs", [
+    [0.55, 0.6],
+    [0.5, 0.62, 0.7],
+    [0.45, 0.55, 0.58, 0.66],
+    [0.6, 0.52, 0.7, 0.48, 0.57],
+    [0.58, 0.61, 0.5, 0.64, 0.55, 0.6],
+])
+def test_independent_legs_match_closed_form(probs):
+    n = len(probs)
+    sim = simulate.simulate_slip(probs, f"{n}-PICK FLEX", stake=10.0, trials=TRIALS, seed=11)
+    tiers = _exact_tiers(probs)
+    mult = np.array([payout_multiplier(n, k) for k in range(n + 1)])
+    ev_mult = float(tiers @ mult)
+
+    # within 5 standard errors of the Monte Carlo estimate (+ the rounding of the output)
+    se = np.sqrt(tiers * (1 - tiers) / TRIALS)
+    assert np.all(np.abs(np.array(sim["tiers"]) - tiers) <= 5 * se + 1e-6)
+    se_mult = np.sqrt(tiers @ (mult - ev_mult) ** 2 / TRIALS)
+    assert abs(sim["ev_mult"] - ev_mult) <= 5 * se_mult + 1e-4
+    assert abs(sim["ev"] - 10.0 * (ev_mult - 1.0)) <= 10.0 * 5 * se_mult + 0.005
+    assert sim["p_bust"] == pytest.approx(float(tiers[mult == 0].sum()), abs=0.005)
+
+def test_fixed_seed_repeats_and_identity_corr_is_independent():
+    probs = [0.55, 0.6, 0.65]
+    a = simulate.simulate_slip(probs, "3-PICK FLEX", trials=50_000, seed=3)
+    assert simulate.simulate_slip(probs, "3-PICK FLEX", trials=50_000, seed=3) == a
+    assert simulate.simulate_slip(probs, "3-PICK FLEX", corr=np.eye(3), trials=50_000, seed=3) == a
+
+def test_copula_keeps_the_marginals():
+    probs = [0.55, 0.6, 0.65, 0.5]
+    corr = np.full((4, 4), 0.35) + 0.65 * np.eye(4)
+    sim = simulate.simulate_slip(probs, "4-PICK FLEX", corr=corr, trials=TRIALS, seed=5)
+    mean_hits = float(np.arange(5) @ np.array(sim["tiers"]))
+    assert mean_hits == pytest.approx(sum(probs), abs=0.01)
+    independent = _exact_tiers(probs)
+    assert sim["tiers"][0] + sim["tiers"][4] > independent[0] + independent[4]  # fatter tails
@@ -0,0 +1,24 @@
+"""
+Concurrent tracking writes from several processes x threads (bench.py --stress, small).
+"""
+import pytest
+
+import bench
+
+PROCESSES, THREADS, OPS = 2, 3, 4
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_concurrent_writes_are_not_lost(backend, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # nothing may land in the working directory either
+    r = bench.bench_stress(PROCESSES, THREADS, OPS, backend)
+    assert r["problems"] == []
+    assert r["n"] == PROCESSES * THREADS * OPS * 4  # save_slip, save_props, 2 updates
+    assert list(tmp_path.iterdir()) == []
+
+def test_failed_sessions_fail_the_run(monkeypatch):
+    import tracking
+
+    monkeypatch.setattr(tracking, "update_slip_result", lambda *a: "Slip ID not found.")
+    r = bench.bench_stress(1, 2, 1, "csv")
+    assert len([p for p in r["problems"] if "Slip ID not found." in p]) == 2
+    assert r["n"] == 2 * 3  # the two saves and the leg update per session, not the failed update
@@ -0,0 +1,48 @@
+"""
+CSV journal: a torn trailing row (crash mid-append) is ignored on load, dropped by the
+next append and never folded into the base CSV.
+"""
+import os
+
+import pytest
+
+import tracking
+
+TORN = b"S2,2026-01-02T10:00:00,100,1,5.0,2-PI"
+
+def _slip(slip_id: str) -> dict:
+    return {"slip_id": slip_id, "created_at": "2026-01-03T10:00:00", "bankroll": 100, "aggression": 1,
+            "stake": 2.0, "slip_type": "3-PICK FLEX", "action": "PLAY", "reason": "test"}
+
+def _tear(path: str):
+    with open(tracking._journal_path(path), "ab") as f:
+        f.write(TORN)
+
+@pytest.mark.parametrize("backend", ["csv"], indirect=True)
+def test_torn_row_is_not_loaded(backend):
+    _tear(tracking.SLIPS_PATH)
+    assert tracking.load_slips()["slip_id"].tolist() == ["S1"]
+
+@pytest.mark.parametrize("backend", ["csv"], indirect=True)
+def test_next_append_truncates_torn_row(backend):
+    _tear(tracking.SLIPS_PATH)
+    tracking.save_slip(_slip("S3"))
+    with open(tracking._journal_path(tracking.SLIPS_PATH), "rb") as f:
+        journal = f.read()
+    assert b"S2," not in journal and journal.endswith(b"\n")
+    df = tracking.load_slips()
+    assert df["slip_id"].tolist() == ["S1", "S3"]
+    assert df.loc[1, "slip_type"] == "3-PICK FLEX"
+
+@pytest.mark.parametrize("backend", ["csv"], indirect=True)
+def test_compaction_folds_rows_without_the_torn_one(backend):
+    tracking.save_slip(_slip("S3"))
+    _tear(tracking.SLIPS_PATH)
+    tracking.compact_tracking()
+    assert not os.path.exists(tracking._journal_path(tracking.SLIPS_PATH))
+    with open(tracking.SLIPS_PATH, "rb") as f:
+        base = f.read()
+    assert b"S2," not in base and base.count(b"\n") == 3  # header + S1 + S3
+    assert tracking.load_slips()["slip_id"].tolist() == ["S1", "S3"]
+    tracking.save_slip(_slip("S4"))
+    assert tracking.load_slips()["slip_id"].tolist() == ["S1", "S3", "S4"]
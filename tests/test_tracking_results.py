@@ -0,0 +1,25 @@
+"""
+Manual result updates on both tracking backends.
+"""
+import pandas as pd
+import pytest
+
+import aggregates
+import tracking
+import tracking_sqlite
+
+@pytest.mark.parametrize("payout, stored", [("11.25", 11.25), (" $11.25 ", 11.25), ("", None)])
+def test_slip_payout_is_stored_as_a_number(backend, payout, stored):
+    assert tracking.update_slip_result("S1", "W", payout, "") is None
+    got = tracking.load_slips().at[0, "payout"]
+    assert (None if pd.isna(got) else float(got)) == stored
+
+@pytest.mark.parametrize("payout", ["eleven", "11.25.0", "nan", "inf"])
+def test_bad_payout_is_rejected(backend, payout):
+    assert tracking.update_slip_result("S1", "W", payout, "") == tracking_sqlite.PAYOUT_ERROR
+    assert pd.isna(tracking.load_slips().at[0, "result"])  # nothing written
+    assert aggregates.verify(tracking.load_slips(), tracking.load_props()) == []
+
+def test_missing_ids_return_messages(backend):
+    assert tracking.update_slip_result("S9", "W", "1", "") == "Slip ID not found."
+    assert tracking.update_prop_result("S1", "S1-9", "WIN") == "Prop ID not found for that slip."
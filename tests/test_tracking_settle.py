@@ -0,0 +1,25 @@
+"""
+Bulk settlement on both tracking backends.
+"""
+import pytest
+
+import tracking
+from slip_logic import settle_slip
+
+def test_duplicate_legs_count_once(backend, tmp_path):
+    out = tracking.settle_bulk([
+        ("S1", "S1-1", "LOSS"), ("S1", "S1-1", "WIN"), ("S1", "S1-2", "WIN"), ("S1", "S1-2", "WIN"),
+        ("S9", "S9-1", "WIN"),
+    ])
+    assert out == {"legs_updated": 2, "legs_missing": [("S9", "S9-1")], "slips_graded": 1, "slips_pending": 0}
+    assert tracking.load_props()["result"].tolist() == ["WIN", "WIN"]
+    slip = tracking.load_slips().iloc[0]
+    assert (slip["result"], float(slip["payout"])) == settle_slip("2-PICK POWER", 5.0, ["WIN", "WIN"])
+
+def test_csv_settlement_rewrites_both_files(backend, tmp_path):
+    if backend != "csv":
+        pytest.skip("CSV only")
+    tracking.settle_bulk([("S1", "S1-1", "WIN"), ("S1", "S1-2", "LOSS")])
+    left = sorted(p.name for p in tmp_path.iterdir() if not p.name.endswith((".lock", ".db")))
+    assert left == ["props_history.csv", "slips_history.csv"]  # journals folded in, no temp files
+    assert tracking.load_slips()["result"].tolist() == ["L"]
@@ -0,0 +1,6 @@
+"""
+Bankroll tiers of slip_logic._gates, shared by the backtest and the tracking aggregates
+(kept dependency-free so tracking writes don't import the backtest engine).
+"""
+TIERS = ["$0–49", "$50–84", "$85–149", "$150+"]
+TIER_EDGES = [50.0, 85.0, 150.0]  # bankroll where each tier after the first starts
@@ -1,10 +1,34 @@
+import io
 import os
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, timedelta
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within this process
+    fcntl = None
+
+import aggregates
+import perf
+import tracking_sqlite
+from slip_logic import LEG_RESULTS, settle_slip
+
+log = logging.getLogger(__name__)
+
 SLIPS_PATH = "slips_history.csv"
 PROPS_PATH = "props_history.csv"
 
+# Storage backend: "csv" (default) or "sqlite"
+BACKEND = os.environ.get("PP_TRACKING_BACKEND", "csv").strip().lower()
+DB_PATH = os.environ.get("PP_TRACKING_DB", "tracking.db")
+
 SLIP_COLS = [
     "slip_id","created_at","bankroll","aggression","stake","slip_type",
     "action","reason","result","payout","notes","legs_json"
@@ -14,56 +38,674 @@ PROP_COLS = [
     "slip_id","prop_id","created_at","player","market","side","line","score","result"
 ]
 
+# New rows are appended to "<csv>.journal" (no header, same column order as the
+# base CSV) and folded back into the base CSV by compaction.
+JOURNAL_SUFFIX = ".journal"
+COMPACT_BYTES = 256 * 1024  # compact once a journal grows past this
+
+def _journal_path(path: str) -> str:
+    return path + JOURNAL_SUFFIX
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # not supported (Windows)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _write_temp(path: str, text: str) -> str:
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+def _atomic_write(path: str, text: str):
+    """
+    Write the whole file via temp file + fsync + rename, so readers never see a half-written CSV.
+    """
+    os.replace(_write_temp(path, text), path)
+    _fsync_dir(path)
+
+def _read_csv_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
 def _load_csv(path: str, cols: list) -> pd.DataFrame:
+    journal = _journal_path(path)
+    has_journal = os.path.exists(journal) and os.path.getsize(journal) > 0
     if os.path.exists(path):
-        df = pd.read_csv(path)
+        if has_journal:
+            # Base header already matches cols (see _ensure_base), so base + journal
+            # parses exactly like the old single rewritten file. A torn trailing row
+            # (crash mid-append; the next append truncates it) is not a row yet.
+            tail = _read_csv_text(journal)
+            df = pd.read_csv(io.StringIO(_read_csv_text(path) + tail[:tail.rfind("\n") + 1]))
+        else:
+            df = pd.read_csv(path)
         for c in cols:
             if c not in df.columns:
                 df[c] = ""
         return df[cols]
     return pd.DataFrame(columns=cols)
 
+def _ensure_base(path: str, cols: list):
+    """
+    Make sure the base CSV exists with exactly `cols` as header.
+    Older histories (missing/extra/reordered columns) are migrated once here.
+    """
+    header = ",".join(cols)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if f.readline().rstrip("\r\n") == header:
+                return
+        _rewrite(path, cols, _load_csv(path, cols))
+    else:
+        _atomic_write(path, header + "\n")
+
+def _append_journal(path: str, cols: list, rows: list):
+    """
+    Append rows to the journal with one write + fsync; O(rows), not O(history).
+    Caller holds the write lock.
+    """
+    text = pd.DataFrame(rows, columns=cols).to_csv(header=False, index=False)
+    journal = _journal_path(path)
+    fd = os.open(journal, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        size = os.fstat(fd).st_size
+        if size > 0:
+            # drop a torn trailing row left by a crash mid-append
+            with open(journal, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.seek(0)
+                    data = f.read()
+                    os.ftruncate(fd, data.rfind(b"\n") + 1)
+        os.write(fd, text.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    _invalidate(path)
+
+def _append_rows(path: str, cols: list, rows: list):
+    if rows:
+        _writer.submit(path, cols, _Pending("append", rows=rows))
+
+def _rewrite(path: str, cols: list, df: pd.DataFrame):
+    """
+    Replace the base CSV with df and drop the journal (its rows are in df).
+    """
+    _atomic_write(path, df[cols].to_csv(index=False))
+    journal = _journal_path(path)
+    if os.path.exists(journal):
+        os.remove(journal)
+    _invalidate(path)
+
+def _rewrite_all(files: list):
+    """
+    _rewrite for several (path, cols, df): every temp file is written and fsynced before
+    the first rename, so the files are swapped in back to back. Caller holds every lock.
+    """
+    staged = [(path, _write_temp(path, df[cols].to_csv(index=False))) for path, cols, df in files]
+    for path, tmp in staged:
+        os.replace(tmp, path)
+        journal = _journal_path(path)
+        if os.path.exists(journal):
+            os.remove(journal)
+        _invalidate(path)
+    for path, _ in staged:
+        _fsync_dir(path)
+
+def compact(path: str, cols: list):
+    """
+    Fold the journal into the base CSV.
+    """
+    with _file_lock(path):
+        _compact_locked(path, cols)
+
+def _compact_locked(path: str, cols: list):
+    if os.path.exists(_journal_path(path)):
+        _rewrite(path, cols, _load_csv(path, cols))
+
+# -----------------------------
+# WRITE COORDINATOR (CSV backend)
+# -----------------------------
+# Appends and result updates go through _writer: an advisory lock on "<csv>.lock" makes
+# the read-modify-write atomic across processes, and writes that queue up in this process
+# while one is in flight are committed together (one journal fsync, or one load +
+# rewrite when the batch has updates). Compaction, reset and bulk settlement take the
+# same locks directly. Readers take the lock shared.
+LOCK_SUFFIX = ".lock"
+
+@contextmanager
+def _file_lock(path: str, shared: bool = False):
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
+
+class _Pending:
+    """
+    One queued write: "append" rows, or "update" the rows matching `match` with `values`.
+    result = error message for an update that matched nothing, else None.
+    """
+    __slots__ = ("kind", "rows", "match", "values", "empty_msg", "missing_msg", "done", "result", "error")
+
+    def __init__(self, kind: str, rows: list = None, match: dict = None, values: dict = None,
+                 empty_msg: str = "", missing_msg: str = ""):
+        self.kind, self.rows, self.match, self.values = kind, rows or [], match or {}, values or {}
+        self.empty_msg, self.missing_msg = empty_msg, missing_msg
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _WriteCoordinator:
+    """
+    Group commit per CSV path. The first writer to arrive becomes the leader and commits
+    everything queued for that path (including writes that arrive meanwhile); the others
+    wait for their write's batch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}     # path -> [_Pending]
+        self._leading = set()  # paths with a leader committing
+        self.stats = {"commits": 0, "writes": 0}
+
+    def submit(self, path: str, cols: list, op: _Pending):
+        with self._lock:
+            self._queues.setdefault(path, []).append(op)
+            lead = path not in self._leading
+            self._leading.add(path)
+        if lead:
+            while True:
+                with self._lock:
+                    batch = self._queues.pop(path, [])
+                    if not batch:
+                        self._leading.discard(path)
+                        break
+                self._commit(path, cols, batch)
+        op.done.wait()
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    def _commit(self, path: str, cols: list, batch: list):
+        try:
+            with _file_lock(path):
+                _ensure_base(path, cols)
+                if any(op.kind == "update" for op in batch):
+                    df = _load_csv(path, cols)
+                    for op in batch:
+                        if op.kind == "append":
+                            new = pd.DataFrame(op.rows, columns=cols)
+                            df = new if df.empty else pd.concat([df, new], ignore_index=True)
+                        else:
+                            op.result = _apply_update(df, op)
+                    _rewrite(path, cols, df)
+                else:
+                    _append_journal(path, cols, [r for op in batch for r in op.rows])
+                    if os.path.getsize(_journal_path(path)) >= COMPACT_BYTES:
+                        _compact_locked(path, cols)
+        except Exception as e:
+            for op in batch:
+                op.error = e
+        with self._lock:
+            self.stats["commits"] += 1
+            self.stats["writes"] += len(batch)
+        for op in batch:
+            op.done.set()
+
+def _apply_update(df: pd.DataFrame, op: _Pending):
+    if df.empty:
+        return op.empty_msg
+    mask = None
+    for col, v in op.match.items():
+        m = df[col].astype(str) == str(v)
+        mask = m if mask is None else mask & m
+    if not mask.any():
+        return op.missing_msg
+    for col, v in op.values.items():
+        if df[col].dtype != object:
+            df[col] = df[col].astype(object)
+        df.loc[mask, col] = v
+    return None
+
+_writer = _WriteCoordinator()
+
+def write_stats() -> dict:
+    """
+    Group-commit counters for this process (writes / commits = average batch size).
+    """
+    with _writer._lock:
+        return dict(_writer.stats)
+
+def _read_csv_locked(path: str, cols: list) -> pd.DataFrame:
+    with _file_lock(path, shared=True):
+        return _load_csv(path, cols)
+
+def _use_sqlite() -> bool:
+    return BACKEND == "sqlite"
+
+@contextmanager
+def use_tracking_dir(directory: str, backend: str = None):
+    """
+    Point tracking (histories and the aggregate store) at `directory` on `backend`
+    (default: the current one) inside the block, away from the app's files; the
+    previous paths come back on exit. For tests and benchmarks.
+    """
+    global BACKEND, SLIPS_PATH, PROPS_PATH, DB_PATH
+    saved = (BACKEND, SLIPS_PATH, PROPS_PATH, DB_PATH, aggregates.DB_PATH)
+    BACKEND = backend or BACKEND
+    SLIPS_PATH = os.path.join(directory, "slips_history.csv")
+    PROPS_PATH = os.path.join(directory, "props_history.csv")
+    DB_PATH = os.path.join(directory, "tracking.db")
+    aggregates.DB_PATH = os.path.join(directory, "tracking_agg.db")
+    try:
+        yield
+    finally:
+        BACKEND, SLIPS_PATH, PROPS_PATH, DB_PATH, aggregates.DB_PATH = saved
+
+# -----------------------------
+# LOAD CACHE
+# -----------------------------
+# Parsed histories keyed by source path + (mtime, size) of the files behind it.
+# Module-level, so every Streamlit session in the process shares it.
+MAX_CACHE_ENTRIES = 8
+
+_cache_lock = threading.Lock()
+_load_cache = OrderedDict()  # key -> (stamp, DataFrame)
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def _stamp(paths: list) -> tuple:
+    out = []
+    for p in paths:
+        try:
+            st_ = os.stat(p)
+            out.append((st_.st_mtime_ns, st_.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+def _cached(key: tuple, paths: list, loader, copy: bool = True) -> pd.DataFrame:
+    """
+    copy=False returns the shared cached frame itself; the caller must not modify it.
+    """
+    stamp = _stamp(paths)  # taken before loading, so a concurrent write can only cause a miss
+    with _cache_lock:
+        hit = _load_cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            _load_cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+            perf.count("tracking.cache_hit", 1)
+            return hit[1].copy() if copy else hit[1]
+        _cache_stats["misses"] += 1
+    with perf.stage("tracking.parse") as t:
+        df = loader()
+        t.rows = len(df)
+    with _cache_lock:
+        if key in _load_cache:
+            _cache_stats["evictions"] += 1  # stale version of the same source
+        _load_cache[key] = (stamp, df)
+        _load_cache.move_to_end(key)
+        while len(_load_cache) > MAX_CACHE_ENTRIES:
+            _load_cache.popitem(last=False)
+            _cache_stats["evictions"] += 1
+    return df.copy() if copy else df
+
+def _invalidate(path: str):
+    """
+    Drop cached loads of `path`. Our own writes call this so a same-size rewrite
+    inside the filesystem's mtime resolution can't serve stale data.
+    """
+    with _cache_lock:
+        for key in [k for k in _load_cache if k[1] == path]:
+            del _load_cache[key]
+
+def load_cache_stats() -> dict:
+    with _cache_lock:
+        return {**_cache_stats, "entries": len(_load_cache)}
+
+def _aggregate(hook, *args):
+    """
+    Feed a successful write to the materialized aggregates. A missing store is built
+    from the (already updated) history instead. Runs under the store's file lock, so only
+    one writer rebuilds. Aggregate errors never fail a write: they are logged and
+    returned (None = aggregates updated).
+    """
+    try:
+        with _file_lock(aggregates.DB_PATH):
+            if aggregates.exists():
+                hook(*args)
+            else:
+                aggregates.rebuild(load_slips(), load_props())
+    except (sqlite3.Error, OSError) as e:
+        msg = f"Aggregates not updated ({e}); rebuild them from the dashboard."
+        log.warning(msg)
+        return msg
+    return None
+
+@perf.timed("tracking.load_slips", rows=len)
 def load_slips() -> pd.DataFrame:
-    return _load_csv(SLIPS_PATH, SLIP_COLS)
+    if _use_sqlite():
+        return _cached(("sqlite", DB_PATH, "slips"), [DB_PATH, DB_PATH + "-wal"],
+                       lambda: tracking_sqlite.load_slips(DB_PATH))
+    return _cached(("csv", SLIPS_PATH), [SLIPS_PATH, _journal_path(SLIPS_PATH)],
+                   lambda: _read_csv_locked(SLIPS_PATH, SLIP_COLS))
 
+@perf.timed("tracking.load_props", rows=len)
 def load_props() -> pd.DataFrame:
-    return _load_csv(PROPS_PATH, PROP_COLS)
+    if _use_sqlite():
+        return _cached(("sqlite", DB_PATH, "props"), [DB_PATH, DB_PATH + "-wal"],
+                       lambda: tracking_sqlite.load_props(DB_PATH))
+    return _cached(("csv", PROPS_PATH), [PROPS_PATH, _journal_path(PROPS_PATH)],
+                   lambda: _read_csv_locked(PROPS_PATH, PROP_COLS))
 
+@perf.timed("tracking.save_slip")
 def save_slip(row: dict):
-    df = load_slips()
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    df.to_csv(SLIPS_PATH, index=False)
+    if _use_sqlite():
+        tracking_sqlite.save_slip(DB_PATH, row)
+        _invalidate(DB_PATH)
+    else:
+        _append_rows(SLIPS_PATH, SLIP_COLS, [row])
+    _aggregate(aggregates.on_slips, [row])
 
+@perf.timed("tracking.save_props")
 def save_props(rows: list):
-    df = load_props()
-    df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
-    df.to_csv(PROPS_PATH, index=False)
+    if _use_sqlite():
+        tracking_sqlite.save_props(DB_PATH, rows)
+        _invalidate(DB_PATH)
+    else:
+        _append_rows(PROPS_PATH, PROP_COLS, rows)
+    _aggregate(aggregates.on_props, rows)
 
-def update_slip_result(slip_id: str, result: str, payout: str, notes: str):
-    df = load_slips()
-    if df.empty:
-        st.error("No slips yet.")
+def compact_tracking():
+    if _use_sqlite():
         return
-    mask = df["slip_id"].astype(str) == str(slip_id)
-    if not mask.any():
-        st.error("Slip ID not found.")
+    compact(SLIPS_PATH, SLIP_COLS)
+    compact(PROPS_PATH, PROP_COLS)
+
+def reset_tracking():
+    """
+    Delete all tracking files (CSVs and journals, or the SQLite database).
+    """
+    with _file_lock(aggregates.DB_PATH):
+        aggregates.reset()
+    if _use_sqlite():
+        tracking_sqlite.reset(DB_PATH)
+        _invalidate(DB_PATH)
         return
-    df.loc[mask, "result"] = result
-    df.loc[mask, "payout"] = payout
-    df.loc[mask, "notes"] = notes
-    df.to_csv(SLIPS_PATH, index=False)
+    for path in [SLIPS_PATH, PROPS_PATH]:
+        with _file_lock(path):
+            for f in [path, _journal_path(path)]:
+                if os.path.exists(f):
+                    os.remove(f)
+            _invalidate(path)
+
+def rebuild_aggregates(path: str = None) -> dict:
+    """
+    Recompute the materialized aggregates from the full history.
+    """
+    path = path or aggregates.DB_PATH
+    with _file_lock(path):
+        return aggregates.rebuild(load_slips(), load_props(), path)
 
+def import_csv_to_sqlite() -> dict:
+    """
+    One-shot copy of the CSV history (base + journal) into DB_PATH.
+    """
+    counts = tracking_sqlite.import_frames(
+        DB_PATH,
+        _read_csv_locked(SLIPS_PATH, SLIP_COLS),
+        _read_csv_locked(PROPS_PATH, PROP_COLS),
+    )
+    _invalidate(DB_PATH)
+    return counts
+
+@perf.timed("tracking.update_slip_result")
+def update_slip_result(slip_id: str, result: str, payout: str, notes: str):
+    """
+    Returns the error message for the caller to show, or None once saved.
+    """
+    try:
+        payout = tracking_sqlite.parse_payout(payout)
+    except ValueError:
+        return tracking_sqlite.PAYOUT_ERROR
+    if _use_sqlite():
+        err = tracking_sqlite.update_slip_result(DB_PATH, slip_id, result, payout, notes)
+        _invalidate(DB_PATH)
+    else:
+        err = _writer.submit(SLIPS_PATH, SLIP_COLS, _Pending(
+            "update", match={"slip_id": slip_id},
+            values={"result": result, "payout": "" if payout is None else payout, "notes": notes},
+            empty_msg="No slips yet.", missing_msg="Slip ID not found.",
+        ))
+    if err:
+        return err
+    _aggregate(aggregates.on_slip_results, [(slip_id, result, payout)])
+    return None
+
+@perf.timed("tracking.update_prop_result")
 def update_prop_result(slip_id: str, prop_id: str, result: str):
-    df = load_props()
-    if df.empty:
-        st.error("No props yet.")
-        return
-    mask = (df["slip_id"].astype(str) == str(slip_id)) & (df["prop_id"].astype(str) == str(prop_id))
-    if not mask.any():
-        st.error("Prop ID not found for that slip.")
-        return
-    df.loc[mask, "result"] = result
-    df.to_csv(PROPS_PATH, index=False)
+    """
+    Returns the error message for the caller to show, or None once saved.
+    """
+    if _use_sqlite():
+        err = tracking_sqlite.update_prop_result(DB_PATH, slip_id, prop_id, result)
+        _invalidate(DB_PATH)
+    else:
+        err = _writer.submit(PROPS_PATH, PROP_COLS, _Pending(
+            "update", match={"slip_id": slip_id, "prop_id": prop_id}, values={"result": result},
+            empty_msg="No props yet.", missing_msg="Prop ID not found for that slip.",
+        ))
+    if err:
+        return err
+    _aggregate(aggregates.on_leg_results, [(slip_id, prop_id, result)])
+    return None
+
+# -----------------------------
+# HISTORY PAGES
+# -----------------------------
+PAGE_SIZE = 50
+
+_order_lock = threading.Lock()
+_order_cache = {}  # csv path -> (cached frame, created_at ascending order, created_at in that order)
+
+def _created_order(path: str, df: pd.DataFrame) -> tuple:
+    """
+    Stable created_at argsort of a cached CSV frame, computed once per loaded version.
+    """
+    with _order_lock:
+        hit = _order_cache.get(path)
+        if hit is not None and hit[0] is df:
+            return hit[1], hit[2]
+    ts = df["created_at"].fillna("").astype(str).to_numpy()
+    asc = np.argsort(ts, kind="stable")
+    ts = ts[asc]
+    with _order_lock:
+        _order_cache[path] = (df, asc, ts)
+    return asc, ts
+
+def _day_bounds(since, until) -> tuple:
+    """
+    Dates (or ISO strings) -> ISO created_at bounds, `until` inclusive of its whole day.
+    """
+    lo = since.isoformat() if hasattr(since, "isoformat") else (since or None)
+    if until is None or until == "":
+        return lo, None
+    if not hasattr(until, "isoformat"):
+        until = date.fromisoformat(str(until)[:10])
+    return lo, (until + timedelta(days=1)).isoformat()
+
+def _page_frame(df: pd.DataFrame, path: str, offset: int, limit: int, since, until,
+                result, market, search) -> tuple:
+    asc, ts = _created_order(path, df)
+    lo = 0 if since is None else int(np.searchsorted(ts, since, side="left"))
+    hi = len(ts) if until is None else int(np.searchsorted(ts, until, side="left"))
+    pos = asc[lo:hi][::-1]  # newest first; equal timestamps newest-written first
+    if result is not None or market or search:
+        needed = [c for c, on in (("result", result is not None), ("market", market), ("slip_id", search),
+                                  ("prop_id", search)) if on and c in df.columns]
+        sub = df[needed].iloc[pos]  # only the filter columns
+
+        def col(name: str) -> pd.Series:
+            return sub[name].fillna("").astype(str)
+
+        keep = np.ones(len(pos), dtype=bool)
+        if result is not None:
+            res = col("result").str.strip()
+            keep &= (res == "").to_numpy() if result == "" else (res.str.upper() == result.upper()).to_numpy()
+        if market and "market" in df.columns:
+            keep &= (col("market") == market).to_numpy()
+        if search:
+            hit = col("slip_id").str.lower().str.contains(search.lower(), regex=False)
+            if "prop_id" in df.columns:
+                hit |= col("prop_id").str.lower().str.contains(search.lower(), regex=False)
+            keep &= hit.to_numpy()
+        pos = pos[keep]
+    return df.iloc[pos[offset:offset + limit]].reset_index(drop=True), int(len(pos))
+
+def _page(table: str, offset: int, limit: int, since, until, result, market, search) -> tuple:
+    """
+    On SQLite only the window's rows are read. On CSV the whole file (base + journal) is
+    parsed once per written version and cached for every session, and pages are cut from
+    that frame, so memory and the first page after a write scale with the full history
+    (the filtered total needs every row anyway). Use the SQLite backend for large histories.
+    """
+    since, until = _day_bounds(since, until)
+    search = (search or "").strip() or None
+    offset, limit = max(0, int(offset)), max(1, int(limit))
+    if _use_sqlite():
+        return tracking_sqlite.page(DB_PATH, table, offset, limit, since, until, result, market, search)
+    path, cols = (SLIPS_PATH, SLIP_COLS) if table == "slips" else (PROPS_PATH, PROP_COLS)
+    df = _cached(("csv", path), [path, _journal_path(path)], lambda: _read_csv_locked(path, cols), copy=False)
+    return _page_frame(df, path, offset, limit, since, until, result, market, search)
+
+@perf.timed("tracking.page_slips", rows=lambda out: len(out[0]))
+def page_slips(offset: int = 0, limit: int = PAGE_SIZE, since=None, until=None,
+               result: str = None, search: str = None) -> tuple:
+    """
+    (window, total): slips newest first, filtered by created_at day range, result
+    ("" = ungraded) and a slip_id substring. Only the window is sorted and copied
+    (the CSV backend still loads the whole file; see _page).
+    """
+    return _page("slips", offset, limit, since, until, result, None, search)
+
+@perf.timed("tracking.page_props", rows=lambda out: len(out[0]))
+def page_props(offset: int = 0, limit: int = PAGE_SIZE, since=None, until=None,
+               result: str = None, market: str = None, search: str = None) -> tuple:
+    """
+    page_slips for prop legs, plus an exact market filter; search also matches prop_id.
+    """
+    return _page("props", offset, limit, since, until, result, market, search)
+
+# -----------------------------
+# BULK SETTLEMENT
+# -----------------------------
+def parse_settlement(text: str) -> tuple:
+    """
+    Pasted lines "slip_id,prop_id,result" or "prop_id result" (slip_id is the part of
+    prop_id before the last "-") -> ([(slip_id, prop_id, RESULT)], [bad lines]).
+    """
+    legs, bad = [], []
+    for line in (text or "").splitlines():
+        parts = [p for p in line.replace(",", " ").replace("\t", " ").split() if p]
+        if not parts or parts[0].lower() in ("slip_id", "prop_id"):
+            continue
+        if len(parts) == 2 and "-" in parts[0]:
+            parts = [parts[0].rsplit("-", 1)[0]] + parts
+        if len(parts) != 3 or parts[2].upper() not in LEG_RESULTS:
+            bad.append(line)
+            continue
+        legs.append((parts[0], parts[1], parts[2].upper()))
+    return legs, bad
+
+def _settle_props_frame(df: pd.DataFrame, legs: list) -> dict:
+    want = {(str(s), str(p)): r for s, p, r in legs}  # last result per leg wins
+    keys = pd.Series(list(zip(df["slip_id"].astype(str), df["prop_id"].astype(str))), index=df.index, dtype=object)
+    new = keys.map(want)
+    mask = new.notna()
+    if mask.any():
+        df["result"] = df["result"].astype(object)
+        df.loc[mask, "result"] = new[mask]
+    found = set(keys[mask])
+    affected = {s for s, _ in want}
+    sub = df[df["slip_id"].astype(str).isin(affected)]
+    return {
+        "legs_updated": int(mask.sum()),
+        "legs_missing": [k for k in want if k not in found],
+        "legs_by_slip": sub.groupby(sub["slip_id"].astype(str))["result"].agg(list).to_dict(),
+    }
+
+def _settle_slips_frame(df: pd.DataFrame, legs_by_slip: dict) -> dict:
+    graded, pending = [], 0
+    rows = df.index[df["slip_id"].astype(str).isin(legs_by_slip)]
+    if len(rows):
+        df["result"] = df["result"].astype(object)
+        df["payout"] = df["payout"].astype(object)
+    stake = pd.to_numeric(df["stake"], errors="coerce")
+    for i in rows:
+        settled = settle_slip(df.at[i, "slip_type"], stake.at[i], legs_by_slip[str(df.at[i, "slip_id"])])
+        if settled is None:
+            pending += 1
+            continue
+        df.at[i, "result"], df.at[i, "payout"] = settled
+        graded.append((str(df.at[i, "slip_id"]), *settled))
+    return {"slips_graded": graded, "slips_pending": pending}
+
+def _settle_csv(legs: list) -> dict:
+    """
+    Both histories change under both write locks (props first, then slips: the only
+    place that nests them), so no reader or writer sees legs graded without their slips.
+    Re-running the same settlement is idempotent if a crash lands between the renames.
+    """
+    with _file_lock(PROPS_PATH), _file_lock(SLIPS_PATH):
+        _ensure_base(PROPS_PATH, PROP_COLS)
+        _ensure_base(SLIPS_PATH, SLIP_COLS)
+        props_df = _load_csv(PROPS_PATH, PROP_COLS)
+        slips_df = _load_csv(SLIPS_PATH, SLIP_COLS)
+        props = _settle_props_frame(props_df, legs)
+        slips = _settle_slips_frame(slips_df, props["legs_by_slip"])
+        _rewrite_all([(PROPS_PATH, PROP_COLS, props_df), (SLIPS_PATH, SLIP_COLS, slips_df)])
+    return {"legs_updated": props["legs_updated"], "legs_missing": props["legs_missing"], **slips}
+
+@perf.timed("tracking.settle_bulk")
+def settle_bulk(legs) -> dict:
+    """
+    End-of-night grading in one pass: apply many (slip_id, prop_id, result) leg results
+    (tuples or a DataFrame with those columns), then derive result + payout for every
+    slip whose legs are now all graded (FLEX tiers, PUSH/DNP reductions, refunds).
+    One rewrite per history file, both under their locks, instead of one rewrite per leg.
+    Returns legs_updated, legs_missing, slips_graded, slips_pending.
+    """
+    if isinstance(legs, pd.DataFrame):
+        legs = list(zip(legs["slip_id"], legs["prop_id"], legs["result"]))
+    short = {"W": "WIN", "L": "LOSS"}
+    legs = [(str(s), str(p), short.get(str(r).strip().upper(), str(r).strip().upper())) for s, p, r in legs]
+    bad = [l for l in legs if l[2] not in LEG_RESULTS]
+    if bad:
+        raise ValueError(f"Unknown leg result(s): {sorted({l[2] for l in bad})}; use {sorted(LEG_RESULTS)}")
+    if not legs:
+        return {"legs_updated": 0, "legs_missing": [], "slips_graded": 0, "slips_pending": 0}
+
+    if _use_sqlite():
+        out = tracking_sqlite.settle(DB_PATH, legs)
+        _invalidate(DB_PATH)
+    else:
+        out = _settle_csv(legs)
+    _aggregate(aggregates.on_leg_results, legs)
+    _aggregate(aggregates.on_slip_results, out["slips_graded"])
+    out["slips_graded"] = len(out["slips_graded"])
+    return out
 
 def download_buttons():
     slips = load_slips().to_csv(index=False).encode("utf-8")
@@ -0,0 +1,280 @@
+import os
+import math
+import time
+import sqlite3
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from slip_logic import settle_slip
+
+# Same columns as tracking.SLIP_COLS / PROP_COLS, with SQLite types.
+SLIP_SCHEMA = [
+    ("slip_id", "TEXT"), ("created_at", "TEXT"), ("bankroll", "REAL"), ("aggression", "INTEGER"),
+    ("stake", "REAL"), ("slip_type", "TEXT"), ("action", "TEXT"), ("reason", "TEXT"),
+    ("result", "TEXT"), ("payout", "REAL"), ("notes", "TEXT"), ("legs_json", "TEXT"),
+]
+
+PROP_SCHEMA = [
+    ("slip_id", "TEXT"), ("prop_id", "TEXT"), ("created_at", "TEXT"), ("player", "TEXT"),
+    ("market", "TEXT"), ("side", "TEXT"), ("line", "REAL"), ("score", "REAL"), ("result", "TEXT"),
+]
+
+SLIP_NAMES = [c for c, _ in SLIP_SCHEMA]
+PROP_NAMES = [c for c, _ in PROP_SCHEMA]
+
+DDL = [
+    "CREATE TABLE IF NOT EXISTS slips (" + ", ".join(f"{c} {t}" for c, t in SLIP_SCHEMA) + ")",
+    "CREATE TABLE IF NOT EXISTS props (" + ", ".join(f"{c} {t}" for c, t in PROP_SCHEMA) + ")",
+    "CREATE INDEX IF NOT EXISTS ix_slips_slip_id ON slips (slip_id)",
+    "CREATE INDEX IF NOT EXISTS ix_slips_created_at ON slips (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_props_slip_prop ON props (slip_id, prop_id)",
+    "CREATE INDEX IF NOT EXISTS ix_props_created_at ON props (created_at)",
+]
+
+_ready = set()  # db paths whose schema exists in this process
+
+def _init(con: sqlite3.Connection, timeout: float = 30.0):
+    """
+    WAL mode + schema. When two processes set up the same file at once, each can hold a
+    read lock the other has to upgrade past; SQLite then fails one right away ("database
+    is locked") instead of waiting out the busy timeout, so retry until the deadline.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            for stmt in DDL:
+                con.execute(stmt)
+            con.commit()
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() >= deadline:
+                raise
+            con.rollback()
+            time.sleep(0.01)
+
+def connect(path: str) -> sqlite3.Connection:
+    fresh = path not in _ready or not os.path.exists(path)
+    con = sqlite3.connect(path, timeout=30)
+    if fresh:
+        _init(con)
+        _ready.add(path)
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+def _value(v: Any) -> Any:
+    """
+    "" / NaN -> NULL so loads match the CSV backend (empty cells read back as NaN).
+    """
+    if v is None or (isinstance(v, float) and v != v) or v == "":
+        return None
+    return v
+
+PAYOUT_ERROR = "Payout must be a number (or blank)."
+
+def parse_payout(payout: Any) -> Optional[float]:
+    """
+    Typed payout ("11.25", "$11.25", "") -> REAL, or None when blank.
+    Raises ValueError on anything else.
+    """
+    v = _value(payout.strip().lstrip("$").strip() if isinstance(payout, str) else payout)
+    if v is None:
+        return None
+    v = float(v)
+    if not math.isfinite(v):
+        raise ValueError(f"payout {payout!r} is not finite")
+    return v
+
+def _insert(con: sqlite3.Connection, table: str, names: List[str], rows: List[Dict[str, Any]]):
+    sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})"
+    con.executemany(sql, [tuple(_value(r.get(c)) for c in names) for r in rows])
+
+def _load(path: str, table: str, names: List[str]) -> pd.DataFrame:
+    con = connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT {', '.join(names)} FROM {table} ORDER BY rowid", con)
+    finally:
+        con.close()
+
+def load_slips(path: str) -> pd.DataFrame:
+    return _load(path, "slips", SLIP_NAMES)
+
+def load_props(path: str) -> pd.DataFrame:
+    return _load(path, "props", PROP_NAMES)
+
+def page(path: str, table: str, offset: int, limit: int, since: Optional[str] = None, until: Optional[str] = None,
+         result: Optional[str] = None, market: Optional[str] = None, search: Optional[str] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    One newest-first window of `table` plus the filtered row count. Ordering and the date
+    range go through ix_*_created_at, so only the window's rows are read and returned.
+    since / until are ISO bounds (until exclusive); result "" = ungraded; search is a
+    case-insensitive substring of slip_id (or prop_id).
+    """
+    names = SLIP_NAMES if table == "slips" else PROP_NAMES
+    where, args = [], []
+    if since:
+        where.append("created_at >= ?")
+        args.append(since)
+    if until:
+        where.append("created_at < ?")
+        args.append(until)
+    if result is not None:
+        if result == "":
+            where.append("(result IS NULL OR result = '')")
+        else:
+            where.append("upper(result) = ?")
+            args.append(result.upper())
+    if market and table == "props":
+        where.append("market = ?")
+        args.append(market)
+    if search:
+        ids = "(instr(lower(slip_id), ?) > 0 OR instr(lower(prop_id), ?) > 0)" if table == "props" else "instr(lower(slip_id), ?) > 0"
+        where.append(ids)
+        args.extend([search.lower()] * ids.count("?"))
+    sql_where = (" WHERE " + " AND ".join(where)) if where else ""
+    con = connect(path)
+    try:
+        total = con.execute(f"SELECT COUNT(*) FROM {table}{sql_where}", args).fetchone()[0]
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(names)} FROM {table}{sql_where} ORDER BY created_at DESC, rowid DESC LIMIT ? OFFSET ?",
+            con, params=args + [int(limit), int(offset)],
+        )
+        return df, int(total)
+    finally:
+        con.close()
+
+def save_slip(path: str, row: Dict[str, Any]):
+    save_rows(path, "slips", [row])
+
+def save_props(path: str, rows: List[Dict[str, Any]]):
+    save_rows(path, "props", rows)
+
+def save_rows(path: str, table: str, rows: List[Dict[str, Any]]):
+    names = SLIP_NAMES if table == "slips" else PROP_NAMES
+    con = connect(path)
+    try:
+        with con:
+            _insert(con, table, names, rows)
+    finally:
+        con.close()
+
+def update_slip_result(path: str, slip_id: str, result: str, payout: str, notes: str) -> Optional[str]:
+    """
+    Point update through ix_slips_slip_id. Returns an error message or None.
+    """
+    try:
+        payout = parse_payout(payout)
+    except ValueError:
+        return PAYOUT_ERROR
+    con = connect(path)
+    try:
+        with con:
+            cur = con.execute(
+                "UPDATE slips SET result = ?, payout = ?, notes = ? WHERE slip_id = ?",
+                (result, payout, notes, str(slip_id)),
+            )
+            if cur.rowcount:
+                return None
+            if con.execute("SELECT 1 FROM slips LIMIT 1").fetchone() is None:
+                return "No slips yet."
+            return "Slip ID not found."
+    finally:
+        con.close()
+
+def update_prop_result(path: str, slip_id: str, prop_id: str, result: str) -> Optional[str]:
+    """
+    Point update through ix_props_slip_prop. Returns an error message or None.
+    """
+    con = connect(path)
+    try:
+        with con:
+            cur = con.execute(
+                "UPDATE props SET result = ? WHERE slip_id = ? AND prop_id = ?",
+                (result, str(slip_id), str(prop_id)),
+            )
+            if cur.rowcount:
+                return None
+            if con.execute("SELECT 1 FROM props LIMIT 1").fetchone() is None:
+                return "No props yet."
+            return "Prop ID not found for that slip."
+    finally:
+        con.close()
+
+def settle(path: str, legs: List[tuple]) -> Dict[str, Any]:
+    """
+    Apply (slip_id, prop_id, result) leg results and re-grade the affected slips,
+    all in one transaction. Same summary as tracking.settle_bulk, except slips_graded
+    lists the (slip_id, result, payout) it wrote.
+    """
+    con = connect(path)
+    try:
+        with con:
+            want = {(str(s), str(p)): r for s, p, r in legs}  # last result per leg wins
+            missing, updated = [], 0
+            for (slip_id, prop_id), result in want.items():
+                cur = con.execute(
+                    "UPDATE props SET result = ? WHERE slip_id = ? AND prop_id = ?", (result, slip_id, prop_id)
+                )
+                if not cur.rowcount:
+                    missing.append((slip_id, prop_id))
+                updated += cur.rowcount
+            affected = sorted({s for s, _ in want})
+            graded, pending = [], 0
+            for slip_id in affected:
+                row = con.execute("SELECT slip_type, stake FROM slips WHERE slip_id = ?", (slip_id,)).fetchone()
+                if row is None:
+                    continue
+                results = [r for (r,) in con.execute("SELECT result FROM props WHERE slip_id = ?", (slip_id,))]
+                settled = settle_slip(row[0], row[1] if row[1] is not None else 0.0, results)
+                if settled is None:
+                    pending += 1
+                    continue
+                con.execute("UPDATE slips SET result = ?, payout = ? WHERE slip_id = ?", (*settled, slip_id))
+                graded.append((slip_id, *settled))
+        return {"legs_updated": updated, "legs_missing": missing,
+                "slips_graded": graded, "slips_pending": pending}
+    finally:
+        con.close()
+
+def import_frames(path: str, slips: pd.DataFrame, props: pd.DataFrame) -> Dict[str, int]:
+    """
+    One-shot import of existing histories. Refuses to run into a non-empty database.
+    """
+    con = connect(path)
+    try:
+        for table in ["slips", "props"]:
+            if con.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None:
+                raise ValueError(f"{path} already has {table}; import is one-shot.")
+        with con:
+            _insert(con, "slips", SLIP_NAMES, slips.to_dict("records"))
+            _insert(con, "props", PROP_NAMES, props.to_dict("records"))
+        return {"slips": len(slips), "props": len(props)}
+    finally:
+        con.close()
+
+def reset(path: str):
+    for f in [path, path + "-wal", path + "-shm"]:
+        if os.path.exists(f):
+            os.remove(f)
+    _ready.discard(path)
+
+def main():
+    import tracking
+
+    ap = argparse.ArgumentParser(description="Import CSV tracking history into the SQLite backend.")
+    ap.add_argument("--db", default=tracking.DB_PATH)
+    ap.add_argument("--slips", default=tracking.SLIPS_PATH)
+    ap.add_argument("--props", default=tracking.PROPS_PATH)
+    args = ap.parse_args()
+
+    counts = import_frames(
+        args.db,
+        tracking._load_csv(args.slips, tracking.SLIP_COLS),
+        tracking._load_csv(args.props, tracking.PROP_COLS),
+    )
+    print(f"Imported {counts['slips']} slips and {counts['props']} props into {args.db}")
+
+if __name__ == "__main__":
+    main()